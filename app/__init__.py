@@ -1,19 +1,65 @@
 from flask import Flask
-from app.extensions import db, jwt, bcrypt, cors, cache
+from app.extensions import db, jwt, bcrypt, cors, cache, limiter, revocations, quiz_sessions, quiz_broadcaster, tiered_cache
 
-def create_app():
+def create_app(config=None):
+    """
+    Build a configured application. Does not touch the database; run
+    `flask --app app init-db` to create the schema and the default admin.
+    config may be a mapping of overrides or an object/import path for from_object.
+    """
     app = Flask(__name__)
     
+    from app.utils.serialization import OrjsonProvider
+    app.json = OrjsonProvider(app)
+    
     # Load config
     from app.config import Config
     app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+    
+    # Client address and scheme as seen by the load balancer
+    if app.config["PROXY_FIX_HOPS"]:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        hops = app.config["PROXY_FIX_HOPS"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
     
     # Initialize extensions
+    from app.utils.engine import apply_engine_profile, register_sqlite_pragmas
+    apply_engine_profile(app)
     db.init_app(app)
+    with app.app_context():
+        engines = list(db.engines.values())
+        for engine in engines:
+            register_sqlite_pragmas(engine, app.config)
     jwt.init_app(app)
     bcrypt.init_app(app)
     cors.init_app(app)
     cache.init_app(app)
+    limiter.init_app(app)
+    revocations.init_app(app)
+    quiz_sessions.init_app(app)
+    quiz_broadcaster.init_app(app)
+    tiered_cache.init_app(app)
+
+    # Lives outside app.extensions because it depends on the models
+    from app.utils.catalog import catalog
+    catalog.init_app(app)
+    
+    # Request metrics go first so they time every other hook and see the final response
+    from app.utils.metrics import init_metrics
+    init_metrics(app, engines)
+    
+    # Registered after metrics so the recorded response size is the compressed one
+    from app.utils.compression import init_compression
+    init_compression(app)
+    
+    # Route read-only requests to replicas when any are configured
+    from app.utils.replicas import select_replica, pin_after_write
+    app.before_request(select_replica)
+    app.after_request(pin_after_write)
     
     # Configure JWT error handlers
     @jwt.invalid_token_loader
@@ -24,9 +70,13 @@ def create_app():
     def expired_token_callback(jwt_header, jwt_payload):
         return {"error": "Token has expired"}, 401
         
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return {"error": "Token has been revoked"}, 401
+        
     @jwt.unauthorized_loader
     def unauthorized_callback(error):
-        print(error)
+        app.logger.info("Unauthorized request: %s", error)
         return {"error": "Missing authorization token"}, 401
     
     # Register blueprints
@@ -40,37 +90,11 @@ def create_app():
     app.register_blueprint(user_bp, url_prefix="/user")
     app.register_blueprint(quiz_bp, url_prefix="/quiz")
     
-    # Configure Celery
-    from app.tasks import celery
-    celery.conf.update(app.config)
-    
-    class ContextTask(celery.Task):
-        def __call__(self, *args, **kwargs):
-            with app.app_context():
-                return self.run(*args, **kwargs)
-    
-    celery.Task = ContextTask
-    
-    # Create database tables and initialize admin
-    with app.app_context():
-        db.create_all()
-        create_admin_if_not_exists()
+    # CLI commands (schema setup lives here instead of running on import)
+    from app.commands import init_db_command, export_scores_command, archive_scores_command, restore_scores_command
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(export_scores_command)
+    app.cli.add_command(archive_scores_command)
+    app.cli.add_command(restore_scores_command)
     
     return app
-
-def create_admin_if_not_exists():
-    from app.models import User
-    
-    admin = User.query.filter_by(role='admin').first()
-    if not admin:
-        admin = User(
-            email='admin@quizmaster.com',
-            full_name='Quiz Master Admin',
-            role='admin'
-        )
-        admin.set_password('admin123')
-        db.session.add(admin)
-        db.session.commit()
-
-# Create app instance
-app = create_app()
\ No newline at end of file
@@ -0,0 +1,77 @@
+import os
+import click
+from flask.cli import with_appcontext
+from app.extensions import db
+
+
+@click.command("init-db")
+@with_appcontext
+def init_db_command():
+    """Create missing tables, upgrade existing ones and add the default admin account."""
+    from app.utils.migrations import run_upgrades
+    db.create_all()
+    for name, changes in run_upgrades().items():
+        click.echo(f"Upgraded schema: {name} ({', '.join(changes)})")
+    create_admin_if_not_exists()
+    click.echo("Database initialized.")
+
+
+@click.command("export-scores")
+@click.option("--out", default=None, help="File, or directory when partitioning. Defaults to EXPORT_DIR/scores.parquet.")
+@click.option("--partition-by", multiple=True, type=click.Choice(["subject", "month"]))
+@click.option("--batch-size", type=int, default=None)
+@with_appcontext
+def export_scores_command(out, partition_by, batch_size):
+    """Export every score with its quiz metadata as Parquet."""
+    from flask import current_app
+    from app.utils.parquet_export import export_scores_parquet
+    if out is None:
+        out = os.path.join(current_app.config["EXPORT_DIR"], "scores" if partition_by else "scores.parquet")
+    try:
+        stats = export_scores_parquet(out, partition_by=partition_by,
+                                      batch_size=batch_size or current_app.config["EXPORT_BATCH_SIZE"])
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Wrote {stats['rows']} scores to {stats['path']} ({stats['files']} files) in {stats['seconds']}s")
+
+
+@click.command("archive-scores")
+@click.option("--before", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Archive attempts before this date. Defaults to SCORE_ARCHIVE_AFTER_DAYS ago.")
+@with_appcontext
+def archive_scores_command(before):
+    """Move old attempts from the score table to score_archive."""
+    from app.utils.archive import archive_scores
+    moved = archive_scores(before)
+    for month, rows in sorted(moved.items()):
+        click.echo(f"{month}: {rows}")
+    click.echo(f"Archived {sum(moved.values())} scores.")
+
+
+@click.command("restore-scores")
+@click.option("--month", "months", multiple=True, help="Archive month to restore (YYYY-MM), repeatable.")
+@click.option("--all", "restore_all", is_flag=True, help="Restore the whole archive.")
+@with_appcontext
+def restore_scores_command(months, restore_all):
+    """Move archived attempts back into the score table."""
+    from app.utils.archive import restore_scores, archived_months
+    if not months and not restore_all:
+        for month, rows in archived_months():
+            click.echo(f"{month}: {rows}")
+        raise click.UsageError("Pass --month YYYY-MM or --all to restore.")
+    click.echo(f"Restored {restore_scores(None if restore_all else list(months))} scores.")
+
+
+def create_admin_if_not_exists():
+    from app.models import User
+    
+    admin = User.query.filter_by(role='admin').first()
+    if not admin:
+        admin = User(
+            email='admin@quizmaster.com',
+            full_name='Quiz Master Admin',
+            role='admin'
+        )
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
@@ -5,6 +5,31 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///quiz_master.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Database engine profile: "tuned" applies the settings below, "default" leaves
+    # SQLAlchemy and driver defaults untouched
+    DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE", "tuned")
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Per process: a deployment holds up to processes * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # connections. gunicorn.conf.py sizes these to the worker's threads unless they are set
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_PRE_PING = True
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+    # Read replicas: comma separated URLs, registered as binds replica_0, replica_1, ...
+    # Read-only requests on the routed blueprints go to a healthy replica
+    DATABASE_REPLICA_URLS = [url for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url]
+    SQLALCHEMY_BINDS = {f"replica_{i}": url for i, url in enumerate(DATABASE_REPLICA_URLS)}
+    SQLALCHEMY_REPLICA_BINDS = list(SQLALCHEMY_BINDS)
+    REPLICA_ROUTED_BLUEPRINTS = ["quiz", "user"]
+    REPLICA_READ_AFTER_WRITE_SECONDS = int(os.getenv("REPLICA_READ_AFTER_WRITE_SECONDS", "5"))
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "5"))
+    REPLICA_LAG_QUERY = os.getenv("REPLICA_LAG_QUERY")
+
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your_jwt_secret_key")
     JWT_ACCESS_TOKEN_EXPIRES = 7200  # 2 hours
@@ -17,14 +42,140 @@ class Config:
     CACHE_TYPE = "redis"
     CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
 
+    # In-process LRU (L1) in front of Redis (L2), see app/utils/tiered_cache.py
+    TIERED_CACHE_REDIS_URL = os.getenv("TIERED_CACHE_REDIS_URL", CACHE_REDIS_URL)
+    TIERED_CACHE_REDIS_TIMEOUT = float(os.getenv("TIERED_CACHE_REDIS_TIMEOUT", "0.1"))
+    TIERED_CACHE_L1_SIZE = int(os.getenv("TIERED_CACHE_L1_SIZE", "2048"))
+    TIERED_CACHE_L1_SECONDS = 5  # how long a worker may miss an invalidation made by another worker
+    TIERED_CACHE_LOCK_SECONDS = 10
+    TIERED_CACHE_RETRY_SECONDS = 5
+
+    # Proxies in front of the app that append to X-Forwarded-For / X-Forwarded-Proto (the
+    # load balancer gunicorn.conf.py assumes). request.remote_addr, which per-IP rate limits
+    # key on, is taken from that hop. Set 0 when clients connect directly, or they could
+    # pick their own address by sending the header
+    PROXY_FIX_HOPS = int(os.getenv("PROXY_FIX_HOPS", "1"))
+
+    # Rate limiting (token buckets in Redis, in-process buckets while Redis is unreachable)
+    RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "true").lower() == "true"
+    RATELIMIT_REDIS_URL = os.getenv("RATELIMIT_REDIS_URL", CACHE_REDIS_URL)
+    RATELIMIT_REDIS_TIMEOUT = float(os.getenv("RATELIMIT_REDIS_TIMEOUT", "0.05"))
+    RATELIMIT_REDIS_RETRY_SECONDS = 5
+
+    # Revoked token ids (jti) are kept in Redis until the token would have expired;
+    # each worker mirrors them in a Bloom filter rebuilt every REVOCATION_REFRESH_SECONDS
+    REVOCATION_REDIS_URL = os.getenv("REVOCATION_REDIS_URL", CACHE_REDIS_URL)
+    REVOCATION_REDIS_TIMEOUT = float(os.getenv("REVOCATION_REDIS_TIMEOUT", "0.05"))
+    REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+    REVOCATION_BLOOM_CAPACITY = 100000
+    REVOCATION_BLOOM_ERROR_RATE = 0.001
+
+    # Timed quiz sessions: deadline and autosaved answers live in Redis, never in SQL
+    QUIZ_SESSION_REDIS_URL = os.getenv("QUIZ_SESSION_REDIS_URL", CACHE_REDIS_URL)
+    QUIZ_SESSION_REDIS_TIMEOUT = float(os.getenv("QUIZ_SESSION_REDIS_TIMEOUT", "0.5"))
+    QUIZ_AUTOSAVE_FLUSH_SECONDS = float(os.getenv("QUIZ_AUTOSAVE_FLUSH_SECONDS", "1"))
+    QUIZ_SUBMIT_GRACE_SECONDS = int(os.getenv("QUIZ_SUBMIT_GRACE_SECONDS", "30"))
+    QUIZ_SESSION_RETENTION = 3600  # keep expired sessions around so late submissions are rejected, not restarted
+
+    # Quiz start countdown over server-sent events, shared through Redis pub/sub
+    QUIZ_EVENTS_REDIS_URL = os.getenv("QUIZ_EVENTS_REDIS_URL", CACHE_REDIS_URL)
+    QUIZ_EVENTS_TICK_SECONDS = 1
+    QUIZ_EVENTS_SLOW_TICK_SECONDS = 10  # tick rate until the last QUIZ_EVENTS_FINAL_SECONDS
+    QUIZ_EVENTS_FINAL_SECONDS = 60
+    QUIZ_EVENTS_HEARTBEAT_SECONDS = 15
+    QUIZ_EVENTS_LEASE_SECONDS = 5
+    QUIZ_EVENTS_RETRY_SECONDS = 5
+
+    # Attempts older than this move to the score_archive table; keep it about one academic term
+    SCORE_ARCHIVE_AFTER_DAYS = int(os.getenv("SCORE_ARCHIVE_AFTER_DAYS", "180"))
+    SCORE_ARCHIVE_BATCH_SIZE = 5000
+
+    # /user/quizzes/calendar also lists quizzes that opened up to this long ago
+    CALENDAR_RECENT_HOURS = int(os.getenv("CALENDAR_RECENT_HOURS", "24"))
+
+    # Largest batch accepted by POST /admin/questions/bulk-edit
+    QUESTION_BULK_EDIT_LIMIT = 1000
+
+    # Upper bounds for POST /admin/generate-test-data, which runs as a Celery job
+    TEST_DATA_LIMITS = {"num_users": 100000, "num_subjects": 500, "chapters_per_subject": 50,
+                        "questions_per_quiz": 100, "scores_per_user": 200}
+
+    # Background deletes remove this many rows per transaction, pausing between chunks
+    PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", "1000"))
+    PURGE_CHUNK_PAUSE_SECONDS = float(os.getenv("PURGE_CHUNK_PAUSE_SECONDS", "0.05"))
+
+    # Columnar score exports for offline analytics (needs the optional pyarrow package)
+    EXPORT_DIR = os.getenv("EXPORT_DIR", "exports")
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "50000"))
+
+    # Per-worker subject/chapter/quiz snapshot, patched from catalog:changes pub/sub messages
+    CATALOG_REDIS_URL = os.getenv("CATALOG_REDIS_URL", CACHE_REDIS_URL)
+    CATALOG_REFRESH_SECONDS = int(os.getenv("CATALOG_REFRESH_SECONDS", "300"))  # full reload in case messages were missed
+    CATALOG_RETRY_SECONDS = 5
+
     # Celery Configuration
     CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/1")
     CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
 
+    # Each task type gets its own queue so a long report run never blocks
+    # user-triggered exports. Start one worker per queue: python celery_worker.py <queue>
+    CELERY_TASK_DEFAULT_QUEUE = "default"
+    CELERY_TASK_ROUTES = {
+        "app.tasks.export_quiz_data": {"queue": "exports"},
+        "app.tasks.send_daily_reminders": {"queue": "email"},
+        "app.tasks.generate_monthly_report": {"queue": "analytics"},
+        "app.tasks.export_scores_parquet": {"queue": "analytics"},
+        "app.tasks.archive_old_scores": {"queue": "analytics"},
+        "app.tasks.delete_subject": {"queue": "analytics"},
+        "app.tasks.delete_chapter": {"queue": "analytics"},
+        "app.tasks.purge_scores": {"queue": "analytics"},
+        "app.tasks.generate_test_data": {"queue": "analytics"},
+    }
+    CELERY_QUEUE_SETTINGS = {
+        # Interactive: short tasks, one at a time per process so nothing queues behind a slow export
+        "exports": {"concurrency": int(os.getenv("CELERY_EXPORTS_CONCURRENCY", "4")), "prefetch_multiplier": 1,
+                    "acks_late": True, "soft_time_limit": 120, "time_limit": 180},
+        "email": {"concurrency": int(os.getenv("CELERY_EMAIL_CONCURRENCY", "2")), "prefetch_multiplier": 4,
+                  "soft_time_limit": 1800, "time_limit": 2100},
+        "analytics": {"concurrency": int(os.getenv("CELERY_ANALYTICS_CONCURRENCY", "1")), "prefetch_multiplier": 1,
+                      "acks_late": True, "soft_time_limit": 3600, "time_limit": 4200},
+        "default": {"concurrency": int(os.getenv("CELERY_DEFAULT_CONCURRENCY", "2")), "prefetch_multiplier": 4},
+    }
+    # Sending mail is not idempotent, so these are acknowledged on receipt whatever their
+    # queue says: a worker lost mid-run drops that run instead of mailing everyone twice
+    CELERY_ACK_ON_RECEIPT_TASKS = ["app.tasks.send_daily_reminders", "app.tasks.generate_monthly_report"]
+    # The Redis broker redelivers any unacknowledged message after this long, so it must
+    # outlast the longest time_limit or acks_late tasks still running get a second copy
+    CELERY_VISIBILITY_TIMEOUT = max(settings.get("time_limit", 0) for settings in CELERY_QUEUE_SETTINGS.values()) + 1800
+    CELERY_WORKER_REUSE_APP_CONTEXT = True
+
     # Email Configuration (for notifications)
     MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.gmail.com")
     MAIL_PORT = 587
     MAIL_USE_TLS = True
     MAIL_USERNAME = os.getenv("MAIL_USERNAME", "")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD", "")
-    MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER", "")
\ No newline at end of file
+    MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER", "")
+
+    # Request metrics exposed on /admin/metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "20"))
+
+    # Response compression. brotli and zstd are offered only when the optional
+    # brotli / zstandard packages are installed; levels trade CPU for bandwidth
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_ALGORITHMS = ["zstd", "br", "gzip"]
+    COMPRESSION_LEVELS = {
+        "gzip": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+        "br": int(os.getenv("COMPRESSION_BROTLI_LEVEL", "4")),
+        "zstd": int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")),
+    }
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+    COMPRESSION_STREAM_THRESHOLD = int(os.getenv("COMPRESSION_STREAM_THRESHOLD", str(1024 * 1024)))
+    COMPRESSION_MIMETYPES = ["application/json", "text/html", "text/plain", "text/csv", "application/javascript"]
+
+    # Near-duplicate question detection (MinHash/LSH)
+    DUPLICATE_SHINGLE_SIZE = 5
+    DUPLICATE_NUM_PERM = 64
+    DUPLICATE_LSH_BANDS = 16
+    DUPLICATE_SIMILARITY_THRESHOLD = float(os.getenv("DUPLICATE_SIMILARITY_THRESHOLD", "0.8"))
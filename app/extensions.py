@@ -3,9 +3,25 @@ from flask_jwt_extended import JWTManager
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from flask_caching import Cache
+from app.utils.replicas import RoutingSession
+from app.utils.ratelimit import RateLimiter
+from app.utils.revocation import TokenRevocation
+from app.utils.quiz_sessions import QuizSessions
+from app.utils.broadcast import QuizBroadcaster
+from app.utils.tiered_cache import TieredCache
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager()
 bcrypt = Bcrypt()
 cors = CORS(supports_credentials=True)
-cache = Cache()
\ No newline at end of file
+cache = Cache()
+limiter = RateLimiter()
+revocations = TokenRevocation()
+quiz_sessions = QuizSessions()
+quiz_broadcaster = QuizBroadcaster()
+tiered_cache = TieredCache()
+
+
+@jwt.token_in_blocklist_loader
+def token_revoked(jwt_header, jwt_payload):
+    return revocations.is_revoked(jwt_payload["jti"])
\ No newline at end of file
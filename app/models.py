@@ -10,9 +10,18 @@ class User(db.Model, UserMixin):
     qualification = db.Column(db.String(100))
     dob = db.Column(db.Date)
     phone_number = db.Column(db.String(10))
-    role = db.Column(db.String(10), default='user')
+    role = db.Column(db.String(10), default='user', index=True)
     quizzes = db.relationship('Score', backref='user', lazy=True)
 
+    __table_args__ = (
+        # text_pattern_ops lets PostgreSQL answer LIKE 'prefix%' from these under any collation
+        db.Index('ix_user_email_prefix', db.func.lower(email).label('email_lower'),
+                 postgresql_ops={'email_lower': 'text_pattern_ops'}),
+        db.Index('ix_user_full_name_prefix', db.func.lower(full_name).label('full_name_lower'),
+                 postgresql_ops={'full_name_lower': 'text_pattern_ops'}),
+        db.Index('ix_user_qualification', qualification),
+    )
+
     def set_password(self, password):
         self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
 
@@ -23,27 +32,31 @@ class Subject(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
     description = db.Column(db.Text)
-    chapters = db.relationship('Chapter', backref='subject', lazy=True, cascade="all, delete-orphan")
+    chapters = db.relationship('Chapter', backref='subject', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
 
 class Chapter(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
-    quiz = db.relationship('Quiz', backref='chapter', lazy=True, cascade="all, delete-orphan")
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id', ondelete='CASCADE'), nullable=False)
+    quiz = db.relationship('Quiz', backref='chapter', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
 
 class Quiz(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), unique=True)
-    date_of_quiz = db.Column(db.DateTime, nullable=False)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id', ondelete='CASCADE'), unique=True)
+    date_of_quiz = db.Column(db.DateTime, nullable=False, index=True)
     time_duration = db.Column(db.Integer, nullable=False)
     remarks = db.Column(db.String(500))
-    questions = db.relationship('Question', backref='quiz', lazy=True)
-    scores = db.relationship('Score', backref='quiz', lazy=True)
+    sample_size = db.Column(db.Integer)
+    shuffle_questions = db.Column(db.Boolean, default=False)
+    shuffle_options = db.Column(db.Boolean, default=False)
+    shuffle_seed = db.Column(db.Integer, default=0)
+    questions = db.relationship('Question', backref='quiz', lazy=True, passive_deletes=True)
+    scores = db.relationship('Score', backref='quiz', lazy=True, passive_deletes=True)
 
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id', ondelete='CASCADE'), nullable=False, index=True)
     question_statement = db.Column(db.Text, nullable=False)
     option1 = db.Column(db.String(255), nullable=False)
     option2 = db.Column(db.String(255), nullable=False)
@@ -53,9 +66,36 @@ class Question(db.Model):
 
 class Score(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id', ondelete='CASCADE'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     time_stamp_of_attempt = db.Column(db.DateTime, default=datetime.now())
     total_scored = db.Column(db.Integer, nullable=False)
     total_possible = db.Column(db.Integer, nullable=False, default=0)
-    completed = db.Column(db.Boolean, default=True)
\ No newline at end of file
+    completed = db.Column(db.Boolean, default=True)
+
+    __table_args__ = (
+        db.Index('ix_score_time_stamp_of_attempt', time_stamp_of_attempt),
+        # Archived rows keep their id, so SQLite must never hand it out again
+        {'sqlite_autoincrement': True},
+    )
+
+class ArchivedScore(db.Model):
+    """Scores moved out of the hot table by the archival job; rows keep their Score id"""
+    __tablename__ = 'score_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    archive_month = db.Column(db.String(7), nullable=False, index=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id', ondelete='CASCADE'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    time_stamp_of_attempt = db.Column(db.DateTime)
+    total_scored = db.Column(db.Integer, nullable=False)
+    total_possible = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Boolean, default=True)
+
+class QuestionSignature(db.Model):
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id', ondelete='CASCADE'), primary_key=True)
+    signature = db.Column(db.LargeBinary, nullable=False)
+
+class QuestionBucket(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id', ondelete='CASCADE'), nullable=False, index=True)
+    bucket_key = db.Column(db.BigInteger, nullable=False, index=True)
@@ -1,8 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 from app.extensions import db
 from app.models import Score, Subject, Chapter, Quiz, Question, User
-from app.utils.helpers import admin_required
+from app.utils.helpers import admin_required, is_int
+from app.utils.metrics import registry as metrics_registry
+from app.utils.archive import all_scores
+from app.utils.catalog import catalog
+from app.utils.purge import hide_from_catalog
+from app.utils.pagination import page_args, keyset_page, prefix_match, approximate_count
+from app.utils.sampling import parse_sampling_options, invalidate_questions
+from app.utils.dedup import signature_for, find_similar, find_batch_duplicates, index_question, index_questions, subject_duplicate_clusters
 from datetime import datetime
 
 admin_bp = Blueprint("admin", __name__)
@@ -138,11 +145,17 @@ def create_quiz():
         except ValueError:
             return jsonify({"error": "Invalid date format. Use YYYY-MM-DD HH:MM:SS"}), 400
 
+        try:
+            sampling = parse_sampling_options(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         quiz = Quiz(
             chapter_id=data["chapter_id"],
             date_of_quiz=quiz_date,
             time_duration=data["time_duration"],
-            remarks=data.get("remarks", "")
+            remarks=data.get("remarks", ""),
+            **sampling
         )
         db.session.add(quiz)
         db.session.commit()
@@ -176,6 +189,9 @@ def create_question(quiz_id):
         if not (1 <= data["correct_option"] <= 4):
             return jsonify({"error": "Correct option must be between 1 and 4"}), 400
         
+        signature, bucket_keys = signature_for(data["question_statement"])
+        possible_duplicates = find_similar(signature, bucket_keys)
+
         question = Question(
             quiz_id=quiz_id,
             question_statement=data["question_statement"],
@@ -186,11 +202,15 @@ def create_question(quiz_id):
             correct_option=data["correct_option"]
         )
         db.session.add(question)
+        db.session.flush()
+        index_question(question, signature, bucket_keys, replace=False)
         db.session.commit()
+        invalidate_questions([quiz_id])
         
         return jsonify({
             "message": "Question added",
-            "question": question.id
+            "question": question.id,
+            "possible_duplicates": possible_duplicates
         }), 201
     except Exception as e:
         db.session.rollback()
@@ -201,14 +221,40 @@ def create_question(quiz_id):
 @admin_required
 def list_users():
     try:
-        users = User.query.all()
+        try:
+            after_id, limit = page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        query = User.query
+        filtered = False
+
+        search = request.args.get("q", "").strip()
+        if search:
+            # Served by the two prefix indexes; pages cost O(matches), see keyset_page
+            query = query.filter(db.or_(prefix_match(User.email, search), prefix_match(User.full_name, search)))
+            filtered = True
+        if request.args.get("role"):
+            query = query.filter(User.role == request.args["role"])
+            filtered = True
+        if request.args.get("qualification"):
+            query = query.filter(User.qualification == request.args["qualification"])
+            filtered = True
+
+        users, next_after_id = keyset_page(query, User.id, after_id, limit)
         user_list = [{
             "id": user.id,
             "email": user.email,
             "full_name": user.full_name,
+            "qualification": user.qualification,
             "role": user.role
         } for user in users]
-        return jsonify({"users": user_list}), 200
+
+        response = {"users": user_list, "next_after_id": next_after_id}
+        # The total only needs computing once per listing, not for every page
+        if after_id is None:
+            response["total"] = approximate_count(query, User, filtered)
+        return jsonify(response), 200
     except Exception as e:
         return jsonify({"error": f"Error fetching users: {str(e)}"}), 500
     
@@ -217,22 +263,30 @@ def list_users():
 @jwt_required()
 @admin_required
 def generate_test_data():
+    """
+    Queue a synthetic dataset build; counts are capped by TEST_DATA_LIMITS. The
+    per-table row counts are the job's result under /admin/jobs/<task_id>.
+    """
     try:
-        from seed_data import seed_data
+        from app.tasks import generate_test_data as generate_task
 
         data = request.get_json() or {}
-        num_users = data.get("num_users", 10)
-        num_subjects = data.get("num_subjects", 5)
-        
-        seed_data(num_users, num_subjects)
-        
-        return jsonify({
-            "message": "Test data generated successfully",
-            "users_created": num_users,
-            "subjects_created": num_subjects
-        }), 201
+        limits = current_app.config["TEST_DATA_LIMITS"]
+        options = {}
+        for key, default in (("num_users", 10), ("num_subjects", 5), ("chapters_per_subject", 4),
+                             ("questions_per_quiz", 10), ("scores_per_user", 5)):
+            value = data.get(key, default)
+            if not is_int(value) or not (0 <= value <= limits[key]):
+                return jsonify({"error": f"{key} must be an integer between 0 and {limits[key]}"}), 400
+            options[key] = value
+        seed = data.get("seed")
+        if seed is not None and not is_int(seed):
+            return jsonify({"error": "seed must be an integer"}), 400
+
+        task = generate_task.delay(options, seed=seed, clear=data.get("clear", True) is not False)
+        return jsonify({"message": "Test data generation started", "task_id": task.id}), 202
     except Exception as e:
-        return jsonify({"error": f"Error generating test data: {str(e)}"}), 500
+        return jsonify({"error": f"Error starting test data generation: {str(e)}"}), 500
     
 @admin_bp.route("/subjects/<int:subject_id>/complete-chapter", methods=["POST"])
 @jwt_required()
@@ -257,6 +311,11 @@ def create_complete_chapter(subject_id):
         questions_data = data["questions"]
         if not isinstance(questions_data, list) or len(questions_data) == 0:
             return jsonify({"error": "Questions must be a non-empty array"}), 400
+
+        try:
+            sampling = parse_sampling_options(quiz_data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
             
         subject = Subject.query.get(subject_id)
         if not subject:
@@ -291,11 +350,15 @@ def create_complete_chapter(subject_id):
                 chapter_id=chapter.id,
                 date_of_quiz=quiz_date,
                 time_duration=quiz_data["time_duration"],
-                remarks=quiz_data.get("remarks", "")
+                remarks=quiz_data.get("remarks", ""),
+                **sampling
             )
             db.session.add(quiz)
             db.session.flush()
             
+            statements = [q_data.get("question_statement", "") for q_data in questions_data]
+            signatures, bucket_keys, duplicates = find_batch_duplicates(statements)
+
             created_questions = []
             for idx, q_data in enumerate(questions_data, 1):
                 required_question_fields = ["question_statement", "option1", "option2", 
@@ -324,6 +387,12 @@ def create_complete_chapter(subject_id):
                 )
                 db.session.add(question)
                 created_questions.append(question)
+
+            db.session.flush()
+            index_questions([
+                (question.id, signature, keys)
+                for question, signature, keys in zip(created_questions, signatures, bucket_keys)
+            ], replace=False)
             
             db.session.commit()
             
@@ -336,10 +405,22 @@ def create_complete_chapter(subject_id):
                 },
                 "quiz": {
                     "id": quiz.id,
-                    "date_of_quiz": quiz.date_of_quiz.strftime("%Y-%m-%d %H:%M:%S"),
+                    "date_of_quiz": quiz.date_of_quiz,
                     "time_duration": quiz.time_duration
                 },
-                "questions_count": len(created_questions)
+                "questions_count": len(created_questions),
+                "possible_duplicates": [
+                    {
+                        "question": idx + 1,
+                        "question_id": created_questions[idx].id,
+                        "matches": [
+                            {"question_id": created_questions[match.pop("batch_index")].id, **match}
+                            if "batch_index" in match else match
+                            for match in matches
+                        ]
+                    }
+                    for idx, matches in sorted(duplicates.items())
+                ]
             }
             
             return jsonify(response), 201
@@ -401,6 +482,12 @@ def edit_chapter(chapter_id):
                 
             if "remarks" in quiz_data:
                 quiz.remarks = quiz_data["remarks"]
+
+            try:
+                for field, value in parse_sampling_options(quiz_data).items():
+                    setattr(quiz, field, value)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
         
         db.session.commit()
         
@@ -417,9 +504,13 @@ def edit_chapter(chapter_id):
             quiz = chapter.quiz[0]
             response["quiz"] = {
                 "id": quiz.id,
-                "date_of_quiz": quiz.date_of_quiz.isoformat(),
+                "date_of_quiz": quiz.date_of_quiz,
                 "time_duration": quiz.time_duration,
-                "remarks": quiz.remarks
+                "remarks": quiz.remarks,
+                "sample_size": quiz.sample_size,
+                "shuffle_questions": quiz.shuffle_questions,
+                "shuffle_options": quiz.shuffle_options,
+                "shuffle_seed": quiz.shuffle_seed
             }
         
         return jsonify(response), 200
@@ -444,6 +535,7 @@ def edit_question(question_id):
         
         if "question_statement" in data:
             question.question_statement = data["question_statement"]
+            index_question(question)
             
         for i in range(1, 5):
             option_key = f"option{i}"
@@ -456,6 +548,7 @@ def edit_question(question_id):
             question.correct_option = data["correct_option"]
         
         db.session.commit()
+        invalidate_questions([question.quiz_id])
         
         return jsonify({
             "message": "Question updated successfully",
@@ -475,6 +568,91 @@ def edit_question(question_id):
         return jsonify({"error": f"Server error: {str(e)}"}), 500
     
 
+QUESTION_FIELDS = ("question_statement", "option1", "option2", "option3", "option4", "correct_option")
+
+def _question_update_errors(update, current):
+    """Problems with one partial update, checked against the question as it would end up"""
+    unknown = set(update) - set(QUESTION_FIELDS) - {"id"}
+    if unknown:
+        return f"Unknown fields: {', '.join(sorted(unknown))}"
+    if current is None:
+        return "Question not found"
+    merged = dict(current, **update)
+    if not isinstance(merged["question_statement"], str) or not merged["question_statement"].strip():
+        return "Question statement must be a non-empty string"
+    for i in range(1, 5):
+        option = merged[f"option{i}"]
+        if option is None and i <= 2:
+            return f"option{i} is required"
+        if option is not None and not isinstance(option, str):
+            return f"option{i} must be a string"
+    correct_option = merged["correct_option"]
+    if not is_int(correct_option) or not (1 <= correct_option <= 4):
+        return "Correct option must be between 1 and 4"
+    if merged[f"option{correct_option}"] is None:
+        return f"Correct option {correct_option} has no text"
+    return None
+
+@admin_bp.route("/questions/bulk-edit", methods=["POST"])
+@jwt_required()
+@admin_required
+def bulk_edit_questions():
+    """
+    Apply partial updates to many questions at once: {"updates": [{"id": 1,
+    "correct_option": 3}, ...]}. Every update is validated before anything is
+    written; if any fails, nothing is applied and the per-item results say why.
+    Otherwise all rows are written by one executemany UPDATE in one transaction.
+    """
+    try:
+        data = request.get_json(silent=True)
+        updates = data.get("updates") if isinstance(data, dict) else None
+        if not isinstance(updates, list) or not updates:
+            return jsonify({"error": "updates must be a non-empty list"}), 400
+        limit = current_app.config["QUESTION_BULK_EDIT_LIMIT"]
+        if len(updates) > limit:
+            return jsonify({"error": f"At most {limit} updates per request"}), 400
+        if not all(isinstance(update, dict) and is_int(update.get("id")) for update in updates):
+            return jsonify({"error": "Each update must be an object with an integer id"}), 400
+        question_ids = [update["id"] for update in updates]
+        if len(set(question_ids)) != len(question_ids):
+            return jsonify({"error": "Each question may appear only once"}), 400
+
+        rows = db.session.execute(
+            db.select(Question.id, Question.quiz_id, *(getattr(Question, field) for field in QUESTION_FIELDS))
+            .where(Question.id.in_(question_ids))
+        ).all()
+        current = {row.id: {field: getattr(row, field) for field in QUESTION_FIELDS} for row in rows}
+        quiz_ids = {row.id: row.quiz_id for row in rows}
+
+        errors = {update["id"]: _question_update_errors(update, current.get(update["id"])) for update in updates}
+        if any(errors.values()):
+            return jsonify({
+                "error": "No questions were updated",
+                "results": [
+                    {"id": question_id, "status": "invalid", "error": errors[question_id]} if errors[question_id]
+                    else {"id": question_id, "status": "skipped"}
+                    for question_id in question_ids
+                ]
+            }), 400
+
+        # Complete rows give every parameter set the same keys, so this is a single executemany UPDATE
+        merged = [dict(current[update["id"]], **update) for update in updates]
+        db.session.execute(db.update(Question), merged)
+
+        restated = [question for question in merged
+                    if question["question_statement"] != current[question["id"]]["question_statement"]]
+        index_questions([(question["id"], *signature_for(question["question_statement"])) for question in restated])
+        db.session.commit()
+        invalidate_questions(quiz_ids.values())
+
+        return jsonify({
+            "message": f"{len(merged)} questions updated",
+            "results": [{"id": question_id, "status": "updated"} for question_id in question_ids]
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
 @admin_bp.route("/quiz/<int:quiz_id>/scores", methods=["GET"])
 @jwt_required()
 @admin_required
@@ -485,17 +663,156 @@ def get_quiz_scores(quiz_id):
         if not quiz:
             return jsonify({"error": "Quiz not found"}), 404
         
-        scores = Score.query.filter_by(quiz_id=quiz_id)
+        history = all_scores(quiz_id=quiz_id)
+        scores = db.session.execute(
+            db.select(history, User.full_name).join(User, history.c.user_id == User.id).order_by(history.c.id)
+        )
         
         score_list = []
 
         for score in scores:
-            user_name = User.query.get(score.user_id).full_name
             score_list.append({
                 "time_stamp_of_attempt": score.time_stamp_of_attempt,
                 "marks_scored": str(score.total_scored) + "/" + str(score.total_possible),
-                "user_name": user_name
+                "user_name": score.full_name
             })
         return jsonify({"scores": score_list}), 200
     except Exception as e:
-        print(e)
\ No newline at end of file
+        current_app.logger.exception("Error fetching quiz scores")
+        return jsonify({"error": f"Error fetching scores: {str(e)}"}), 500
+
+@admin_bp.route("/subjects/<int:subject_id>/duplicates", methods=["GET"])
+@jwt_required()
+@admin_required
+def get_duplicate_questions(subject_id):
+    try:
+        subject = Subject.query.get(subject_id)
+        if not subject:
+            return jsonify({"error": "Subject not found"}), 404
+
+        clusters = subject_duplicate_clusters(subject_id)
+        question_ids = [question_id for cluster in clusters for question_id in cluster]
+        questions = {
+            question.id: question
+            for question in Question.query.filter(Question.id.in_(question_ids))
+        }
+
+        return jsonify({
+            "subject": subject.name,
+            "clusters": [
+                [{
+                    "id": question_id,
+                    "quiz_id": questions[question_id].quiz_id,
+                    "question_statement": questions[question_id].question_statement
+                } for question_id in cluster]
+                for cluster in clusters
+            ]
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Error finding duplicates: {str(e)}"}), 500
+
+@admin_bp.route("/metrics", methods=["GET"])
+@jwt_required()
+@admin_required
+def get_metrics():
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
+@admin_bp.route("/exports/scores", methods=["POST"])
+@jwt_required()
+@admin_required
+def export_scores_parquet():
+    from app.tasks import export_scores_parquet as export_task
+    from app.utils.parquet_export import PARTITION_KEYS, parquet_available
+    if not parquet_available():
+        return jsonify({"error": "Parquet export is not available, install pyarrow"}), 501
+
+    partition_by = (request.get_json(silent=True) or {}).get("partition_by", [])
+    if not isinstance(partition_by, list) or any(key not in PARTITION_KEYS for key in partition_by):
+        return jsonify({"error": f"partition_by must be a list of {', '.join(PARTITION_KEYS)}"}), 400
+
+    try:
+        task = export_task.delay(partition_by)
+        return jsonify({"message": "Export started", "task_id": task.id}), 202
+    except Exception as e:
+        return jsonify({"error": f"Error starting export: {str(e)}"}), 500
+
+@admin_bp.route("/exports/scores/<task_id>", methods=["GET"])
+@jwt_required()
+@admin_required
+def export_scores_parquet_status(task_id):
+    try:
+        from app.tasks import export_scores_parquet as export_task
+        task = export_task.AsyncResult(task_id)
+        if task.state == 'SUCCESS':
+            return jsonify({"state": task.state, "export": task.result}), 200
+        return jsonify({"state": task.state, "status": str(task.info) if task.info else None}), 200
+    except Exception as e:
+        return jsonify({"error": f"Error checking export status: {str(e)}"}), 500
+
+@admin_bp.route("/subjects/<int:subject_id>", methods=["DELETE"])
+@jwt_required()
+@admin_required
+def delete_subject(subject_id):
+    """Queue a chunked delete of the subject and everything under it; it disappears from listings right away"""
+    try:
+        from app.tasks import delete_subject as delete_task
+        if subject_id not in catalog.snapshot().subjects:
+            return jsonify({"error": "Subject not found"}), 404
+        task = delete_task.delay(subject_id)
+        hide_from_catalog(subject_id=subject_id)
+        return jsonify({"message": "Delete started", "task_id": task.id}), 202
+    except Exception as e:
+        return jsonify({"error": f"Error starting delete: {str(e)}"}), 500
+
+@admin_bp.route("/chapters/<int:chapter_id>", methods=["DELETE"])
+@jwt_required()
+@admin_required
+def delete_chapter(chapter_id):
+    try:
+        from app.tasks import delete_chapter as delete_task
+        if chapter_id not in catalog.snapshot().chapters:
+            return jsonify({"error": "Chapter not found"}), 404
+        task = delete_task.delay(chapter_id)
+        hide_from_catalog(chapter_id=chapter_id)
+        return jsonify({"message": "Delete started", "task_id": task.id}), 202
+    except Exception as e:
+        return jsonify({"error": f"Error starting delete: {str(e)}"}), 500
+
+@admin_bp.route("/scores/purge", methods=["POST"])
+@jwt_required()
+@admin_required
+def purge_scores():
+    """Queue deletion of attempts before {"before": "YYYY-MM-DD"} and/or of {"quiz_id": n}, or {"all": true}"""
+    from app.tasks import purge_scores as purge_task
+    data = request.get_json(silent=True) or {}
+    before, quiz_id = data.get("before"), data.get("quiz_id")
+    if before is None and quiz_id is None and data.get("all") is not True:
+        return jsonify({"error": "Pass before, quiz_id or all: true"}), 400
+    if before is not None:
+        try:
+            datetime.fromisoformat(before)
+        except (TypeError, ValueError):
+            return jsonify({"error": "before must be an ISO date"}), 400
+    if quiz_id is not None and not is_int(quiz_id):
+        return jsonify({"error": "quiz_id must be an integer"}), 400
+
+    try:
+        task = purge_task.delay(before, quiz_id)
+        return jsonify({"message": "Purge started", "task_id": task.id}), 202
+    except Exception as e:
+        return jsonify({"error": f"Error starting purge: {str(e)}"}), 500
+
+@admin_bp.route("/jobs/<task_id>", methods=["GET"])
+@jwt_required()
+@admin_required
+def job_status(task_id):
+    """State of a delete, purge or test data job; while a delete runs, rows deleted so far per table"""
+    try:
+        from app.tasks import celery
+        task = celery.AsyncResult(task_id)
+        if task.state in ('PROGRESS', 'SUCCESS') and isinstance(task.info, dict):
+            return jsonify({"state": task.state, **task.info}), 200
+        return jsonify({"state": task.state, "status": str(task.info) if task.info else None}), 200
+    except Exception as e:
+        return jsonify({"error": f"Error checking job status: {str(e)}"}), 500
@@ -1,15 +1,18 @@
-from flask import Blueprint, request, jsonify
+import redis
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Quiz, Question, Subject, Chapter
-from app.extensions import db
+from app.extensions import quiz_sessions
+from app.utils.catalog import catalog
 from app.utils.helpers import is_user_admin
+from datetime import datetime
+from app.utils.sampling import question_pool, answer_key, pool_layout, apply_layout, grade_answers
 
 quiz_bp = Blueprint("quiz", __name__)
 
 @quiz_bp.route("/subjects", methods=["GET"])
 @jwt_required()
 def get_all_subjects():
-    subjects = Subject.query.all()
+    subjects = catalog.snapshot().sorted_subjects()
     subjects_list = [
         {
             'id': subject.id,
@@ -23,21 +26,20 @@ def get_all_subjects():
 @quiz_bp.route("/subjects/<int:subject_id>/chapters", methods=["GET"])
 @jwt_required()
 def get_all_chapters(subject_id):
-    subject = Subject.query.get(subject_id)
-
-    if not subject:
+    snapshot = catalog.snapshot()
+    if subject_id not in snapshot.subjects:
         return jsonify({"error": "Subject not found"}), 404
     
-    chapters = Chapter.query.filter_by(subject_id=subject_id).all()
+    chapters = snapshot.subject_quizzes(subject_id)
     chapters_list = [
         {
             'id': chapter.id,
             'name': chapter.name,
             'description': chapter.description,
-            'quiz_id': chapter.quiz[0].id,
-            'date_of_quiz': chapter.quiz[0].date_of_quiz,
-            'time_duration': chapter.quiz[0].time_duration
-        } for chapter in chapters
+            'quiz_id': quiz.id,
+            'date_of_quiz': quiz.date_of_quiz,
+            'time_duration': quiz.time_duration
+        } for chapter, quiz in chapters
     ]
     return jsonify({'chapters': chapters_list})
 
@@ -45,27 +47,23 @@ def get_all_chapters(subject_id):
 @quiz_bp.route("/<int:quiz_id>", methods=["GET"])
 @jwt_required()
 def get_quiz(quiz_id):
-    quiz = Quiz.query.get(quiz_id)
+    """
+    Quiz metadata only. Question text is served by /quiz/<id>/questions, which
+    enforces the start time, starts the timed session and applies the
+    candidate's sample and shuffle.
+    """
+    quiz = catalog.snapshot().quizzes.get(quiz_id)
 
     if not quiz:
         return jsonify({"error": "Quiz not found"}), 404
 
-    questions = Question.query.filter_by(quiz_id=quiz_id).all()
-    question_list = [
-        {
-            "id": q.id,
-            "question_statement": q.question_statement,
-            "options": [q.option1, q.option2, q.option3, q.option4]
-        }
-        for q in questions
-    ]
-
+    pool_size = len(question_pool(quiz_id))
     quiz_data = {
         "id": quiz.id,
         "chapter_id": quiz.chapter_id,
-        "date_of_quiz": str(quiz.date_of_quiz),
+        "date_of_quiz": quiz.date_of_quiz,
         "time_duration": quiz.time_duration,
-        "questions": question_list
+        "question_count": min(quiz.sample_size, pool_size) if quiz.sample_size else pool_size
     }
 
     return jsonify({"quiz": quiz_data}), 200
@@ -74,26 +72,43 @@ def get_quiz(quiz_id):
 @jwt_required()
 def get_quiz_questions(quiz_id):
     user_id = int(get_jwt_identity())
-    quiz = Quiz.query.get(quiz_id)
-    questions = Question.query.filter_by(quiz_id=quiz_id).all()
-    
+    quiz = catalog.snapshot().quizzes.get(quiz_id)
+    if not quiz:
+        return jsonify({"error": "Quiz not found"}), 404
+
+    questions = question_pool(quiz_id)
     if not questions:
         return jsonify({"error": "No questions found for this quiz"}), 404
 
-    question_list = []
-    for q in questions:
-        question = {
-            "id": q.id,
-            "question_statement": q.question_statement,
-            "options": [q.option1, q.option2, q.option3, q.option4]
-        }
-        if is_user_admin(user_id):
-            question["correct_option"] = q.correct_option 
-        else:
-            question["option"] = 0
-        question_list.append(question)
-
-    return jsonify({"questions": question_list, "time_duration": quiz.time_duration}), 200
+    if is_user_admin(user_id):
+        correct_options = answer_key(quiz_id)
+        question_list = [
+            dict(q, correct_option=correct_options[q["id"]]) for q in questions
+        ]
+        return jsonify({"questions": question_list, "time_duration": quiz.time_duration}), 200
+
+    # Fetching the questions starts the timed session, which must not happen early
+    if datetime.now() < quiz.date_of_quiz:
+        return jsonify({"error": "Quiz has not started yet"}), 403
+
+    question_list = apply_layout(questions, pool_layout(quiz, questions, user_id))
+
+    # First fetch starts the timed session; later fetches restore the autosaved answers
+    try:
+        session = quiz_sessions.start(quiz, user_id)
+        saved = quiz_sessions.answers(session)
+    except redis.RedisError as e:
+        current_app.logger.warning("Quiz sessions unavailable, serving quiz %s untimed: %s", quiz_id, e)
+        return jsonify({"questions": question_list, "time_duration": quiz.time_duration}), 200
+
+    for question in question_list:
+        question["option"] = saved.get(question["id"], 0)
+    return jsonify({
+        "questions": question_list,
+        "time_duration": quiz.time_duration,
+        "started_at": datetime.fromtimestamp(session.started_at),
+        "deadline": datetime.fromtimestamp(session.deadline)
+    }), 200
 
 @quiz_bp.route("/<int:quiz_id>/submit", methods=["POST"])
 @jwt_required()
@@ -102,16 +117,17 @@ def submit_quiz(quiz_id):
     if not data or "answers" not in data:
         return jsonify({"error": "Missing answers"}), 400
 
-    quiz = Quiz.query.get(quiz_id)
+    quiz = catalog.snapshot().quizzes.get(quiz_id)
     if not quiz:
         return jsonify({"error": "Quiz not found"}), 404
 
-    questions = Question.query.filter_by(quiz_id=quiz_id).all()
+    questions = question_pool(quiz_id)
     if not questions:
         return jsonify({"error": "No questions found"}), 404
 
-    correct_answers = {str(q.id): q.correct_option for q in questions}
-    user_answers = data["answers"]
-    score = sum(1 for q_id, ans in user_answers.items() if correct_answers.get(q_id) == int(ans))
+    user_id = int(get_jwt_identity())
+    layout = pool_layout(quiz, questions, user_id)
+    user_answers = [(int(q_id), int(ans)) for q_id, ans in data["answers"].items()]
+    score, _ = grade_answers(layout, answer_key(quiz_id), user_answers)
 
     return jsonify({"message": "Quiz submitted", "total_score": score}), 200
\ No newline at end of file
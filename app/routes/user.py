@@ -1,9 +1,15 @@
-from flask import Blueprint, request, jsonify, current_app
+import redis
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.extensions import db, cache
-from app.models import User, Quiz, Score, Chapter, Subject
-from datetime import datetime
-from app.tasks import export_quiz_data
+from app.extensions import db, quiz_sessions, quiz_broadcaster, tiered_cache
+from app.models import User, Quiz, Score
+from datetime import datetime, timedelta
+from app.utils.archive import all_scores
+from app.utils.broadcast import event_stream
+from app.utils.catalog import catalog
+from app.utils.helpers import admin_required, is_int
+from app.utils.ratelimit import rate_limit
+from app.utils.sampling import question_pool, answer_key, pool_layout, grade_answers
 
 user_bp = Blueprint("user", __name__)
 
@@ -23,7 +29,7 @@ def get_profile():
             "email": user.email,
             "full_name": user.full_name,
             "qualification": user.qualification,
-            "dob": str(user.dob) if user.dob else None,
+            "dob": user.dob,
             "role": user.role
         }
 
@@ -33,18 +39,28 @@ def get_profile():
 
 @user_bp.route("/subject/<int:subject_id>/chapters", methods=["GET"])
 @jwt_required()
-# @cache.cached(timeout=60)  # Cache for 1 minute
 def get_chapters(subject_id):
     user_id = int(get_jwt_identity())
     try:
-        subject = Subject.query.get(subject_id)
+        snapshot = catalog.snapshot()
+        subject = snapshot.subjects.get(subject_id)
         if not subject:
             return jsonify({"error": "Subject not found"}), 404
-        chapters_list = Chapter.query.filter_by(subject_id=subject_id).all()
+        chapters_list = snapshot.subject_quizzes(subject_id)
+
+        # One query for all of the user's attempts in this subject instead of one per chapter
+        scores = {}
+        quiz_ids = [quiz.id for _, quiz in chapters_list]
+        if quiz_ids:
+            history = all_scores(user_id=user_id)
+            for score in db.session.execute(
+                db.select(history).where(history.c.quiz_id.in_(quiz_ids)).order_by(history.c.id)
+            ):
+                scores.setdefault(score.quiz_id, score)
+
         chapters = []
-        for chapter in chapters_list:
-            quiz = chapter.quiz[0]
-            score = Score.query.filter_by(quiz_id=quiz.id, user_id=user_id).first()
+        for chapter, quiz in chapters_list:
+            score = scores.get(quiz.id)
             chapter_details = {
                 'id': chapter.id,
                 'name': chapter.name,
@@ -71,43 +87,107 @@ def get_chapters(subject_id):
 def check_quiz_availability(quiz_id):
     try:
         user_id = int(get_jwt_identity())
-        quiz = Quiz.query.get(quiz_id)
+        quiz = catalog.snapshot().quizzes.get(quiz_id)
         if not quiz or quiz.date_of_quiz > datetime.now():
             return jsonify({"error": "Quiz not availble"}), 404
-        score = Score.query.filter_by(quiz_id=quiz_id, user_id=user_id).first()
+        score = db.session.execute(db.select(all_scores(user_id=user_id, quiz_id=quiz_id)).limit(1)).first()
         if score:
             return jsonify({"error": "Quiz attempted already"}), 404
         return "ok", 200
     except Exception as e:
         return jsonify({"error": f"Error checking quiz: {str(e)}"}), 500
 
+@user_bp.route("/quiz/<int:quiz_id>/events", methods=["GET"])
+@jwt_required()
+def quiz_events(quiz_id):
+    """
+    Server-sent events replacing polling of /check before a quiz opens: a
+    "countdown" event now and on every shared tick, then "open" at date_of_quiz.
+    """
+    quiz = catalog.snapshot().quizzes.get(quiz_id)
+    if not quiz:
+        return jsonify({"error": "Quiz not found"}), 404
+
+    stream = event_stream(quiz_broadcaster, quiz_id, quiz.date_of_quiz.timestamp(),
+                          current_app.config["QUIZ_EVENTS_HEARTBEAT_SECONDS"])
+    return Response(stream, mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@user_bp.route("/quiz/<int:quiz_id>/autosave", methods=["POST"])
+@jwt_required()
+def autosave_answers(quiz_id):
+    # Runs on every answer click: Redis and the cached question pool, never SQL once warm
+    user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("answers"), list):
+        return jsonify({"error": "Invalid JSON data"}), 400
+    answers = {}
+    for answer in data["answers"]:
+        if not isinstance(answer, dict) or not is_int(answer.get("question_id")) or not is_int(answer.get("option")):
+            return jsonify({"error": "Each answer needs an integer question_id and option"}), 400
+        answers[answer["question_id"]] = answer["option"]
+
+    quiz = catalog.snapshot().quizzes.get(quiz_id)
+    if not quiz:
+        return jsonify({"error": "Quiz not found"}), 404
+
+    try:
+        session = quiz_sessions.get(quiz_id, user_id)
+    except redis.RedisError as e:
+        current_app.logger.warning("Quiz sessions unavailable: %s", e)
+        return jsonify({"error": "Autosave is temporarily unavailable"}), 503
+    if session is None:
+        return jsonify({"error": "Quiz session not started"}), 409
+    if quiz_sessions.is_late(session):
+        return jsonify({"error": "Quiz time is over"}), 403
+
+    # Only the candidate's own questions and the positions shown to them (0 clears an
+    # answer), so the saved hash never outgrows the candidate's layout
+    orders = dict(pool_layout(quiz, question_pool(quiz_id), user_id))
+    for question_id, option in answers.items():
+        if question_id not in orders or not 0 <= option <= len(orders[question_id]):
+            return jsonify({"error": f"Question {question_id} has no option {option} in this quiz"}), 400
+
+    quiz_sessions.autosave(session, answers)
+    return jsonify({"saved": len(answers), "deadline": datetime.fromtimestamp(session.deadline)}), 202
+
 @user_bp.route("/quiz/<int:quiz_id>/attempt", methods=["POST"])
 @jwt_required()
 def attempt_quiz(quiz_id):
     try:
         user_id = int(get_jwt_identity())
-        quiz = Quiz.query.get(quiz_id)
-
-        correct_options = {}
-        total_possible = 0
-        for question in quiz.questions:
-            correct_options[question.id] = question.correct_option
-            total_possible += 1
+        quiz = catalog.snapshot().quizzes.get(quiz_id)
 
         if not quiz:
             return jsonify({"error": "Quiz not found"}), 404
 
-        data = request.get_json()
-        if not data or "answers" not in data or not isinstance(data["answers"], list):
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get("answers"), list):
             return jsonify({"error": "Invalid JSON data"}), 400
-        
-        marked_options = data["answers"]
-        total_scored = 0
-        for answer in marked_options:
-            if correct_options.get(answer['question_id']) != None:
-                if correct_options[answer['question_id']] == answer['option']:
-                    total_scored += 1
-                del correct_options[answer['question_id']]
+        for answer in data["answers"]:
+            if not isinstance(answer, dict) or not is_int(answer.get("question_id")) or not is_int(answer.get("option")):
+                return jsonify({"error": "Each answer needs an integer question_id and option"}), 400
+
+        # Grade the session's autosaved answers, overridden by whatever came with the submission
+        marked_options = {}
+        session = None
+        try:
+            session = quiz_sessions.get(quiz_id, user_id)
+            if session is None:
+                return jsonify({"error": "Quiz session not started, fetch the questions first"}), 409
+            if quiz_sessions.is_late(session):
+                return jsonify({"error": "Submission deadline has passed"}), 403
+            marked_options.update(quiz_sessions.answers(session))
+        except redis.RedisError as e:
+            current_app.logger.warning("Quiz sessions unavailable, grading quiz %s without a deadline: %s", quiz_id, e)
+        for answer in data["answers"]:
+            # 0 is how the question payload marks "not answered yet"
+            if answer['option']:
+                marked_options[answer['question_id']] = answer['option']
+
+        # The candidate's questions and option order are re-derived, never stored
+        layout = pool_layout(quiz, question_pool(quiz_id), user_id)
+        total_scored, total_possible = grade_answers(layout, answer_key(quiz_id), marked_options.items())
 
         score_entry = Score(
             quiz_id=quiz_id,
@@ -120,52 +200,73 @@ def attempt_quiz(quiz_id):
 
         db.session.add(score_entry)
         db.session.commit()
+
+        if session is not None:
+            try:
+                quiz_sessions.finish(session)
+            except redis.RedisError as e:
+                current_app.logger.warning("Could not close quiz session: %s", e)
         
-        # Clear user scores cache if using memoization
-        # if hasattr(get_scores, 'uncached'):
-        #     cache.delete_memoized(get_scores, user_id)
+        score_history.invalidate(user_id)
 
         return jsonify({"message": "Quiz attempt recorded", "score_id": score_entry.id, "score": total_scored}), 201
     except Exception as e:
-        print(e)
+        current_app.logger.exception("Error saving quiz attempt")
         db.session.rollback()
         return jsonify({"error": f"Error saving quiz attempt: {str(e)}"}), 500
 
-@user_bp.route("/clear", methods=["GET"])
+@user_bp.route("/clear", methods=["POST"])
+@jwt_required()
+@admin_required
 def clearScores():
-    Score.query.filter().delete()
-    db.session.commit()
-    return "hello", 200
+    """Delete every attempt, in the background and in chunks"""
+    try:
+        from app.tasks import purge_scores
+        task = purge_scores.delay()
+        return jsonify({"message": "Purge started", "task_id": task.id}), 202
+    except Exception as e:
+        return jsonify({"error": f"Error starting purge: {str(e)}"}), 500
+
+@tiered_cache.cached(ttl=300, stale_ttl=60)
+def score_history(user_id):
+    """The user's attempts, archived ones included; invalidated when they submit a quiz"""
+    history = all_scores(user_id=user_id)
+    return [
+        (score.quiz_id, score.total_scored, score.total_possible, score.time_stamp_of_attempt)
+        for score in db.session.execute(db.select(history).order_by(history.c.id))
+    ]
 
 @user_bp.route("/scores", methods=["GET"])
 @jwt_required()
-# @cache.memoize(timeout=300)  # Cache for 5 minutes
 def get_scores():
     try:
         user_id = int(get_jwt_identity())
-        scores = Score.query.filter_by(user_id=user_id).all()
+        # Names come from the catalog so a renamed chapter shows up without waiting for the cache
+        snapshot = catalog.snapshot()
         score_list = []
-
-        for score in scores:
-            quiz = Quiz.query.get(score.quiz_id)
+        for quiz_id, total_scored, total_possible, attempted_at in score_history(user_id):
+            path = snapshot.quiz_path(quiz_id)
+            if path is None:
+                continue
+            _, chapter, subject = path
             score_list.append({
-                "quiz_id": score.quiz_id, 
-                "subject": quiz.chapter.subject.name,
-                "chapter": quiz.chapter.name,
-                "marks_scored": str(score.total_scored) + "/" + str(score.total_possible),
-                "percentage": (score.total_scored / score.total_possible * 100) if score.total_possible > 0 else 0,
-                "time_stamp_of_attempt": score.time_stamp_of_attempt
+                "quiz_id": quiz_id,
+                "subject": subject.name,
+                "chapter": chapter.name,
+                "marks_scored": str(total_scored) + "/" + str(total_possible),
+                "percentage": (total_scored / total_possible * 100) if total_possible > 0 else 0,
+                "time_stamp_of_attempt": attempted_at
             })
-
-
         return jsonify({"scores": score_list}), 200
     except Exception as e:
         return jsonify({"error": f"Error fetching scores: {str(e)}"}), 500
 
 @user_bp.route("/export-scores", methods=["GET"])
 @jwt_required()
+@rate_limit("5/hour", by="identity", burst=2)
 def export_scores():
     try:
+        from app.tasks import export_quiz_data
         user_id = int(get_jwt_identity())
         
         # Trigger Celery task
@@ -182,6 +283,7 @@ def export_scores():
 @jwt_required()
 def export_status(task_id):
     try:
+        from app.tasks import export_quiz_data
         task = export_quiz_data.AsyncResult(task_id)
         
         if task.state == 'PENDING':
@@ -202,4 +304,96 @@ def export_status(task_id):
         
         return jsonify(response)
     except Exception as e:
-        return jsonify({"error": f"Error checking export status: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Error checking export status: {str(e)}"}), 500
+
+CALENDAR_WINDOWS = {"today": 1, "week": 7}
+CALENDAR_BUCKET_SECONDS = 300
+
+def calendar_bucket(now=None):
+    """Start of the CALENDAR_BUCKET_SECONDS bucket holding `now`, as a timestamp"""
+    timestamp = int((now or datetime.now()).timestamp())
+    return timestamp - timestamp % CALENDAR_BUCKET_SECONDS
+
+@tiered_cache.cached(ttl=CALENDAR_BUCKET_SECONDS)
+def calendar_window(window, bucket):
+    """
+    [(quiz_id, date_of_quiz)] shared by every user for one bucket: quizzes
+    opening from CALENDAR_RECENT_HOURS before the bucket through the end of the
+    window. Callers trim the start to their own clock.
+    """
+    start = datetime.fromtimestamp(bucket)
+    midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    return [tuple(row) for row in db.session.execute(
+        db.select(Quiz.id, Quiz.date_of_quiz).where(
+            Quiz.date_of_quiz >= start - timedelta(hours=current_app.config["CALENDAR_RECENT_HOURS"]),
+            Quiz.date_of_quiz < midnight + timedelta(days=CALENDAR_WINDOWS[window])
+        ).order_by(Quiz.date_of_quiz, Quiz.id)
+    )]
+
+@catalog.on_commit
+def invalidate_calendar(changes):
+    """A quiz was added, moved or deleted: the current bucket's windows are rebuilt on next use"""
+    if any(kind == "quiz" for kind, _ in changes):
+        bucket = calendar_bucket()
+        for window in CALENDAR_WINDOWS:
+            calendar_window.invalidate(window, bucket)
+
+@user_bp.route("/quizzes/calendar", methods=["GET"])
+@jwt_required()
+def quiz_calendar():
+    """
+    Upcoming, live and recently closed quizzes with the caller's attempt status,
+    replacing a walk over every subject's chapters. ?window=today|week (default
+    week) ends that many days after today's midnight and starts
+    CALENDAR_RECENT_HOURS ago; ?only=unattempted drops quizzes already taken.
+    """
+    window = request.args.get("window", "week")
+    if window not in CALENDAR_WINDOWS:
+        return jsonify({"error": f"window must be one of {', '.join(CALENDAR_WINDOWS)}"}), 400
+    only_unattempted = request.args.get("only") == "unattempted"
+
+    try:
+        user_id = int(get_jwt_identity())
+        now = datetime.now()
+        opened_since = now - timedelta(hours=current_app.config["CALENDAR_RECENT_HOURS"])
+        quiz_ids = [quiz_id for quiz_id, date_of_quiz in calendar_window(window, calendar_bucket(now))
+                    if date_of_quiz >= opened_since]
+
+        # Only the caller's attempts on those quizzes, archived ones included, are per user
+        marks = {}
+        if quiz_ids:
+            history = all_scores(user_id=user_id)
+            # Ordered by id, so the latest attempt per quiz is written last
+            for quiz_id, total_scored, total_possible in db.session.execute(
+                db.select(history.c.quiz_id, history.c.total_scored, history.c.total_possible)
+                .where(history.c.quiz_id.in_(quiz_ids)).order_by(history.c.id)
+            ):
+                marks[quiz_id] = f"{total_scored}/{total_possible}"
+
+        # Names come from the catalog; quizzes hidden ahead of a purge are skipped
+        snapshot = catalog.snapshot()
+        quizzes = []
+        for quiz_id in quiz_ids:
+            path = snapshot.quiz_path(quiz_id)
+            if path is None or only_unattempted and quiz_id in marks:
+                continue
+            quiz, chapter, subject = path
+            closes_at = quiz.date_of_quiz + timedelta(minutes=quiz.time_duration)
+            entry = {
+                "quiz_id": quiz_id,
+                "subject_id": subject.id,
+                "subject": subject.name,
+                "chapter_id": chapter.id,
+                "chapter": chapter.name,
+                "date_of_quiz": quiz.date_of_quiz,
+                "closes_at": closes_at,
+                "time_duration": quiz.time_duration,
+                "status": "upcoming" if now < quiz.date_of_quiz else "live" if now < closes_at else "closed",
+                "attempted": quiz_id in marks
+            }
+            if quiz_id in marks:
+                entry["marks_scored"] = marks[quiz_id]
+            quizzes.append(entry)
+        return jsonify({"window": window, "quizzes": quizzes}), 200
+    except Exception as e:
+        return jsonify({"error": f"Error fetching quiz calendar: {str(e)}"}), 500
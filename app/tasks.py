@@ -1,7 +1,13 @@
+import os
+import threading
 from celery import Celery
-from flask import current_app
+from celery.signals import worker_process_init
+from flask import current_app, has_app_context
 from app.extensions import db
 from app.models import User, Quiz, Score
+from app.utils.archive import all_scores, archive_scores
+from app.utils.lifecycle import reset_after_fork
+from app.config import Config
 from datetime import datetime, timedelta
 import csv
 import io
@@ -9,126 +15,187 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+
+def celery_settings(config):
+    return {
+        "broker_url": config["CELERY_BROKER_URL"],
+        "result_backend": config["CELERY_RESULT_BACKEND"],
+        "task_default_queue": config["CELERY_TASK_DEFAULT_QUEUE"],
+        "task_routes": config["CELERY_TASK_ROUTES"],
+        "broker_transport_options": {"visibility_timeout": config["CELERY_VISIBILITY_TIMEOUT"]},
+    }
+
+
 celery = Celery(__name__)
+# Broker and routing settings come straight from Config so producers need no Flask app
+celery.conf.update(celery_settings(vars(Config)))
+
+
+def init_celery(app):
+    """
+    Bind the Celery app to a Flask app so tasks run inside its app context.
+    With CELERY_WORKER_REUSE_APP_CONTEXT each worker thread pushes one app context
+    on its first task and keeps it (and its pooled connections) for later tasks,
+    only resetting the session between tasks.
+    """
+    config = app.config
+    annotations = {}
+    for task_name, route in config["CELERY_TASK_ROUTES"].items():
+        settings = config["CELERY_QUEUE_SETTINGS"].get(route["queue"], {})
+        annotations[task_name] = {
+            option: settings[option]
+            for option in ("acks_late", "soft_time_limit", "time_limit")
+            if option in settings
+        }
+        if task_name in config["CELERY_ACK_ON_RECEIPT_TASKS"]:
+            annotations[task_name]["acks_late"] = False
+
+    celery.conf.update(celery_settings(config), task_annotations=annotations)
+
+    reuse_context = config["CELERY_WORKER_REUSE_APP_CONTEXT"]
+    worker_context = threading.local()
+
+    class ContextTask(celery.Task):
+        def __call__(self, *args, **kwargs):
+            # Called inline (e.g. from a request) or reuse disabled: one context per task
+            if not reuse_context or (has_app_context() and getattr(worker_context, "context", None) is None):
+                with app.app_context():
+                    return self.run(*args, **kwargs)
+
+            if getattr(worker_context, "context", None) is None:
+                worker_context.context = app.app_context()
+                worker_context.context.push()
+            try:
+                return self.run(*args, **kwargs)
+            finally:
+                db.session.remove()
+
+    celery.Task = ContextTask
+
+    @worker_process_init.connect(weak=False)
+    def reset_worker_process(**kwargs):
+        # Prefork children must not reuse connections inherited from the parent
+        reset_after_fork(app)
+
+    return celery
+
 
 @celery.task
 def send_daily_reminders():
     """
     Send daily reminders to users who haven't logged in or have new quizzes available
     """
-    with current_app.app_context():
-        # Find users who need reminders
-        users = User.query.filter_by(role='user').all()
-        
-        # Find recent quizzes (created in the last 24 hours)
-        recent_quizzes = Quiz.query.filter(
-            Quiz.date_of_quiz >= datetime.utcnow() - timedelta(days=1)
-        ).all()
-        
-        if recent_quizzes:
-            for user in users:
-                # Check if user has attempted these quizzes
-                user_scores = Score.query.filter_by(user_id=user.id).all()
-                attempted_quiz_ids = [score.quiz_id for score in user_scores]
-                
-                new_quizzes = [quiz for quiz in recent_quizzes if quiz.id not in attempted_quiz_ids]
-                
-                if new_quizzes:
-                    # Send reminder email
-                    send_email(
-                        user.email,
-                        "New Quizzes Available",
-                        f"Hello {user.full_name},\n\nThere are {len(new_quizzes)} new quizzes available for you to attempt.\n\nRegards,\nQuiz Master Team"
-                    )
+    # Find users who need reminders
+    users = User.query.filter_by(role='user').all()
+    
+    # Find recent quizzes (created in the last 24 hours)
+    recent_quizzes = Quiz.query.filter(
+        Quiz.date_of_quiz >= datetime.utcnow() - timedelta(days=1)
+    ).all()
+    
+    if recent_quizzes:
+        for user in users:
+            # Check if user has attempted these quizzes
+            user_scores = Score.query.filter_by(user_id=user.id).all()
+            attempted_quiz_ids = [score.quiz_id for score in user_scores]
+            
+            new_quizzes = [quiz for quiz in recent_quizzes if quiz.id not in attempted_quiz_ids]
+            
+            if new_quizzes:
+                # Send reminder email
+                send_email(
+                    user.email,
+                    "New Quizzes Available",
+                    f"Hello {user.full_name},\n\nThere are {len(new_quizzes)} new quizzes available for you to attempt.\n\nRegards,\nQuiz Master Team"
+                )
 
 @celery.task
 def generate_monthly_report():
     """
     Generate and send monthly activity reports to all users
     """
-    with current_app.app_context():
-        # Get all users
-        users = User.query.filter_by(role='user').all()
-        
-        # Current month
-        now = datetime.utcnow()
-        month_start = datetime(now.year, now.month, 1)
-        prev_month = now.month - 1 if now.month > 1 else 12
-        prev_year = now.year if now.month > 1 else now.year - 1
-        prev_month_start = datetime(prev_year, prev_month, 1)
+    # Get all users
+    users = User.query.filter_by(role='user').all()
+    
+    # Current month
+    now = datetime.utcnow()
+    month_start = datetime(now.year, now.month, 1)
+    prev_month = now.month - 1 if now.month > 1 else 12
+    prev_year = now.year if now.month > 1 else now.year - 1
+    prev_month_start = datetime(prev_year, prev_month, 1)
+    
+    for user in users:
+        # Get scores from the previous month
+        scores = Score.query.filter(
+            Score.user_id == user.id,
+            Score.time_stamp_of_attempt >= prev_month_start,
+            Score.time_stamp_of_attempt < month_start
+        ).all()
         
-        for user in users:
-            # Get scores from the previous month
-            scores = Score.query.filter(
-                Score.user_id == user.id,
-                Score.time_stamp_of_attempt >= prev_month_start,
-                Score.time_stamp_of_attempt < month_start
-            ).all()
+        if scores:
+            # Generate report
+            total_quizzes = len(scores)
+            avg_score = sum(score.total_scored for score in scores) / total_quizzes if total_quizzes > 0 else 0
             
-            if scores:
-                # Generate report
-                total_quizzes = len(scores)
-                avg_score = sum(score.total_scored for score in scores) / total_quizzes if total_quizzes > 0 else 0
+            # Create HTML report
+            html_report = f"""
+            <html>
+            <head>
+                <style>
+                    body {{ font-family: Arial, sans-serif; }}
+                    h1 {{ color: #4a86e8; }}
+                    table {{ border-collapse: collapse; width: 100%; }}
+                    th, td {{ padding: 8px; text-align: left; border-bottom: 1px solid #ddd; }}
+                    th {{ background-color: #f2f2f2; }}
+                </style>
+            </head>
+            <body>
+                <h1>Monthly Activity Report</h1>
+                <p>Hello {user.full_name},</p>
+                <p>Here is your activity report for {prev_month}/{prev_year}:</p>
                 
-                # Create HTML report
-                html_report = f"""
-                <html>
-                <head>
-                    <style>
-                        body {{ font-family: Arial, sans-serif; }}
-                        h1 {{ color: #4a86e8; }}
-                        table {{ border-collapse: collapse; width: 100%; }}
-                        th, td {{ padding: 8px; text-align: left; border-bottom: 1px solid #ddd; }}
-                        th {{ background-color: #f2f2f2; }}
-                    </style>
-                </head>
-                <body>
-                    <h1>Monthly Activity Report</h1>
-                    <p>Hello {user.full_name},</p>
-                    <p>Here is your activity report for {prev_month}/{prev_year}:</p>
-                    
-                    <h2>Summary</h2>
-                    <p>Total quizzes taken: {total_quizzes}</p>
-                    <p>Average score: {avg_score:.2f}%</p>
-                    
-                    <h2>Details</h2>
-                    <table>
-                        <tr>
-                            <th>Quiz ID</th>
-                            <th>Date</th>
-                            <th>Score</th>
-                            <th>Total</th>
-                            <th>Percentage</th>
-                        </tr>
-                """
-                
-                for score in scores:
-                    percentage = (score.total_scored / score.total_possible * 100) if score.total_possible > 0 else 0
-                    html_report += f"""
-                        <tr>
-                            <td>{score.quiz_id}</td>
-                            <td>{score.time_stamp_of_attempt.strftime('%Y-%m-%d %H:%M')}</td>
-                            <td>{score.total_scored}</td>
-                            <td>{score.total_possible}</td>
-                            <td>{percentage:.2f}%</td>
-                        </tr>
-                    """
+                <h2>Summary</h2>
+                <p>Total quizzes taken: {total_quizzes}</p>
+                <p>Average score: {avg_score:.2f}%</p>
                 
-                html_report += """
-                    </table>
-                    <p>Keep up the good work!</p>
-                    <p>Regards,<br>Quiz Master Team</p>
-                </body>
-                </html>
+                <h2>Details</h2>
+                <table>
+                    <tr>
+                        <th>Quiz ID</th>
+                        <th>Date</th>
+                        <th>Score</th>
+                        <th>Total</th>
+                        <th>Percentage</th>
+                    </tr>
+            """
+            
+            for score in scores:
+                percentage = (score.total_scored / score.total_possible * 100) if score.total_possible > 0 else 0
+                html_report += f"""
+                    <tr>
+                        <td>{score.quiz_id}</td>
+                        <td>{score.time_stamp_of_attempt.strftime('%Y-%m-%d %H:%M')}</td>
+                        <td>{score.total_scored}</td>
+                        <td>{score.total_possible}</td>
+                        <td>{percentage:.2f}%</td>
+                    </tr>
                 """
-                
-                # Send email with HTML report
-                send_email(
-                    user.email,
-                    f"Monthly Activity Report - {prev_month}/{prev_year}",
-                    "Please see the attached HTML report.",
-                    html_content=html_report
-                )
+            
+            html_report += """
+                </table>
+                <p>Keep up the good work!</p>
+                <p>Regards,<br>Quiz Master Team</p>
+            </body>
+            </html>
+            """
+            
+            # Send email with HTML report
+            send_email(
+                user.email,
+                f"Monthly Activity Report - {prev_month}/{prev_year}",
+                "Please see the attached HTML report.",
+                html_content=html_report
+            )
 
 @celery.task
 def export_quiz_data(user_id=None):
@@ -137,52 +204,99 @@ def export_quiz_data(user_id=None):
     If user_id is provided, export quizzes for that user
     Otherwise export all quizzes (admin view)
     """
-    with current_app.app_context():
-        output = io.StringIO()
-        writer = csv.writer(output)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    
+    if user_id:
+        # User view - export their quiz attempts
+        history = all_scores(user_id=user_id)
+        scores = db.session.execute(db.select(history).order_by(history.c.id)).all()
         
-        if user_id:
-            # User view - export their quiz attempts
-            scores = Score.query.filter_by(user_id=user_id).all()
-            
-            # Write header
-            writer.writerow(['Quiz ID', 'Date Attempted', 'Score', 'Total Possible', 'Percentage'])
-            
-            # Write data
-            for score in scores:
-                percentage = (score.total_scored / score.total_possible * 100) if score.total_possible > 0 else 0
-                writer.writerow([
-                    score.quiz_id,
-                    score.time_stamp_of_attempt.strftime('%Y-%m-%d %H:%M'),
-                    score.total_scored,
-                    score.total_possible,
-                    f"{percentage:.2f}%"
-                ])
-        else:
-            # Admin view - export all users' performance
-            users = User.query.filter_by(role='user').all()
-            
-            # Write header
-            writer.writerow(['User ID', 'Email', 'Full Name', 'Quizzes Taken', 'Average Score'])
-            
-            # Write data
-            for user in users:
-                scores = Score.query.filter_by(user_id=user.id).all()
-                quizzes_taken = len(scores)
-                avg_score = sum(score.total_scored for score in scores) / quizzes_taken if quizzes_taken > 0 else 0
-                writer.writerow([
-                    user.id,
-                    user.email,
-                    user.full_name,
-                    quizzes_taken,
-                    f"{avg_score:.2f}%"
-                ])
+        # Write header
+        writer.writerow(['Quiz ID', 'Date Attempted', 'Score', 'Total Possible', 'Percentage'])
         
-        # Get the CSV data
-        csv_data = output.getvalue()
-        output.close()
+        # Write data
+        for score in scores:
+            percentage = (score.total_scored / score.total_possible * 100) if score.total_possible > 0 else 0
+            writer.writerow([
+                score.quiz_id,
+                score.time_stamp_of_attempt.strftime('%Y-%m-%d %H:%M'),
+                score.total_scored,
+                score.total_possible,
+                f"{percentage:.2f}%"
+            ])
+    else:
+        # Admin view - export all users' performance
+        users = User.query.filter_by(role='user').all()
         
-        return csv_data
+        # Write header
+        writer.writerow(['User ID', 'Email', 'Full Name', 'Quizzes Taken', 'Average Score'])
+        
+        # Write data
+        for user in users:
+            scores = db.session.execute(db.select(all_scores(user_id=user.id))).all()
+            quizzes_taken = len(scores)
+            avg_score = sum(score.total_scored for score in scores) / quizzes_taken if quizzes_taken > 0 else 0
+            writer.writerow([
+                user.id,
+                user.email,
+                user.full_name,
+                quizzes_taken,
+                f"{avg_score:.2f}%"
+            ])
+    
+    # Get the CSV data
+    csv_data = output.getvalue()
+    output.close()
+    
+    return csv_data
+
+@celery.task
+def export_scores_parquet(partition_by=()):
+    """Write all scores as Parquet under EXPORT_DIR; returns the export's path and row count"""
+    from app.utils.parquet_export import export_scores_parquet as write_parquet
+    name = f"scores-{datetime.now():%Y%m%d-%H%M%S}"
+    if not partition_by:
+        name += ".parquet"
+    path = os.path.join(current_app.config['EXPORT_DIR'], name)
+    return write_parquet(path, partition_by=tuple(partition_by), batch_size=current_app.config['EXPORT_BATCH_SIZE'])
+
+@celery.task
+def archive_old_scores():
+    """Move attempts older than SCORE_ARCHIVE_AFTER_DAYS out of the hot Score table"""
+    moved = archive_scores()
+    return {"moved": sum(moved.values()), "months": moved}
+
+def _report_progress(task):
+    """Expose per-table delete counts as the task's PROGRESS state"""
+    def report(counts):
+        if task.request.id:
+            task.update_state(state='PROGRESS', meta={'deleted': counts})
+    return report
+
+@celery.task(bind=True)
+def delete_subject(self, subject_id):
+    """Delete a subject with its chapters, quizzes, questions and scores in small chunks"""
+    from app.utils import purge
+    return {'deleted': purge.delete_subject(subject_id, progress=_report_progress(self))}
+
+@celery.task(bind=True)
+def delete_chapter(self, chapter_id):
+    from app.utils import purge
+    return {'deleted': purge.delete_chapter(chapter_id, progress=_report_progress(self))}
+
+@celery.task(bind=True)
+def purge_scores(self, before=None, quiz_id=None):
+    """before is an ISO date; without before or quiz_id every attempt is deleted"""
+    from app.utils import purge
+    before = datetime.fromisoformat(before) if before else None
+    return {'deleted': purge.purge_scores(before, quiz_id, progress=_report_progress(self))}
+
+@celery.task
+def generate_test_data(options, seed=None, clear=True):
+    """Bulk synthetic dataset for load testing; replaces the existing data unless clear is False"""
+    from seed_data import seed_data
+    return seed_data(seed=seed, clear=clear, **options)
 
 def send_email(to, subject, body, html_content=None):
     """Helper function to send emails"""
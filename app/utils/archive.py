@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from app.extensions import db
+from app.models import Score, ArchivedScore
+
+COLUMNS = ("id", "quiz_id", "user_id", "time_stamp_of_attempt", "total_scored", "total_possible", "completed")
+
+
+def all_scores(user_id=None, quiz_id=None):
+    """
+    Hot and archived scores as one subquery with Score's columns. Filters are
+    applied to both halves of the UNION ALL so each side can use its indexes;
+    use it wherever history older than the archive cutoff must show up.
+    """
+    selects = []
+    for model in (Score, ArchivedScore):
+        select = db.select(*(getattr(model, name) for name in COLUMNS))
+        if user_id is not None:
+            select = select.where(model.user_id == user_id)
+        if quiz_id is not None:
+            select = select.where(model.quiz_id == quiz_id)
+        selects.append(select)
+    return db.union_all(*selects).subquery("scores")
+
+
+def archive_cutoff(now=None):
+    """Attempts before this moment belong in the archive"""
+    return (now or datetime.now()) - timedelta(days=current_app.config["SCORE_ARCHIVE_AFTER_DAYS"])
+
+
+def _move(source, target, rows, month_of):
+    """Copy rows into target and delete them from source in the current transaction"""
+    values = []
+    for row in rows:
+        value = {name: getattr(row, name) for name in COLUMNS}
+        if target is ArchivedScore:
+            value["archive_month"] = month_of(row)
+        values.append(value)
+    db.session.execute(target.__table__.insert(), values)
+    db.session.execute(source.__table__.delete().where(source.id.in_([row.id for row in rows])))
+
+
+def _archive_month(row):
+    return f"{row.time_stamp_of_attempt:%Y-%m}" if row.time_stamp_of_attempt else "unknown"
+
+
+def archive_scores(before=None, batch_size=None):
+    """
+    Move attempts older than `before` (default: archive_cutoff()) from Score to
+    the archive, batch_size rows per transaction so the hot table is never
+    locked for long. Returns rows moved per archive month.
+    """
+    before = before or archive_cutoff()
+    batch_size = batch_size or current_app.config["SCORE_ARCHIVE_BATCH_SIZE"]
+    moved = {}
+    while True:
+        rows = db.session.execute(
+            db.select(*(getattr(Score, name) for name in COLUMNS))
+            .where(Score.time_stamp_of_attempt < before)
+            .order_by(Score.time_stamp_of_attempt, Score.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return moved
+        try:
+            _move(Score, ArchivedScore, rows, _archive_month)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for row in rows:
+            month = _archive_month(row)
+            moved[month] = moved.get(month, 0) + 1
+
+
+def restore_scores(months=None, batch_size=None):
+    """Move archived attempts back to Score, only those of `months` ("YYYY-MM") if given"""
+    batch_size = batch_size or current_app.config["SCORE_ARCHIVE_BATCH_SIZE"]
+    restored = 0
+    while True:
+        select = db.select(*(getattr(ArchivedScore, name) for name in COLUMNS)).order_by(ArchivedScore.id)
+        if months:
+            select = select.where(ArchivedScore.archive_month.in_(months))
+        rows = db.session.execute(select.limit(batch_size)).all()
+        if not rows:
+            return restored
+        try:
+            _move(ArchivedScore, Score, rows, None)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        restored += len(rows)
+
+
+def archived_months():
+    """[(month, rows)] currently in the archive"""
+    return db.session.execute(
+        db.select(ArchivedScore.archive_month, db.func.count())
+        .group_by(ArchivedScore.archive_month).order_by(ArchivedScore.archive_month)
+    ).all()
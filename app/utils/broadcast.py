@@ -0,0 +1,204 @@
+import json
+import queue
+import threading
+import time
+import uuid
+import redis
+
+CHANNEL = "quizevents:{}"
+LEASE_KEY = "quizevents:{}:timer"
+
+# Extend the lease only if this worker still holds it
+RENEW_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class _Quiz:
+    def __init__(self, quiz_id, opens_at):
+        self.quiz_id = quiz_id
+        self.opens_at = opens_at
+        self.subscribers = set()
+        self.leading = False
+        self.lease_checked_at = 0.0
+        self.next_tick = 0.0
+
+
+class QuizBroadcaster:
+    """
+    Countdown and "open" events for quizzes that clients are waiting on.
+
+    Each worker process runs one background thread that holds a single Redis
+    pub/sub connection, subscribed to quizevents:<id> for the quizzes its local
+    clients wait on, and fans each message out to their queues. Per quiz, one
+    worker across the deployment holds a lease in Redis and is the timer: it
+    publishes ticks and the final "open" event. If the timer worker dies its
+    lease expires and another worker with waiting clients takes over. Without
+    Redis every worker times its own clients.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._config = None
+        self._logger = None
+        self.reset()
+
+    def init_app(self, app):
+        from app.utils.lifecycle import after_fork
+        app.extensions["quiz_broadcaster"] = self
+        self._config = app.config
+        self._logger = app.logger
+        self.reset()
+        after_fork(self.reset)
+
+    def reset(self):
+        self._client = None
+        self._renew = None
+        self._thread = None
+        self._quizzes = {}
+        self._token = uuid.uuid4().hex
+
+    def _redis(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self._config["QUIZ_EVENTS_REDIS_URL"], socket_connect_timeout=1)
+            self._renew = self._client.register_script(RENEW_LEASE)
+        return self._client
+
+    def subscribe(self, quiz_id, opens_at):
+        """Queue receiving this quiz's events; pass it back to unsubscribe()"""
+        subscriber = queue.Queue()
+        with self._lock:
+            quiz = self._quizzes.setdefault(quiz_id, _Quiz(quiz_id, opens_at))
+            quiz.opens_at = opens_at
+            quiz.subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="quiz-events", daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, quiz_id, subscriber):
+        with self._lock:
+            quiz = self._quizzes.get(quiz_id)
+            if quiz is not None:
+                quiz.subscribers.discard(subscriber)
+
+    def _deliver(self, quiz_id, message):
+        with self._lock:
+            quiz = self._quizzes.get(quiz_id)
+            subscribers = list(quiz.subscribers) if quiz else []
+        for subscriber in subscribers:
+            subscriber.put(message)
+
+    def _run(self):
+        pubsub = None
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+                self._sync_channels(pubsub)
+                if pubsub.subscribed:
+                    message = pubsub.get_message(timeout=0.2)
+                    if message is not None:
+                        quiz_id = int(message["channel"].decode().split(":")[1])
+                        self._deliver(quiz_id, json.loads(message["data"]))
+                else:
+                    time.sleep(0.2)
+                self._run_timers(local=False)
+            except redis.RedisError as e:
+                self._logger.warning("Quiz event broadcaster lost Redis, timing clients locally: %s", e)
+                pubsub = None
+                retry_at = time.monotonic() + self._config["QUIZ_EVENTS_RETRY_SECONDS"]
+                while time.monotonic() < retry_at:
+                    self._prune()
+                    self._run_timers(local=True)
+                    time.sleep(0.2)
+            except Exception:
+                self._logger.exception("Quiz event broadcaster error")
+                time.sleep(1)
+
+    def _prune(self):
+        """Forget quizzes nobody in this process is waiting on any more, returns them"""
+        with self._lock:
+            idle = [quiz for quiz in self._quizzes.values() if not quiz.subscribers]
+            for quiz in idle:
+                del self._quizzes[quiz.quiz_id]
+        return idle
+
+    def _sync_channels(self, pubsub):
+        for quiz in self._prune():
+            if quiz.leading:
+                self._client.delete(LEASE_KEY.format(quiz.quiz_id))
+        with self._lock:
+            wanted = {CHANNEL.format(quiz_id).encode() for quiz_id in self._quizzes}
+        current = set(pubsub.channels)
+        if wanted - current:
+            pubsub.subscribe(*(wanted - current))
+        if current - wanted:
+            pubsub.unsubscribe(*(current - wanted))
+
+    def _run_timers(self, local):
+        now = time.time()
+        lease_ms = int(self._config["QUIZ_EVENTS_LEASE_SECONDS"] * 1000)
+        with self._lock:
+            quizzes = list(self._quizzes.values())
+        for quiz in quizzes:
+            if not local:
+                # Take or renew the timer lease twice per lease period
+                if now - quiz.lease_checked_at > lease_ms / 2000:
+                    quiz.lease_checked_at = now
+                    key = LEASE_KEY.format(quiz.quiz_id)
+                    if quiz.leading:
+                        quiz.leading = bool(self._renew(keys=[key], args=[self._token, lease_ms]))
+                    else:
+                        quiz.leading = bool(self._client.set(key, self._token, nx=True, px=lease_ms))
+                if not quiz.leading:
+                    continue
+            if now < quiz.next_tick:
+                continue
+
+            message = countdown_message(quiz.quiz_id, quiz.opens_at, now)
+            if local:
+                self._deliver(quiz.quiz_id, message)
+            else:
+                self._client.publish(CHANNEL.format(quiz.quiz_id), json.dumps(message))
+            interval = self._config["QUIZ_EVENTS_TICK_SECONDS"]
+            if quiz.opens_at - now > self._config["QUIZ_EVENTS_FINAL_SECONDS"]:
+                interval = self._config["QUIZ_EVENTS_SLOW_TICK_SECONDS"]
+            if now < quiz.opens_at:
+                # Wake exactly at the opening time rather than up to one interval late
+                quiz.next_tick = min(now + interval, quiz.opens_at)
+            else:
+                quiz.next_tick = now + interval
+
+
+def countdown_message(quiz_id, opens_at, now=None):
+    now = time.time() if now is None else now
+    if now >= opens_at:
+        return {"event": "open", "quiz_id": quiz_id}
+    return {"event": "countdown", "quiz_id": quiz_id, "seconds_left": max(0, int(round(opens_at - now)))}
+
+
+def event_stream(broadcaster, quiz_id, opens_at, heartbeat):
+    """text/event-stream generator: an immediate countdown, shared ticks, then "open" and the end"""
+    message = countdown_message(quiz_id, opens_at)
+    yield "retry: 3000\n\n"
+    yield f"event: {message['event']}\ndata: {json.dumps(message)}\n\n"
+    if message["event"] == "open":
+        return
+
+    subscriber = broadcaster.subscribe(quiz_id, opens_at)
+    try:
+        while True:
+            try:
+                message = subscriber.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {message['event']}\ndata: {json.dumps(message)}\n\n"
+            if message["event"] == "open":
+                return
+    finally:
+        broadcaster.unsubscribe(quiz_id, subscriber)
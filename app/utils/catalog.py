@@ -0,0 +1,242 @@
+import json
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime
+import redis
+from sqlalchemy import event
+from app.extensions import db
+from app.models import Subject, Chapter, Quiz
+from app.utils.replicas import RoutingSession
+
+CHANNEL = "catalog:changes"
+
+SubjectNode = namedtuple("SubjectNode", "id name description")
+ChapterNode = namedtuple("ChapterNode", "id name description subject_id")
+QuizNode = namedtuple("QuizNode", "id chapter_id date_of_quiz time_duration remarks sample_size "
+                                  "shuffle_questions shuffle_options shuffle_seed")
+
+NODES = {"subject": (Subject, SubjectNode), "chapter": (Chapter, ChapterNode), "quiz": (Quiz, QuizNode)}
+KINDS = {model: kind for kind, (model, _) in NODES.items()}
+
+
+def _node(kind, obj):
+    return NODES[kind][1](*(getattr(obj, field) for field in NODES[kind][1]._fields))
+
+
+class CatalogSnapshot:
+    """Immutable subject -> chapter -> quiz tree with id indexes; changes produce a new snapshot"""
+
+    def __init__(self, subjects, chapters, quizzes):
+        self.subjects = subjects
+        self.chapters = chapters
+        self.quizzes = quizzes
+        self.loaded_at = time.monotonic()
+        self.quiz_by_chapter = {quiz.chapter_id: quiz for quiz in quizzes.values()}
+        chapters_by_subject = {}
+        for chapter in sorted(chapters.values()):
+            chapters_by_subject.setdefault(chapter.subject_id, []).append(chapter)
+        self.chapters_by_subject = {subject_id: tuple(items) for subject_id, items in chapters_by_subject.items()}
+
+    def patched(self, changes):
+        """New snapshot with {(kind, id): node or None for deleted} applied"""
+        tables = {"subject": dict(self.subjects), "chapter": dict(self.chapters), "quiz": dict(self.quizzes)}
+        for (kind, node_id), node in changes.items():
+            if node is None:
+                tables[kind].pop(node_id, None)
+            else:
+                tables[kind][node_id] = node
+        snapshot = CatalogSnapshot(tables["subject"], tables["chapter"], tables["quiz"])
+        snapshot.loaded_at = self.loaded_at
+        return snapshot
+
+    def sorted_subjects(self):
+        return [self.subjects[subject_id] for subject_id in sorted(self.subjects)]
+
+    def subject_quizzes(self, subject_id):
+        """[(chapter, quiz)] for the subject's chapters that have a quiz, by chapter id"""
+        return [
+            (chapter, self.quiz_by_chapter[chapter.id])
+            for chapter in self.chapters_by_subject.get(subject_id, ())
+            if chapter.id in self.quiz_by_chapter
+        ]
+
+    def quiz_path(self, quiz_id):
+        """(quiz, chapter, subject), or None if any link is missing"""
+        quiz = self.quizzes.get(quiz_id)
+        chapter = self.chapters.get(quiz.chapter_id) if quiz else None
+        subject = self.subjects.get(chapter.subject_id) if chapter else None
+        return (quiz, chapter, subject) if subject else None
+
+
+def _encode(changes):
+    encoded = []
+    for (kind, node_id), node in changes.items():
+        values = node._asdict() if node is not None else None
+        if values is not None and kind == "quiz" and values["date_of_quiz"] is not None:
+            values["date_of_quiz"] = values["date_of_quiz"].isoformat()
+        encoded.append([kind, node_id, values])
+    return encoded
+
+
+def _decode(encoded):
+    changes = {}
+    for kind, node_id, values in encoded:
+        if values is not None and kind == "quiz" and values["date_of_quiz"] is not None:
+            values["date_of_quiz"] = datetime.fromisoformat(values["date_of_quiz"])
+        changes[(kind, node_id)] = NODES[kind][1](**values) if values is not None else None
+    return changes
+
+
+class Catalog:
+    """
+    Per-worker snapshot of subjects, chapters and quizzes, so catalog lookups are
+    dictionary reads. Committed ORM changes to those models patch this worker's
+    snapshot and are published on catalog:changes with the new rows; a
+    background thread in every other worker applies them without touching the
+    database. Bulk Core writes (seeding) call invalidate(), which makes every
+    worker reload. As a safety net for missed messages the snapshot is also
+    reloaded every CATALOG_REFRESH_SECONDS and after each pub/sub reconnect.
+    Caches derived from the catalog register on_commit() to be dropped when it
+    changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._config = None
+        self._logger = None
+        self._commit_callbacks = []
+        self.reset()
+
+    def init_app(self, app):
+        from app.utils.lifecycle import after_fork
+        app.extensions["catalog"] = self
+        self._config = app.config
+        self._logger = app.logger
+        self.reset()
+        after_fork(self.reset)
+
+    def reset(self):
+        self._snapshot = None
+        self._reload = False
+        self._client = None
+        self._thread = None
+        self._origin = uuid.uuid4().hex
+
+    def _redis(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self._config["CATALOG_REDIS_URL"], socket_connect_timeout=1)
+        return self._client
+
+    def load(self):
+        tables = {}
+        for kind, (model, node) in NODES.items():
+            rows = db.session.execute(db.select(*(getattr(model, field) for field in node._fields)))
+            tables[kind] = {row.id: node(*row) for row in rows}
+        snapshot = CatalogSnapshot(tables["subject"], tables["chapter"], tables["quiz"])
+        with self._lock:
+            self._snapshot = snapshot
+            self._reload = False
+        return snapshot
+
+    def snapshot(self):
+        """The current tree; loads it on first use or when a reload is due (needs an app context)"""
+        snapshot = self._snapshot
+        if snapshot is None or self._reload \
+                or time.monotonic() - snapshot.loaded_at > self._config["CATALOG_REFRESH_SECONDS"]:
+            snapshot = self.load()
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._listen, name="catalog-changes", daemon=True)
+                    self._thread.start()
+        return snapshot
+
+    def _apply(self, changes):
+        with self._lock:
+            if self._snapshot is not None:
+                self._snapshot = self._snapshot.patched(changes)
+
+    def _publish(self, message):
+        try:
+            self._redis().publish(CHANNEL, json.dumps(dict(message, origin=self._origin)))
+        except redis.RedisError as e:
+            self._logger.warning("Could not publish catalog change, other workers catch up on refresh: %s", e)
+
+    def on_commit(self, callback):
+        """
+        Register callback(changes), run in the worker that committed them. Use it
+        for caches shared through Redis: one worker dropping the entry is enough.
+        """
+        self._commit_callbacks.append(callback)
+        return callback
+
+    def committed(self, changes):
+        self._apply(changes)
+        self._publish({"changes": _encode(changes)})
+        for callback in self._commit_callbacks:
+            callback(changes)
+
+    def invalidate(self):
+        """Reload every worker's snapshot, e.g. after bulk writes that bypass the ORM"""
+        self._reload = True
+        self._publish({"reload": True})
+
+    def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                # Changes may have been missed while unsubscribed
+                self._reload = True
+                for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") == self._origin:
+                        continue
+                    if payload.get("reload"):
+                        self._reload = True
+                    else:
+                        self._apply(_decode(payload["changes"]))
+            except redis.RedisError as e:
+                self._logger.warning("Catalog change listener lost Redis, relying on periodic refresh: %s", e)
+            except Exception:
+                self._logger.exception("Catalog change listener error")
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+            time.sleep(self._config["CATALOG_RETRY_SECONDS"])
+
+
+def track_catalog_changes(session_class, catalog):
+    """Collect Subject/Chapter/Quiz writes per session and hand them to the catalog once committed"""
+
+    def after_flush(session, flush_context):
+        pending = session.info.setdefault("catalog_changes", {})
+        for obj in list(session.new) + list(session.dirty):
+            kind = KINDS.get(type(obj))
+            if kind:
+                pending[(kind, obj.id)] = _node(kind, obj)
+        for obj in session.deleted:
+            kind = KINDS.get(type(obj))
+            if kind:
+                pending[(kind, obj.id)] = None
+
+    def after_commit(session):
+        changes = session.info.pop("catalog_changes", None)
+        if changes:
+            catalog.committed(changes)
+
+    def after_rollback(session):
+        session.info.pop("catalog_changes", None)
+
+    event.listen(session_class, "after_flush", after_flush)
+    event.listen(session_class, "after_commit", after_commit)
+    event.listen(session_class, "after_rollback", after_rollback)
+
+
+catalog = Catalog()
+track_catalog_changes(RoutingSession, catalog)
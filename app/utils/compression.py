@@ -0,0 +1,148 @@
+import zlib
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STREAM_CHUNK_SIZE = 64 * 1024
+SKIP_STATUS = (204, 206, 304)
+
+
+class Gzip:
+    def compressor(self, level):
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data, level):
+        compressor = self.compressor(level)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self, chunks, level):
+        compressor = self.compressor(level)
+        for chunk in chunks:
+            # Sync flush so every chunk the handler yields reaches the client straight away
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+class Brotli:
+    def compress(self, data, level):
+        return brotli.compress(data, quality=level)
+
+    def stream(self, chunks, level):
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+
+
+class Zstd:
+    def compress(self, data, level):
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+    def stream(self, chunks, level):
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        yield compressor.flush()
+
+
+# brotli and zstandard are optional; without them only gzip is offered
+ENCODERS = {"gzip": Gzip()}
+if brotli is not None:
+    ENCODERS["br"] = Brotli()
+if zstandard is not None:
+    ENCODERS["zstd"] = Zstd()
+
+
+def negotiate(offered):
+    """Best encoding in `offered` (server preference order) that the client accepts, or None"""
+    accepted = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in offered:
+        quality = accepted.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def precompressed(variants, mimetype="application/json", status=200):
+    """
+    Response for a body the handler already holds in several encodings, e.g.
+    {"identity": raw, "gzip": gz, "br": br}. The compression hook serves the
+    best variant the client accepts without compressing anything.
+    """
+    response = current_app.response_class(variants["identity"], status=status, mimetype=mimetype)
+    response.precompressed = variants
+    return response
+
+
+def _iter_bytes(data):
+    for start in range(0, len(data), STREAM_CHUNK_SIZE):
+        yield data[start:start + STREAM_CHUNK_SIZE]
+
+
+def _encoded(response, encoding):
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response):
+    """after_request hook: compress eligible responses for clients that accept it"""
+    config = current_app.config
+    response.vary.add("Accept-Encoding")
+
+    variants = getattr(response, "precompressed", None)
+    if variants:
+        encoding = negotiate([e for e in config["COMPRESSION_ALGORITHMS"] if e in variants])
+        if encoding:
+            response.set_data(variants[encoding])
+            _encoded(response, encoding)
+        return response
+
+    if (
+        not config["COMPRESSION_ENABLED"]
+        or request.method == "HEAD"
+        or response.status_code < 200
+        or response.status_code in SKIP_STATUS
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in config["COMPRESSION_MIMETYPES"]
+        or "no-transform" in response.headers.get("Cache-Control", "")
+    ):
+        return response
+
+    encoding = negotiate([e for e in config["COMPRESSION_ALGORITHMS"] if e in ENCODERS])
+    if not encoding:
+        return response
+    encoder = ENCODERS[encoding]
+    level = config["COMPRESSION_LEVELS"][encoding]
+
+    if response.is_streamed:
+        # iter_encoded turns the str chunks a generator may yield into bytes
+        response.response = encoder.stream(response.iter_encoded(), level)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config["COMPRESSION_MIN_SIZE"]:
+            return response
+        if len(data) >= config["COMPRESSION_STREAM_THRESHOLD"]:
+            # Compress while sending instead of holding a second full-size buffer
+            response.response = encoder.stream(_iter_bytes(data), level)
+            response.headers.pop("Content-Length", None)
+        else:
+            response.set_data(encoder.compress(data, level))
+    _encoded(response, encoding)
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
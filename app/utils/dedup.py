@@ -0,0 +1,248 @@
+import re
+import struct
+import hashlib
+import random
+from collections import defaultdict
+from flask import current_app
+from app.extensions import db
+from app.models import Question, QuestionSignature, QuestionBucket, Quiz, Chapter
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+_SPACES = re.compile(r"\s+")
+
+_permutations = {}
+
+
+def _get_permutations(num_perm):
+    # Fixed seed so signatures stay comparable across processes and restarts
+    if num_perm not in _permutations:
+        rng = random.Random(1)
+        _permutations[num_perm] = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+    return _permutations[num_perm]
+
+
+def _settings():
+    config = current_app.config
+    return (
+        config.get("DUPLICATE_SHINGLE_SIZE", 5),
+        config.get("DUPLICATE_NUM_PERM", 64),
+        config.get("DUPLICATE_LSH_BANDS", 16),
+        config.get("DUPLICATE_SIMILARITY_THRESHOLD", 0.8),
+    )
+
+
+def shingles(text, size):
+    normalized = _SPACES.sub(" ", _NON_WORD.sub(" ", (text or "").lower())).strip()
+    if len(normalized) <= size:
+        return {normalized}
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def minhash(text, size, num_perm):
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+        for s in shingles(text, size)
+    ]
+    signature = []
+    for a, b in _get_permutations(num_perm):
+        signature.append(min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes))
+    return signature
+
+
+def bucket_keys(signature, bands):
+    rows = len(signature) // bands
+    keys = []
+    for band in range(bands):
+        chunk = struct.pack(f"<I{rows}I", band, *signature[band * rows:(band + 1) * rows])
+        keys.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "little", signed=True))
+    return keys
+
+
+def similarity(sig_a, sig_b):
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def pack_signature(signature):
+    return struct.pack(f"<{len(signature)}I", *signature)
+
+
+def unpack_signature(data):
+    return list(struct.unpack(f"<{len(data) // 4}I", data))
+
+
+def signature_for(text):
+    size, num_perm, bands, _ = _settings()
+    signature = minhash(text, size, num_perm)
+    return signature, bucket_keys(signature, bands)
+
+
+def index_questions(entries, replace=True):
+    """
+    Add or refresh the LSH entries of flushed questions in the current session.
+    entries is a list of (question_id, signature, bucket_keys); each table gets a
+    single executemany insert however many questions there are.
+    """
+    if not entries:
+        return
+    question_ids = [question_id for question_id, _, _ in entries]
+    if replace:
+        QuestionBucket.query.filter(QuestionBucket.question_id.in_(question_ids)).delete()
+        QuestionSignature.query.filter(QuestionSignature.question_id.in_(question_ids)).delete()
+    db.session.execute(db.insert(QuestionSignature), [
+        {"question_id": question_id, "signature": pack_signature(signature)}
+        for question_id, signature, _ in entries
+    ])
+    db.session.execute(db.insert(QuestionBucket), [
+        {"question_id": question_id, "bucket_key": key}
+        for question_id, _, keys in entries for key in keys
+    ])
+
+
+def index_question(question, signature=None, keys=None, replace=True):
+    if signature is None:
+        signature, keys = signature_for(question.question_statement)
+    index_questions([(question.id, signature, keys)], replace=replace)
+
+
+def _lookup(signatures, keys_list):
+    """Match several signatures against the index with one bucket and one signature query"""
+    _, _, _, threshold = _settings()
+    all_keys = {key for keys in keys_list for key in keys}
+    if not all_keys:
+        return [[] for _ in signatures]
+
+    members = defaultdict(set)
+    for key, question_id in db.session.query(QuestionBucket.bucket_key, QuestionBucket.question_id) \
+            .filter(QuestionBucket.bucket_key.in_(all_keys)):
+        members[key].add(question_id)
+
+    candidate_ids = set().union(*members.values()) if members else set()
+    stored = {
+        row.question_id: unpack_signature(row.signature)
+        for row in QuestionSignature.query.filter(QuestionSignature.question_id.in_(candidate_ids))
+    } if candidate_ids else {}
+
+    results = []
+    for signature, keys in zip(signatures, keys_list):
+        matches = []
+        for question_id in set().union(*(members.get(key, set()) for key in keys)):
+            if question_id not in stored:
+                continue
+            score = similarity(signature, stored[question_id])
+            if score >= threshold:
+                matches.append({"question_id": question_id, "similarity": round(score, 3)})
+        matches.sort(key=lambda match: -match["similarity"])
+        results.append(matches)
+    return results
+
+
+def find_similar(signature, keys):
+    """Return [{"question_id", "similarity"}] for indexed questions sharing an LSH bucket"""
+    return _lookup([signature], [keys])[0]
+
+
+def find_batch_duplicates(statements):
+    """
+    Check a list of new question statements against the index and against each other.
+    Returns (signatures, keys, duplicates) where duplicates maps the statement position
+    to a list of {"question_id"} / {"batch_index"} matches.
+    """
+    _, _, _, threshold = _settings()
+    signatures, all_keys = [], []
+    for statement in statements:
+        signature, keys = signature_for(statement)
+        signatures.append(signature)
+        all_keys.append(keys)
+
+    duplicates = {}
+    batch_buckets = defaultdict(list)
+    for idx, matches in enumerate(_lookup(signatures, all_keys)):
+        seen = set()
+        for key in all_keys[idx]:
+            for other in batch_buckets[key]:
+                if other in seen:
+                    continue
+                seen.add(other)
+                score = similarity(signatures[idx], signatures[other])
+                if score >= threshold:
+                    matches.append({"batch_index": other, "similarity": round(score, 3)})
+            batch_buckets[key].append(idx)
+
+        if matches:
+            duplicates[idx] = matches
+
+    return signatures, all_keys, duplicates
+
+
+def index_missing_questions(query):
+    """Index questions from the given query that predate the LSH index"""
+    missing = query.outerjoin(
+        QuestionSignature, QuestionSignature.question_id == Question.id
+    ).filter(QuestionSignature.question_id.is_(None)).all()
+    index_questions([
+        (question.id, *signature_for(question.question_statement)) for question in missing
+    ], replace=False)
+    if missing:
+        db.session.commit()
+    return len(missing)
+
+
+def subject_duplicate_clusters(subject_id):
+    """Group the questions of a subject into clusters of likely duplicates"""
+    _, _, _, threshold = _settings()
+    subject_questions = Question.query.join(Quiz, Question.quiz_id == Quiz.id) \
+        .join(Chapter, Quiz.chapter_id == Chapter.id) \
+        .filter(Chapter.subject_id == subject_id)
+    index_missing_questions(subject_questions)
+
+    question_ids = db.session.query(Question.id).join(Quiz, Question.quiz_id == Quiz.id) \
+        .join(Chapter, Quiz.chapter_id == Chapter.id) \
+        .filter(Chapter.subject_id == subject_id).subquery()
+
+    # Only buckets with more than one member can produce a pair
+    shared = db.session.query(QuestionBucket.bucket_key) \
+        .filter(QuestionBucket.question_id.in_(db.select(question_ids.c.id))) \
+        .group_by(QuestionBucket.bucket_key) \
+        .having(db.func.count(QuestionBucket.question_id) > 1).subquery()
+    rows = db.session.query(QuestionBucket.bucket_key, QuestionBucket.question_id) \
+        .filter(QuestionBucket.bucket_key.in_(db.select(shared.c.bucket_key))) \
+        .filter(QuestionBucket.question_id.in_(db.select(question_ids.c.id))).all()
+
+    buckets = defaultdict(set)
+    for key, question_id in rows:
+        buckets[key].add(question_id)
+
+    member_ids = set().union(*buckets.values()) if buckets else set()
+    signatures = {
+        row.question_id: unpack_signature(row.signature)
+        for row in QuestionSignature.query.filter(QuestionSignature.question_id.in_(member_ids))
+    }
+
+    parent = {question_id: question_id for question_id in member_ids}
+
+    def find(question_id):
+        while parent[question_id] != question_id:
+            parent[question_id] = parent[parent[question_id]]
+            question_id = parent[question_id]
+        return question_id
+
+    checked = set()
+    for members in buckets.values():
+        members = sorted(members)
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                if (first, second) in checked:
+                    continue
+                checked.add((first, second))
+                if similarity(signatures[first], signatures[second]) >= threshold:
+                    parent[find(second)] = find(first)
+
+    clusters = defaultdict(list)
+    for question_id in member_ids:
+        clusters[find(question_id)].append(question_id)
+    return [sorted(ids) for ids in clusters.values() if len(ids) > 1]
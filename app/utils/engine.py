@@ -0,0 +1,62 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def engine_options(config, uri):
+    """SQLAlchemy engine keyword arguments for the configured DB_ENGINE_PROFILE"""
+    if config.get("DB_ENGINE_PROFILE") != "tuned":
+        return {}
+
+    backend = make_url(uri).get_backend_name()
+    if backend == "sqlite":
+        # pysqlite's own lock wait, kept in line with the busy_timeout pragma
+        return {"connect_args": {"timeout": config["SQLITE_BUSY_TIMEOUT_MS"] / 1000}}
+
+    options = {
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+    }
+    if backend == "postgresql":
+        options["pool_size"] = config["DB_POOL_SIZE"]
+        options["max_overflow"] = config["DB_MAX_OVERFLOW"]
+    return options
+
+
+def apply_engine_profile(app):
+    """Merge the profile's engine options into the app config; explicit settings win"""
+    config = app.config
+    configured = config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **engine_options(config, config["SQLALCHEMY_DATABASE_URI"]),
+        **configured
+    }
+
+    binds = {}
+    for key, bind in config.get("SQLALCHEMY_BINDS", {}).items():
+        if isinstance(bind, str):
+            bind = {"url": bind}
+        binds[key] = {**engine_options(config, bind["url"]), **bind}
+    if binds:
+        config["SQLALCHEMY_BINDS"] = binds
+
+
+def register_sqlite_pragmas(engine, config):
+    """Apply the SQLite pragmas of the tuned profile to every new connection"""
+    if config.get("DB_ENGINE_PROFILE") != "tuned" or engine.dialect.name != "sqlite":
+        return
+    if engine.url.database in (None, "", ":memory:"):
+        return
+
+    pragmas = [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+    ]
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
@@ -19,6 +19,10 @@ def admin_required(fn):
             return jsonify({"error": f"Authentication error: {str(e)}"}), 401
     return wrapper
 
+def is_int(value):
+    """True for JSON integers; bool is an int subclass, so true/false are rejected explicitly"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
 def is_user_admin(user_id):
     user = User.query.get(user_id)
     return user.role == "admin"
@@ -0,0 +1,28 @@
+from app.extensions import db, cache
+
+_after_fork_callbacks = []
+
+
+def after_fork(callback):
+    """Register a callback that drops per-process connection state in forked workers"""
+    _after_fork_callbacks.append(callback)
+    return callback
+
+
+def reset_after_fork(app):
+    """
+    Called in each worker right after it is forked from a preloaded parent.
+    Pooled connections opened by the parent must never be shared, so the child
+    forgets them (without closing the parent's sockets) and reconnects lazily.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+        backend = cache.cache
+        for client in {getattr(backend, "_write_client", None), getattr(backend, "_read_client", None)}:
+            if client is not None and hasattr(client, "connection_pool"):
+                client.connection_pool.reset()
+
+    for callback in _after_fork_callbacks:
+        callback()
@@ -0,0 +1,170 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    In-process request metrics. Each worker process keeps its own registry, so a
+    scrape of /admin/metrics reports the worker that served it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)
+            self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+            self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+            self.sql_seconds = defaultdict(float)
+            self.response_bytes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+            self.n_plus_one = defaultdict(int)
+            self.cache = defaultdict(int)
+
+    def record(self, endpoint, method, status, duration, query_count, sql_seconds, size, n_plus_one):
+        with self._lock:
+            self.requests[(endpoint, method, str(status))] += 1
+            self.latency[(endpoint, method)].observe(duration)
+            self.queries[(endpoint,)].observe(query_count)
+            self.sql_seconds[(endpoint,)] += sql_seconds
+            if size is not None:
+                self.response_bytes[(endpoint,)].observe(size)
+            if n_plus_one:
+                self.n_plus_one[(endpoint,)] += 1
+
+    def record_cache(self, name, result):
+        with self._lock:
+            self.cache[(name, result)] += 1
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            lines = []
+            _counter(lines, "quizmaster_requests_total", "Requests by endpoint, method and status",
+                     ("endpoint", "method", "status"), self.requests)
+            _histogram(lines, "quizmaster_request_duration_seconds", "Request latency",
+                       ("endpoint", "method"), self.latency)
+            _histogram(lines, "quizmaster_sql_queries_per_request", "SQL statements executed per request",
+                       ("endpoint",), self.queries)
+            _counter(lines, "quizmaster_sql_seconds_total", "Time spent executing SQL",
+                     ("endpoint",), self.sql_seconds)
+            _histogram(lines, "quizmaster_response_size_bytes", "Response body size",
+                       ("endpoint",), self.response_bytes)
+            _counter(lines, "quizmaster_n_plus_one_suspected_total",
+                     "Requests whose SQL statement count exceeded METRICS_N_PLUS_ONE_THRESHOLD",
+                     ("endpoint",), self.n_plus_one)
+            _counter(lines, "quizmaster_cache_requests_total",
+                     "Tiered cache lookups by cache and result (hit_l1, hit_l2, stale, miss)",
+                     ("cache", "result"), self.cache)
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _counter(lines, name, help_text, label_names, values):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for labels, value in sorted(values.items()):
+        lines.append(f"{name}{_labels(label_names, labels)} {value}")
+
+
+def _histogram(lines, name, help_text, label_names, histograms):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            bucket_labels = _labels(label_names, labels, 'le="%s"' % bound)
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+        bucket_labels = _labels(label_names, labels, 'le="+Inf"')
+        lines.append(f"{name}_bucket{bucket_labels} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(label_names, labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(label_names, labels)} {histogram.count}")
+
+
+registry = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "metrics_started" in g:
+        g.metrics_sql_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "metrics_sql_started" in g:
+        g.metrics_sql_seconds += time.perf_counter() - g.pop("metrics_sql_started")
+        g.metrics_queries += 1
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def start_request_timer():
+    g.metrics_started = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_sql_seconds = 0.0
+
+
+def record_request(response):
+    if "metrics_started" not in g:
+        return response
+    duration = time.perf_counter() - g.metrics_started
+    endpoint = request.endpoint or "unmatched"
+    size = None if response.is_streamed else response.calculate_content_length()
+
+    threshold = current_app.config["METRICS_N_PLUS_ONE_THRESHOLD"]
+    n_plus_one = g.metrics_queries > threshold
+    if n_plus_one:
+        current_app.logger.warning(
+            "Likely N+1 query pattern: %s %s ran %d SQL statements (threshold %d)",
+            request.method, request.path, g.metrics_queries, threshold
+        )
+
+    registry.record(endpoint, request.method, response.status_code, duration,
+                    g.metrics_queries, g.metrics_sql_seconds, size, n_plus_one)
+    return response
+
+
+def init_metrics(app, engines):
+    if not app.config["METRICS_ENABLED"]:
+        return
+    for engine in engines:
+        instrument_engine(engine)
+    app.before_request(start_request_timer)
+    app.after_request(record_request)
@@ -0,0 +1,168 @@
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+from app.extensions import db
+from app.models import User, Quiz, Question, Score, ArchivedScore, Chapter, QuestionSignature, QuestionBucket
+
+# Upgrades run in the order they are registered
+UPGRADES = []
+
+
+def upgrade(fn):
+    UPGRADES.append(fn)
+    return fn
+
+
+def add_columns(connection, model, *names):
+    """ALTER TABLE ... ADD COLUMN for each named model column the table lacks; returns the names added"""
+    table = model.__table__
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    added = []
+    for name in names:
+        if name in existing:
+            continue
+        column_ddl = CreateColumn(table.c[name]).compile(dialect=connection.dialect)
+        connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}")
+        added.append(name)
+    return added
+
+
+def index_names(connection, table):
+    # SQLAlchemy does not reflect expression indexes on SQLite, so ask sqlite_master directly
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table,)
+        )
+        return {name for name, in rows}
+    return {index["name"] for index in inspect(connection).get_indexes(table)}
+
+
+def create_indexes(connection, model, *names):
+    """Create the named indexes declared on the model that the table lacks; returns the names created"""
+    existing = index_names(connection, model.__tablename__)
+    created = []
+    for index in model.__table__.indexes:
+        if index.name in names and index.name not in existing:
+            index.create(connection)
+            created.append(index.name)
+    return created
+
+
+@upgrade
+def quiz_sampling_columns(connection):
+    added = add_columns(connection, Quiz, "sample_size", "shuffle_questions", "shuffle_options", "shuffle_seed")
+    if added:
+        # Existing quizzes keep serving every question in stored order
+        connection.execute(db.update(Quiz.__table__).where(Quiz.shuffle_questions.is_(None))
+                           .values(shuffle_questions=False, shuffle_options=False, shuffle_seed=0))
+    return added
+
+
+@upgrade
+def user_directory_indexes(connection):
+    existing = index_names(connection, "user")
+    # Replaced by the prefix indexes, which on PostgreSQL also carry text_pattern_ops
+    dropped = [name for name in ("ix_user_email_lower", "ix_user_full_name_lower") if name in existing]
+    for name in dropped:
+        connection.exec_driver_sql(f"DROP INDEX {name}")
+    return dropped + create_indexes(connection, User, "ix_user_email_prefix", "ix_user_full_name_prefix",
+                                    "ix_user_qualification", "ix_user_role")
+
+
+@upgrade
+def score_autoincrement(connection):
+    """
+    Archived scores keep their id, and without AUTOINCREMENT SQLite reuses the
+    largest id once it is deleted from the table. SQLite cannot add it to an
+    existing table, so the table is rebuilt (one full copy, run it off-peak) and
+    the id sequence starts above every archived id. Other databases never
+    reuse sequence values.
+    """
+    if connection.dialect.name != "sqlite":
+        return []
+    sql = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'score'"
+    ).scalar()
+    if "AUTOINCREMENT" in sql.upper():
+        return []
+    columns = ", ".join(column.name for column in Score.__table__.columns)
+    for name in index_names(connection, "score"):
+        if not name.startswith("sqlite_autoindex"):
+            connection.exec_driver_sql(f"DROP INDEX {name}")
+    connection.exec_driver_sql("ALTER TABLE score RENAME TO score_old")
+    Score.__table__.create(connection)
+    connection.exec_driver_sql(f"INSERT INTO score ({columns}) SELECT {columns} FROM score_old")
+    connection.exec_driver_sql("DROP TABLE score_old")
+
+    highest = connection.execute(db.select(db.func.max(ArchivedScore.id))).scalar() or 0
+    if not connection.exec_driver_sql("SELECT 1 FROM sqlite_sequence WHERE name = 'score'").first():
+        connection.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES ('score', 0)")
+    connection.exec_driver_sql("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'score'", (highest,))
+    return ["score"]
+
+
+@upgrade
+def score_archive_indexes(connection):
+    return create_indexes(connection, Score, "ix_score_time_stamp_of_attempt")
+
+
+@upgrade
+def purge_indexes(connection):
+    # The chunked deletes select children by quiz_id
+    return (create_indexes(connection, Question, "ix_question_quiz_id")
+            + create_indexes(connection, Score, "ix_score_quiz_id"))
+
+
+@upgrade
+def cascade_foreign_keys(connection):
+    """
+    Recreate the foreign keys that gained ON DELETE CASCADE. SQLite cannot alter
+    a constraint without rebuilding the table and only enforces foreign keys
+    under PRAGMA foreign_keys=ON, which the app does not set; the purge jobs
+    delete children explicitly, so SQLite databases are left alone.
+    """
+    if connection.dialect.name == "sqlite":
+        return []
+    changed = []
+    for model in (Chapter, Quiz, Question, Score, ArchivedScore, QuestionSignature, QuestionBucket):
+        table = model.__table__
+        reflected = inspect(connection).get_foreign_keys(table.name)
+        for fk in table.foreign_keys:
+            if fk.ondelete != "CASCADE":
+                continue
+            current = next(
+                (key for key in reflected
+                 if key["constrained_columns"] == [fk.parent.name] and key["referred_table"] == fk.column.table.name),
+                None
+            )
+            if current is None or (current["options"].get("ondelete") or "").upper() == "CASCADE":
+                continue
+            name = current["name"]
+            connection.exec_driver_sql(f'ALTER TABLE "{table.name}" DROP CONSTRAINT "{name}"')
+            connection.exec_driver_sql(
+                f'ALTER TABLE "{table.name}" ADD CONSTRAINT "{name}" FOREIGN KEY ("{fk.parent.name}") '
+                f'REFERENCES "{fk.column.table.name}" ("{fk.column.name}") ON DELETE CASCADE'
+            )
+            changed.append(name)
+    return changed
+
+
+@upgrade
+def calendar_indexes(connection):
+    return create_indexes(connection, Quiz, "ix_quiz_date_of_quiz")
+
+
+def run_upgrades():
+    """
+    Bring tables created by an older release up to the current models.
+    db.create_all() only creates missing tables, so every change to a table
+    that already shipped registers an upgrade above. Each one checks the live
+    schema first and returns what it changed, so running them again, or on a
+    database created from the current models, is a no-op.
+    """
+    applied = {}
+    with db.engine.begin() as connection:
+        for fn in UPGRADES:
+            changed = fn(connection)
+            if changed:
+                applied[fn.__name__] = changed
+    return applied
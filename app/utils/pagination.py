@@ -0,0 +1,77 @@
+from app.extensions import db
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+COUNT_CAP = 10000
+
+
+def page_args(args):
+    """Read after_id / limit query arguments, raising ValueError on bad input"""
+    after_id = args.get("after_id", type=int)
+    limit = args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return after_id, min(limit, MAX_PAGE_SIZE)
+
+
+def keyset_page(query, id_column, after_id, limit):
+    """
+    Fetch one page ordered by id_column starting after the given id.
+    Unfiltered, and with equality filters on indexed columns, this seeks
+    straight to the cursor, so a page costs the same at any depth. A prefix
+    search cannot share one index between its filter and the id order: the
+    database collects every row matching the prefix through the prefix
+    indexes and sorts them, so those pages cost O(matches) and get cheaper
+    as the prefix gets longer.
+    """
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    rows = query.order_by(id_column).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_after_id = getattr(rows[-1], id_column.key) if has_more else None
+    return rows, next_after_id
+
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def prefix_match(column, prefix):
+    """
+    Case-insensitive prefix match on lower(column) that the expression indexes
+    on the User model can serve. PostgreSQL gets LIKE 'prefix%', which the
+    text_pattern_ops index answers whatever the database collation. SQLite only
+    turns LIKE into an index range on plain columns, so it gets the equivalent
+    range on lower(column), bounded by the prefix with its last character
+    incremented (exact under SQLite's binary collation).
+    """
+    prefix = prefix.lower()
+    lowered = db.func.lower(column)
+    if db.engine.dialect.name == "postgresql":
+        return lowered.like(_escape_like(prefix) + "%", escape="\\")
+    return db.and_(lowered >= prefix, lowered < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+
+def approximate_count(query, model, filtered):
+    """
+    Cheap row count for directory headers. Unfiltered listings use the planner
+    statistics on PostgreSQL and the largest primary key elsewhere; filtered
+    listings are counted exactly up to COUNT_CAP rows.
+    """
+    if not filtered:
+        if db.engine.dialect.name == "postgresql":
+            estimate = db.session.execute(
+                db.text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+                {"table": model.__tablename__}
+            ).scalar()
+            if estimate is not None and estimate >= 0:
+                return {"value": int(estimate), "approximate": True}
+        max_id = db.session.query(db.func.max(model.id)).scalar() or 0
+        return {"value": max_id, "approximate": True}
+
+    capped = query.with_entities(model.id).limit(COUNT_CAP + 1).subquery()
+    count = db.session.query(db.func.count()).select_from(capped).scalar()
+    if count > COUNT_CAP:
+        return {"value": COUNT_CAP, "approximate": True}
+    return {"value": count, "approximate": False}
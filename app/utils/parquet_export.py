@@ -0,0 +1,165 @@
+import os
+from datetime import datetime
+from app.extensions import db
+from app.models import User, Quiz, Chapter, Subject
+from app.utils.archive import all_scores
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+PARTITION_KEYS = ("subject", "month")
+
+
+def parquet_available():
+    return pa is not None
+
+
+def score_schema():
+    return pa.schema([
+        ("score_id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("email", pa.string()),
+        ("full_name", pa.string()),
+        ("qualification", pa.string()),
+        ("quiz_id", pa.int64()),
+        ("date_of_quiz", pa.timestamp("us")),
+        ("time_duration", pa.int32()),
+        ("chapter_id", pa.int64()),
+        ("chapter", pa.string()),
+        ("subject_id", pa.int64()),
+        ("subject", pa.string()),
+        ("time_stamp_of_attempt", pa.timestamp("us")),
+        ("total_scored", pa.int32()),
+        ("total_possible", pa.int32()),
+        ("completed", pa.bool_()),
+    ])
+
+
+def score_rows(partition_by=()):
+    """
+    Scores, archived ones included, joined with their user, quiz, chapter and
+    subject, ordered so each partition is contiguous
+    """
+    scores = all_scores()
+    order = [scores.c.time_stamp_of_attempt, scores.c.id]
+    if "subject" in partition_by:
+        order.insert(0, Subject.id)
+    return db.select(
+        scores.c.id.label("score_id"), scores.c.user_id, User.email, User.full_name, User.qualification,
+        scores.c.quiz_id, Quiz.date_of_quiz, Quiz.time_duration, Chapter.id.label("chapter_id"),
+        Chapter.name.label("chapter"), Subject.id.label("subject_id"), Subject.name.label("subject"),
+        scores.c.time_stamp_of_attempt, scores.c.total_scored, scores.c.total_possible, scores.c.completed
+    ).join(User, scores.c.user_id == User.id) \
+        .join(Quiz, scores.c.quiz_id == Quiz.id) \
+        .join(Chapter, Quiz.chapter_id == Chapter.id) \
+        .join(Subject, Chapter.subject_id == Subject.id) \
+        .order_by(*order)
+
+
+def _partition_dir(row, partition_by):
+    parts = []
+    if "subject" in partition_by:
+        parts.append(f"subject_id={row.subject_id}")
+    if "month" in partition_by:
+        attempted = row.time_stamp_of_attempt
+        parts.append(f"month={attempted:%Y-%m}" if attempted else "month=__HIVE_DEFAULT_PARTITION__")
+    return os.path.join(*parts) if parts else ""
+
+
+class _PartitionWriter:
+    """Writes one partition at a time; rows arrive grouped by partition, so only one file is ever open"""
+
+    def __init__(self, root, schema, partition_by, compression):
+        self.root = root
+        self.partition_by = partition_by
+        self.compression = compression
+        # Hive partition columns live in the directory names, not in the files
+        dropped = {"subject_id"} if "subject" in partition_by else set()
+        self.schema = pa.schema([field for field in schema if field.name not in dropped])
+        self.current = None
+        self.writer = None
+        self.files = []
+        self.columns = {name: [] for name in self.schema.names}
+
+    def _switch(self, partition):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+        directory = os.path.join(self.root, partition)
+        os.makedirs(directory, exist_ok=True)
+        # Partitions are contiguous by construction; the counter only guards against a repeat
+        part = sum(1 for f in self.files if os.path.dirname(f) == directory)
+        path = os.path.join(directory, f"part-{part}.parquet")
+        self.writer = pq.ParquetWriter(path, self.schema, compression=self.compression)
+        self.files.append(path)
+        self.current = partition
+
+    def _flush(self):
+        if self.writer is not None and self.columns[self.schema.names[0]]:
+            self.writer.write_batch(pa.record_batch(self.columns, schema=self.schema))
+        self.columns = {name: [] for name in self.schema.names}
+
+    def write(self, rows):
+        for row in rows:
+            partition = _partition_dir(row, self.partition_by)
+            if partition != self.current or self.writer is None:
+                self._switch(partition)
+            mapping = row._mapping
+            for name in self.schema.names:
+                self.columns[name].append(mapping[name])
+        self._flush()
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def export_scores_parquet(path, partition_by=(), batch_size=50000, compression="zstd"):
+    """
+    Write every score with its user/quiz/chapter/subject metadata as Parquet.
+    Rows are streamed from a server-side cursor in batches of batch_size, so
+    memory stays bounded by one batch. Without partitioning `path` is a single
+    file; with partition_by ("subject", "month") it is a hive-style directory
+    (subject_id=3/month=2024-05/part-0.parquet) readable by pandas, pyarrow and
+    DuckDB (read_parquet('path/**/*.parquet', hive_partitioning=true)).
+    """
+    if pa is None:
+        raise RuntimeError("Parquet export needs the optional pyarrow package")
+    unknown = set(partition_by) - set(PARTITION_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown partition keys: {sorted(unknown)}")
+
+    started = datetime.now()
+    schema = score_schema()
+    statement = score_rows(partition_by).execution_options(stream_results=True, yield_per=batch_size)
+    result = db.session.execute(statement)
+
+    rows = 0
+    if partition_by:
+        writer = _PartitionWriter(path, schema, partition_by, compression)
+        try:
+            for batch in result.partitions():
+                writer.write(batch)
+                rows += len(batch)
+        finally:
+            writer.close()
+        files = writer.files
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with pq.ParquetWriter(path, schema, compression=compression) as writer:
+            for batch in result.partitions():
+                columns = {name: [row._mapping[name] for row in batch] for name in schema.names}
+                writer.write_batch(pa.record_batch(columns, schema=schema))
+                rows += len(batch)
+        files = [path]
+
+    return {
+        "path": path,
+        "files": len(files),
+        "rows": rows,
+        "seconds": round((datetime.now() - started).total_seconds(), 3),
+    }
@@ -0,0 +1,107 @@
+import time
+from flask import current_app
+from app.extensions import db
+from app.models import Subject, Chapter, Quiz, Question, Score, ArchivedScore, QuestionSignature, QuestionBucket
+from app.utils.catalog import catalog
+from app.utils.sampling import invalidate_questions
+
+
+class ChunkedDelete:
+    """
+    Deletes children before parents in chunks of PURGE_CHUNK_SIZE rows, one
+    short transaction per chunk with PURGE_CHUNK_PAUSE_SECONDS between them, so
+    a large purge never holds its locks long enough to stall quiz traffic.
+    Nothing is loaded through the ORM. ON DELETE CASCADE on the foreign keys
+    catches rows added while a purge runs, where the database enforces it.
+    `progress` is called with the running per-table counts after each chunk.
+    """
+
+    def __init__(self, progress=None, chunk_size=None, pause=None):
+        config = current_app.config
+        self.chunk_size = chunk_size or config["PURGE_CHUNK_SIZE"]
+        self.pause = config["PURGE_CHUNK_PAUSE_SECONDS"] if pause is None else pause
+        self.progress = progress
+        self.counts = {}
+
+    def rows(self, model, condition):
+        primary_key = model.__mapper__.primary_key[0]
+        table = model.__tablename__
+        self.counts.setdefault(table, 0)
+        while True:
+            ids = db.session.execute(
+                db.select(primary_key).where(condition).limit(self.chunk_size)
+            ).scalars().all()
+            if not ids:
+                return
+            db.session.execute(model.__table__.delete().where(primary_key.in_(ids)))
+            db.session.commit()
+            self.counts[table] += len(ids)
+            if self.progress:
+                self.progress(dict(self.counts))
+            if self.pause:
+                time.sleep(self.pause)
+
+    def quizzes(self, quiz_ids):
+        # A few quizzes at a time keeps the IN lists and the question subqueries small
+        for start in range(0, len(quiz_ids), 50):
+            chunk = quiz_ids[start:start + 50]
+            questions = db.select(Question.id).where(Question.quiz_id.in_(chunk))
+            self.rows(QuestionBucket, QuestionBucket.question_id.in_(questions))
+            self.rows(QuestionSignature, QuestionSignature.question_id.in_(questions))
+            self.rows(Question, Question.quiz_id.in_(chunk))
+            self.rows(Score, Score.quiz_id.in_(chunk))
+            self.rows(ArchivedScore, ArchivedScore.quiz_id.in_(chunk))
+            self.rows(Quiz, Quiz.id.in_(chunk))
+            invalidate_questions(chunk)
+            catalog.committed({("quiz", quiz_id): None for quiz_id in chunk})
+
+    def chapters(self, chapter_ids):
+        self.quizzes(db.session.execute(
+            db.select(Quiz.id).where(Quiz.chapter_id.in_(chapter_ids)).order_by(Quiz.id)
+        ).scalars().all())
+        self.rows(Chapter, Chapter.id.in_(chapter_ids))
+        catalog.committed({("chapter", chapter_id): None for chapter_id in chapter_ids})
+
+
+def hide_from_catalog(subject_id=None, chapter_id=None):
+    """Drop a subject or chapter and everything under it from every worker's catalog ahead of its purge"""
+    snapshot = catalog.snapshot()
+    chapters = list(snapshot.chapters_by_subject.get(subject_id, ())) if subject_id is not None \
+        else [snapshot.chapters[chapter_id]] if chapter_id in snapshot.chapters else []
+    changes = {("chapter", chapter.id): None for chapter in chapters}
+    changes.update({
+        ("quiz", snapshot.quiz_by_chapter[chapter.id].id): None
+        for chapter in chapters if chapter.id in snapshot.quiz_by_chapter
+    })
+    if subject_id is not None:
+        changes[("subject", subject_id)] = None
+    catalog.committed(changes)
+
+
+def delete_subject(subject_id, progress=None):
+    deleter = ChunkedDelete(progress)
+    deleter.chapters(db.session.execute(
+        db.select(Chapter.id).where(Chapter.subject_id == subject_id).order_by(Chapter.id)
+    ).scalars().all())
+    deleter.rows(Subject, Subject.id == subject_id)
+    catalog.committed({("subject", subject_id): None})
+    return deleter.counts
+
+
+def delete_chapter(chapter_id, progress=None):
+    deleter = ChunkedDelete(progress)
+    deleter.chapters([chapter_id])
+    return deleter.counts
+
+
+def purge_scores(before=None, quiz_id=None, progress=None):
+    """Delete attempts, archived ones included, older than `before` and/or of one quiz; all of them if neither is given"""
+    deleter = ChunkedDelete(progress)
+    for model in (Score, ArchivedScore):
+        condition = db.true()
+        if before is not None:
+            condition = db.and_(condition, model.time_stamp_of_attempt < before)
+        if quiz_id is not None:
+            condition = db.and_(condition, model.quiz_id == quiz_id)
+        deleter.rows(model, condition)
+    return deleter.counts
@@ -0,0 +1,181 @@
+import threading
+import time
+import uuid
+import redis
+
+# Creates the session on first call only, so fetching the questions again never moves the deadline
+START_SESSION = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[1], 'started_at', ARGV[1], 'deadline', ARGV[2], 'id', ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return redis.call('HMGET', KEYS[1], 'started_at', 'deadline', 'id')
+"""
+
+# Answers are stored as "<option>:<stamp>"; an autosave flushed late by another
+# worker never overwrites a newer answer to the same question. They are only
+# written while the session they were given in (KEYS[2], ARGV[2]) is still the
+# live one, so a flush arriving after finish() or after the next attempt started
+# neither recreates the hash nor pre-fills that attempt.
+MERGE_ANSWERS = """
+if (redis.call('HGET', KEYS[2], 'id') or '') ~= ARGV[2] then
+    return 0
+end
+for i = 3, #ARGV, 3 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    local stamp = current and tonumber(string.match(current, ':(.+)$')) or -1
+    if tonumber(ARGV[i + 2]) >= stamp then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1] .. ':' .. ARGV[i + 2])
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+class QuizSession:
+    def __init__(self, quiz_id, user_id, started_at, deadline, session_id=""):
+        self.quiz_id = quiz_id
+        self.user_id = user_id
+        self.started_at = started_at
+        self.deadline = deadline
+        # Tells this attempt apart from a later one of the same quiz
+        self.session_id = session_id
+
+    def ttl(self, config):
+        return int(self.deadline - time.time()) + config["QUIZ_SUBMIT_GRACE_SECONDS"] + config["QUIZ_SESSION_RETENTION"]
+
+
+class QuizSessions:
+    """
+    Timed quiz sessions kept in Redis. A session starts when the candidate first
+    fetches the questions and fixes the deadline from Quiz.time_duration. Autosaved
+    answers are buffered per session in this process and written by a background
+    thread every QUIZ_AUTOSAVE_FLUSH_SECONDS, one write per session, so a burst of
+    autosave calls costs one session read each, one write in total and no SQL.
+    Sessions are always read from Redis, never cached here: another worker may
+    have finished or restarted the attempt since.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._config = None
+        self._logger = None
+        self.reset()
+
+    def init_app(self, app):
+        from app.utils.lifecycle import after_fork
+        app.extensions["quiz_sessions"] = self
+        self._config = app.config
+        self._logger = app.logger
+        self.reset()
+        after_fork(self.reset)
+
+    def reset(self):
+        self._client = None
+        self._start = None
+        self._merge = None
+        self._flusher = None
+        self._pending = {}
+
+    def _redis(self):
+        if self._client is None:
+            timeout = self._config["QUIZ_SESSION_REDIS_TIMEOUT"]
+            self._client = redis.Redis.from_url(
+                self._config["QUIZ_SESSION_REDIS_URL"], socket_timeout=timeout, socket_connect_timeout=timeout
+            )
+            self._start = self._client.register_script(START_SESSION)
+            self._merge = self._client.register_script(MERGE_ANSWERS)
+        return self._client
+
+    @staticmethod
+    def _key(quiz_id, user_id):
+        return f"quizsession:{quiz_id}:{user_id}"
+
+    def start(self, quiz, user_id):
+        """Start the candidate's session, or return the running one"""
+        now = time.time()
+        deadline = now + quiz.time_duration * 60
+        ttl = int(deadline - now) + self._config["QUIZ_SUBMIT_GRACE_SECONDS"] + self._config["QUIZ_SESSION_RETENTION"]
+        self._redis()
+        started_at, deadline, session_id = self._start(keys=[self._key(quiz.id, user_id)],
+                                                       args=[now, deadline, ttl, uuid.uuid4().hex])
+        return QuizSession(quiz.id, user_id, float(started_at), float(deadline), (session_id or b"").decode())
+
+    def get(self, quiz_id, user_id):
+        """Running session or None"""
+        started_at, deadline, session_id = self._redis().hmget(
+            self._key(quiz_id, user_id), "started_at", "deadline", "id"
+        )
+        if started_at is None:
+            return None
+        return QuizSession(quiz_id, user_id, float(started_at), float(deadline), (session_id or b"").decode())
+
+    def is_late(self, session):
+        return time.time() > session.deadline + self._config["QUIZ_SUBMIT_GRACE_SECONDS"]
+
+    def autosave(self, session, answers):
+        """Buffer {question_id: option}; the newest value per question wins"""
+        stamp = time.time()
+        key = (session.quiz_id, session.user_id)
+        with self._lock:
+            # Anything still buffered from an earlier attempt would be refused by Redis anyway
+            if key not in self._pending or self._pending[key][0].session_id != session.session_id:
+                self._pending[key] = (session, {})
+            pending = self._pending[key][1]
+            for question_id, option in answers.items():
+                pending[question_id] = (option, stamp)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="quiz-autosave", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self._config["QUIZ_AUTOSAVE_FLUSH_SECONDS"])
+            try:
+                self.flush()
+            except Exception:
+                self._logger.exception("Quiz autosave flush failed")
+
+    def flush(self, only=None):
+        """Write buffered answers, one script call per session, in a single pipeline"""
+        with self._lock:
+            if only is None:
+                batch, self._pending = self._pending, {}
+            else:
+                batch = {only: self._pending.pop(only)} if only in self._pending else {}
+        if not batch:
+            return
+
+        self._redis()
+        pipe = self._client.pipeline(transaction=False)
+        for session, answers in batch.values():
+            args = [session.ttl(self._config), session.session_id]
+            for question_id, (option, stamp) in answers.items():
+                args.extend((question_id, option, repr(stamp)))
+            key = self._key(session.quiz_id, session.user_id)
+            self._merge(keys=[key + ":answers", key], args=args, client=pipe)
+        try:
+            pipe.execute()
+        except redis.RedisError:
+            # Put the batch back without overwriting anything newer that arrived meanwhile
+            with self._lock:
+                for key, (session, answers) in batch.items():
+                    pending = self._pending.setdefault(key, (session, {}))[1]
+                    for question_id, value in answers.items():
+                        pending.setdefault(question_id, value)
+            raise
+
+    def answers(self, session):
+        """Saved answers as {question_id: option}, including ones still buffered here"""
+        key = (session.quiz_id, session.user_id)
+        self.flush(only=key)
+        saved = self._redis().hgetall(self._key(*key) + ":answers")
+        return {int(question_id): int(value.split(b":", 1)[0]) for question_id, value in saved.items()}
+
+    def finish(self, session):
+        """Drop a submitted session so the next attempt starts a fresh one"""
+        key = (session.quiz_id, session.user_id)
+        with self._lock:
+            self._pending.pop(key, None)
+        self._redis().delete(self._key(*key), self._key(*key) + ":answers")
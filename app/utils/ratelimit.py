@@ -0,0 +1,149 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+import redis
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Token bucket, refilled continuously at `rate` tokens/second up to `capacity`.
+# Uses the Redis server clock so every worker agrees on elapsed time.
+TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(retry_after)}
+"""
+
+
+def parse_limit(limit):
+    """"10/minute" -> (10, 60)"""
+    count, _, period = limit.partition("/")
+    if period not in PERIODS or not count.isdigit() or int(count) <= 0:
+        raise ValueError(f"Invalid rate limit {limit!r}, expected e.g. '10/minute'")
+    return int(count), PERIODS[period]
+
+
+class LocalBuckets:
+    """In-process token buckets, used while Redis is unreachable. Limits are per worker."""
+
+    def __init__(self, max_keys=10000):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self.max_keys = max_keys
+
+    def take(self, key, rate, capacity, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / rate
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+class RateLimiter:
+    def __init__(self):
+        self.local = LocalBuckets()
+        self._client = None
+        self._script = None
+        self._redis_down_until = 0.0
+
+    def init_app(self, app):
+        from app.utils.lifecycle import after_fork
+        app.extensions["ratelimit"] = self
+        self.reset()
+        after_fork(self.reset)
+
+    def reset(self):
+        """Forget the Redis connection, e.g. in a freshly forked worker"""
+        self._client = None
+        self._script = None
+        self._redis_down_until = 0.0
+
+    def _redis_script(self, config):
+        if self._script is None:
+            timeout = config["RATELIMIT_REDIS_TIMEOUT"]
+            self._client = redis.Redis.from_url(
+                config["RATELIMIT_REDIS_URL"], socket_timeout=timeout, socket_connect_timeout=timeout
+            )
+            self._script = self._client.register_script(TOKEN_BUCKET)
+        return self._script
+
+    def take(self, key, rate, capacity, cost=1):
+        """Returns (allowed, retry_after_seconds)"""
+        config = current_app.config
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                allowed, retry_after = self._redis_script(config)(keys=[key], args=[rate, capacity, cost])
+                return bool(allowed), float(retry_after)
+            except redis.RedisError as e:
+                # Don't pay a connection timeout on every request while Redis is away
+                self._redis_down_until = time.monotonic() + config["RATELIMIT_REDIS_RETRY_SECONDS"]
+                current_app.logger.warning("Rate limiter falling back to in-process buckets: %s", e)
+        return self.local.take(key, rate, capacity, cost)
+
+
+def _client_key(by):
+    if by == "identity":
+        try:
+            identity = get_jwt_identity()
+        except RuntimeError:
+            # Route is not behind jwt_required
+            identity = None
+        if identity is not None:
+            return f"user:{identity}"
+    return f"ip:{request.remote_addr}"
+
+
+def rate_limit(limit, by="ip", burst=None):
+    """
+    Limit a route to `limit` requests ("5/minute") per client IP or, with
+    by="identity", per JWT identity. `burst` is the bucket size, i.e. how many
+    requests may arrive back to back (defaults to the count). Stack the
+    decorator to combine limits; put it below @jwt_required() when limiting
+    by identity.
+    """
+    count, period = parse_limit(limit)
+    rate = count / period
+    capacity = burst or count
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_app.config["RATELIMIT_ENABLED"]:
+                key = f"ratelimit:{request.endpoint}:{limit}:{_client_key(by)}"
+                allowed, retry_after = current_app.extensions["ratelimit"].take(key, rate, capacity)
+                if not allowed:
+                    response = jsonify({"error": "Too many requests, please retry later"})
+                    response.status_code = 429
+                    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+                    return response
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,112 @@
+import random
+import threading
+import time
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+PIN_COOKIE = "db_primary_until"
+
+# Dialects without a lag query (e.g. the local SQLite stand-in) only get a liveness check
+_LAG_QUERIES = {
+    "postgresql": "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)",
+}
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the replica chosen for the current request and
+    everything else to the primary. Once the request writes, it stays on the
+    primary so it reads its own changes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or isinstance(clause, sa.UpdateBase):
+                g.db_replica = None
+                g.db_wrote = True
+            elif g.get("db_replica"):
+                return self._db.engines[g.db_replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaMonitor:
+    """Caches per-replica health so lag is checked at most once per interval per process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._status = {}
+
+    def is_healthy(self, key):
+        config = current_app.config
+        now = time.monotonic()
+        checked_at, healthy = self._status.get(key, (None, False))
+        if checked_at is not None and now - checked_at < config["REPLICA_LAG_CHECK_INTERVAL"]:
+            return healthy
+
+        with self._lock:
+            checked_at, healthy = self._status.get(key, (None, False))
+            if checked_at is None or now - checked_at >= config["REPLICA_LAG_CHECK_INTERVAL"]:
+                healthy = self._check(key, config)
+                self._status[key] = (now, healthy)
+        return healthy
+
+    def _check(self, key, config):
+        from app.extensions import db
+
+        engine = db.engines[key]
+        query = config.get("REPLICA_LAG_QUERY") or _LAG_QUERIES.get(engine.dialect.name)
+        try:
+            with engine.connect() as connection:
+                if query is None:
+                    connection.execute(sa.text("SELECT 1"))
+                    return True
+                lag = connection.execute(sa.text(query)).scalar() or 0
+        except Exception as e:
+            current_app.logger.warning("Replica %s unavailable: %s", key, e)
+            return False
+        return float(lag) <= config["REPLICA_MAX_LAG_SECONDS"]
+
+    def reset(self):
+        with self._lock:
+            self._status.clear()
+
+
+monitor = ReplicaMonitor()
+
+
+def select_replica():
+    """before_request hook: route read-only requests of the configured blueprints to a replica"""
+    g.db_replica = None
+    g.db_wrote = False
+    config = current_app.config
+    replicas = config.get("SQLALCHEMY_REPLICA_BINDS")
+    if not replicas or request.method not in SAFE_METHODS:
+        return
+    if request.blueprint not in config["REPLICA_ROUTED_BLUEPRINTS"]:
+        return
+
+    # Read-after-write: the client wrote recently, so the replica may not have it yet
+    pinned_until = request.cookies.get(PIN_COOKIE, type=float)
+    if pinned_until and pinned_until > time.time():
+        return
+
+    healthy = [key for key in replicas if monitor.is_healthy(key)]
+    if healthy:
+        g.db_replica = random.choice(healthy)
+
+
+def pin_after_write(response):
+    """after_request hook: keep the client on the primary for a while after it writes"""
+    config = current_app.config
+    if not config.get("SQLALCHEMY_REPLICA_BINDS") or response.status_code >= 400:
+        return response
+    if g.get("db_wrote"):
+        window = config["REPLICA_READ_AFTER_WRITE_SECONDS"]
+        response.set_cookie(
+            PIN_COOKIE, str(time.time() + window), max_age=int(window) + 1,
+            httponly=True, samesite=config.get("JWT_COOKIE_SAMESITE"),
+            secure=config.get("JWT_COOKIE_SECURE", False)
+        )
+    return response
@@ -0,0 +1,126 @@
+import hashlib
+import math
+import threading
+import time
+import redis
+from flask import current_app
+
+KEY_PREFIX = "revoked:"
+INDEX_KEY = "revoked:index"
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "little")
+        b = int.from_bytes(digest[8:], "little") | 1
+        return ((a + i * b) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenRevocation:
+    """
+    jti denylist. Revoked ids live in Redis with a TTL equal to the token's
+    remaining lifetime; each worker keeps a Bloom filter of them, rebuilt every
+    REVOCATION_REFRESH_SECONDS, so a token that was never revoked is accepted
+    without touching Redis. A revocation made in another worker takes effect
+    here at the next rebuild.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def init_app(self, app):
+        from app.utils.lifecycle import after_fork
+        app.extensions["revocation"] = self
+        self.reset()
+        after_fork(self.reset)
+
+    def reset(self):
+        self._client = None
+        self._bloom = None
+        self._refreshed_at = 0.0
+        # Revocations that could not be written to Redis; enforced by this process only
+        self._local = {}
+
+    def _redis(self, config):
+        if self._client is None:
+            timeout = config["REVOCATION_REDIS_TIMEOUT"]
+            self._client = redis.Redis.from_url(
+                config["REVOCATION_REDIS_URL"], socket_timeout=timeout, socket_connect_timeout=timeout
+            )
+        return self._client
+
+    def revoke(self, jti, expires_at):
+        config = current_app.config
+        ttl = int(expires_at - time.time()) + 1
+        if ttl <= 0:
+            return
+        try:
+            pipe = self._redis(config).pipeline()
+            pipe.set(KEY_PREFIX + jti, 1, ex=ttl)
+            pipe.zadd(INDEX_KEY, {jti: expires_at})
+            pipe.execute()
+        except redis.RedisError as e:
+            current_app.logger.error("Could not store token revocation in Redis: %s", e)
+            self._local[jti] = expires_at
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def _build(self, config, revoked):
+        self._local = {jti: exp for jti, exp in self._local.items() if exp > time.time()}
+        bloom = BloomFilter(max(config["REVOCATION_BLOOM_CAPACITY"], 2 * (len(revoked) + len(self._local))),
+                            config["REVOCATION_BLOOM_ERROR_RATE"])
+        for jti in revoked:
+            bloom.add(jti.decode())
+        for jti in self._local:
+            bloom.add(jti)
+        return bloom
+
+    def _current_bloom(self, config):
+        now = time.monotonic()
+        if self._bloom is not None and now - self._refreshed_at < config["REVOCATION_REFRESH_SECONDS"]:
+            return self._bloom
+        # Only one thread rebuilds; the others keep using the previous filter
+        if self._lock.acquire(blocking=self._bloom is None):
+            try:
+                self._refreshed_at = now
+                pipe = self._redis(config).pipeline()
+                pipe.zremrangebyscore(INDEX_KEY, "-inf", time.time())
+                pipe.zrange(INDEX_KEY, 0, -1)
+                _, revoked = pipe.execute()
+                self._bloom = self._build(config, revoked)
+            except redis.RedisError as e:
+                current_app.logger.warning("Could not refresh token revocation filter: %s", e)
+                if self._bloom is None:
+                    self._bloom = self._build(config, [])
+            finally:
+                self._lock.release()
+        return self._bloom
+
+    def is_revoked(self, jti):
+        config = current_app.config
+        if jti in self._local:
+            return True
+        if jti not in self._current_bloom(config):
+            return False
+        try:
+            return bool(self._redis(config).exists(KEY_PREFIX + jti))
+        except redis.RedisError as e:
+            # The filter has no false negatives, so a hit is almost always a real revocation
+            current_app.logger.warning("Could not confirm token revocation: %s", e)
+            return True
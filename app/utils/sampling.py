@@ -0,0 +1,126 @@
+import hashlib
+import random
+from app.extensions import db, tiered_cache
+from app.models import Question
+from app.utils.helpers import is_int
+
+
+@tiered_cache.cached(ttl=600, stale_ttl=60)
+def question_pool(quiz_id):
+    """
+    Shared, user-independent payload of a quiz's question pool ordered by id.
+    Contains no answers, so it is cached and served to every candidate.
+    """
+    questions = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.id).all()
+    return [
+        {
+            "id": q.id,
+            "question_statement": q.question_statement,
+            "options": [q.option1, q.option2, q.option3, q.option4]
+        }
+        for q in questions
+    ]
+
+
+def answer_key(quiz_id):
+    """
+    Correct option per question, read from the database on every call. It is
+    deliberately not cached: grading must see an edit the moment it commits.
+    """
+    rows = db.session.query(Question.id, Question.correct_option) \
+        .filter(Question.quiz_id == quiz_id).order_by(Question.id).all()
+    return {question_id: correct_option for question_id, correct_option in rows}
+
+
+def invalidate_questions(quiz_ids):
+    """Drop the cached pool of each quiz whose questions changed, once per quiz"""
+    for quiz_id in set(quiz_ids):
+        question_pool.invalidate(quiz_id)
+
+
+def _candidate_rng(quiz_id, user_id, seed):
+    digest = hashlib.blake2b(f"{quiz_id}:{user_id}:{seed}".encode("utf-8"), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, "little"))
+
+
+def candidate_layout(quiz, pool, user_id):
+    """
+    Derive the questions a candidate gets and the order of their options.
+    pool is a list of (question_id, options) ordered by question id. The result is a
+    list of (question_id, option_order) where option_order[i] is the original 1-based
+    option number shown at position i + 1. Nothing is stored; the same inputs always
+    produce the same layout.
+    """
+    rng = _candidate_rng(quiz.id, user_id, quiz.shuffle_seed or 0)
+    indexes = list(range(len(pool)))
+
+    if quiz.sample_size and quiz.sample_size < len(pool):
+        indexes = rng.sample(indexes, quiz.sample_size)
+        if not quiz.shuffle_questions:
+            indexes.sort()
+    elif quiz.shuffle_questions:
+        rng.shuffle(indexes)
+
+    layout = []
+    for index in indexes:
+        question_id, options = pool[index]
+        option_order = [number for number, option in enumerate(options, 1) if option is not None]
+        if quiz.shuffle_options:
+            rng.shuffle(option_order)
+        layout.append((question_id, option_order))
+    return layout
+
+
+def pool_layout(quiz, questions, user_id):
+    return candidate_layout(quiz, [(q["id"], q["options"]) for q in questions], user_id)
+
+
+def apply_layout(questions, layout):
+    """Reorder the shared pool payload into the candidate's view"""
+    by_id = {q["id"]: q for q in questions}
+    question_list = []
+    for question_id, option_order in layout:
+        q = by_id[question_id]
+        question_list.append({
+            "id": question_id,
+            "question_statement": q["question_statement"],
+            "options": [q["options"][number - 1] for number in option_order],
+            "option": 0
+        })
+    return question_list
+
+
+def grade_answers(layout, correct_options, answers):
+    """
+    Grade answers given as (question_id, shown option position) pairs against the
+    candidate's layout. Returns (total_scored, total_possible).
+    """
+    orders = dict(layout)
+    total_scored = 0
+    for question_id, position in answers:
+        option_order = orders.pop(question_id, None)
+        if option_order is None or not is_int(position) or not (1 <= position <= len(option_order)):
+            continue
+        if option_order[position - 1] == correct_options.get(question_id):
+            total_scored += 1
+    return total_scored, len(layout)
+
+
+def parse_sampling_options(data):
+    """Validate the sampling/shuffling fields of a quiz payload, returning only those present"""
+    options = {}
+    if "sample_size" in data:
+        sample_size = data["sample_size"]
+        if sample_size is not None and (not is_int(sample_size) or sample_size < 1):
+            raise ValueError("sample_size must be a positive integer or null")
+        options["sample_size"] = sample_size
+    for field in ("shuffle_questions", "shuffle_options"):
+        if field in data:
+            if not isinstance(data[field], bool):
+                raise ValueError(f"{field} must be a boolean")
+            options[field] = data[field]
+    if "shuffle_seed" in data:
+        if not is_int(data["shuffle_seed"]):
+            raise ValueError("shuffle_seed must be an integer")
+        options["shuffle_seed"] = data["shuffle_seed"]
+    return options
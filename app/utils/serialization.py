@@ -0,0 +1,36 @@
+import json
+import orjson
+from flask.json.provider import JSONProvider, _default
+
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    orjson-backed JSON for requests and responses. datetime, date and
+    dataclasses are encoded natively, so timestamps always come out as
+    ISO-8601 ("2030-01-01T10:00:00", microseconds only when non-zero, no
+    offset for naive values); anything else goes through Flask's default
+    conversions. Before this provider date_of_quiz was str(datetime), with a
+    space instead of the "T", and other timestamps were RFC 822 strings.
+    """
+
+    sort_keys = True
+
+    def _options(self):
+        return OPTIONS | orjson.OPT_SORT_KEYS if self.sort_keys else OPTIONS
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # e.g. indent from the tojson template filter; not on the request path
+            kwargs.setdefault("default", _default)
+            return json.dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=self._options())
+        return self._app.response_class(body + b"\n", mimetype="application/json")
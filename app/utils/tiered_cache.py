@@ -0,0 +1,287 @@
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+import redis
+from flask import Response
+from app.utils.metrics import registry as metrics_registry
+
+KEY_PREFIX = "tiered:"
+
+# Release the recompute lock only if this worker still holds it
+RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_MISSING = object()
+
+
+class _Entry:
+    __slots__ = ("value", "fresh_until", "stale_until", "checked_until")
+
+    def __init__(self, value, fresh_until, stale_until, checked_until=0.0):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        # How long L1 may answer without asking Redis whether the entry changed
+        self.checked_until = checked_until
+
+
+class TieredCache:
+    """
+    Read-through cache with a bounded in-process LRU (L1) in front of Redis (L2).
+
+    An entry is fresh for `ttl` seconds and may then be served stale for
+    another `stale_ttl` seconds while one caller refreshes it. Recomputation is
+    single-flight: threads of a worker wait for that worker's leader, and
+    workers take a short lock in Redis, so an expiring key at quiz start costs
+    one query across the deployment rather than one per request. L1 trusts its
+    copy for TIERED_CACHE_L1_SECONDS, which bounds how long an invalidation in
+    another worker goes unnoticed. Without Redis the cache degrades to L1.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._config = None
+        self._logger = None
+        self.reset()
+
+    def init_app(self, app):
+        from app.utils.lifecycle import after_fork
+        app.extensions["tiered_cache"] = self
+        self._config = app.config
+        self._logger = app.logger
+        self.reset()
+        after_fork(self.reset)
+
+    def reset(self):
+        self._client = None
+        self._release = None
+        self._redis_down_until = 0.0
+        self._local = OrderedDict()
+        self._inflight = {}
+
+    def _redis(self):
+        if time.monotonic() < self._redis_down_until:
+            return None
+        if self._client is None:
+            timeout = self._config["TIERED_CACHE_REDIS_TIMEOUT"]
+            self._client = redis.Redis.from_url(
+                self._config["TIERED_CACHE_REDIS_URL"], socket_timeout=timeout, socket_connect_timeout=timeout
+            )
+            self._release = self._client.register_script(RELEASE_LOCK)
+        return self._client
+
+    def _redis_failed(self, error):
+        # Don't pay a connection timeout on every lookup while Redis is away
+        self._redis_down_until = time.monotonic() + self._config["TIERED_CACHE_RETRY_SECONDS"]
+        self._logger.warning("Tiered cache falling back to in-process entries: %s", error)
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self._config["TIERED_CACHE_L1_SIZE"]:
+                self._local.popitem(last=False)
+
+    def _lookup(self, key, now):
+        """(entry or None, tier it came from)"""
+        with self._lock:
+            local = self._local.get(key)
+            if local is not None:
+                self._local.move_to_end(key)
+        if local is not None and now < local.checked_until and now < local.fresh_until:
+            return local, "l1"
+
+        client = self._redis()
+        if client is not None:
+            try:
+                raw = client.get(KEY_PREFIX + key)
+            except redis.RedisError as e:
+                self._redis_failed(e)
+            else:
+                if raw is None:
+                    # Expired or invalidated elsewhere; the local copy is no longer trustworthy
+                    with self._lock:
+                        self._local.pop(key, None)
+                    return None, None
+                entry = _Entry(*pickle.loads(raw), checked_until=now + self._config["TIERED_CACHE_L1_SECONDS"])
+                self._remember(key, entry)
+                return entry, "l2"
+        if local is not None and now < local.stale_until:
+            return local, "l1"
+        return None, None
+
+    def set(self, key, value, ttl, stale_ttl=0):
+        now = time.time()
+        entry = _Entry(value, now + ttl, now + ttl + stale_ttl, now + self._config["TIERED_CACHE_L1_SECONDS"])
+        self._remember(key, entry)
+        client = self._redis()
+        if client is not None:
+            try:
+                client.set(KEY_PREFIX + key, pickle.dumps((value, entry.fresh_until, entry.stale_until)),
+                           px=int((ttl + stale_ttl) * 1000))
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+    def delete(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+        client = self._redis()
+        if client is not None:
+            try:
+                client.delete(KEY_PREFIX + key)
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+    def clear(self):
+        """
+        Drop every entry, e.g. after bulk writes that reuse ids. Other workers
+        notice within TIERED_CACHE_L1_SECONDS, when their L1 copies find L2 empty.
+        """
+        with self._lock:
+            self._local.clear()
+        client = self._redis()
+        if client is not None:
+            try:
+                keys = list(client.scan_iter(match=KEY_PREFIX + "*", count=1000))
+                for start in range(0, len(keys), 1000):
+                    client.delete(*keys[start:start + 1000])
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+    def _acquire(self, key):
+        """Lock token, True when Redis is unavailable (this worker decides alone), or None if held elsewhere"""
+        client = self._redis()
+        if client is None:
+            return True
+        token = uuid.uuid4().hex
+        try:
+            if client.set(f"{KEY_PREFIX}{key}:lock", token, nx=True,
+                          px=int(self._config["TIERED_CACHE_LOCK_SECONDS"] * 1000)):
+                return token
+            return None
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return True
+
+    def _unlock(self, key, token):
+        if token is True or self._client is None:
+            return
+        try:
+            self._release(keys=[f"{KEY_PREFIX}{key}:lock"], args=[token])
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+    def _wait_for_entry(self, key, deadline):
+        """Poll L2 while another worker recomputes the key"""
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry, _ = self._lookup(key, time.time())
+            if entry is not None:
+                return entry.value
+        return _MISSING
+
+    def _recompute(self, key, compute, ttl, stale_ttl, stale=_MISSING):
+        """
+        Single-flight recompute. With a stale value at hand, callers that are not
+        the leader return it immediately; otherwise they wait for the leader's
+        result and only compute themselves if it never arrives.
+        """
+        with self._lock:
+            done = self._inflight.get(key)
+            leader = done is None
+            if leader:
+                done = self._inflight[key] = threading.Event()
+        deadline = time.monotonic() + self._config["TIERED_CACHE_LOCK_SECONDS"]
+
+        if not leader:
+            if stale is not _MISSING:
+                return stale
+            done.wait(self._config["TIERED_CACHE_LOCK_SECONDS"])
+            entry, _ = self._lookup(key, time.time())
+            return entry.value if entry is not None else compute()
+
+        token = None
+        try:
+            token = self._acquire(key)
+            if token is None:
+                if stale is not _MISSING:
+                    return stale
+                value = self._wait_for_entry(key, deadline)
+                if value is not _MISSING:
+                    return value
+            value = compute()
+            # Error responses are passed through, never cached
+            if not (isinstance(value, _StoredResponse) and value.status >= 400):
+                self.set(key, value, ttl, stale_ttl)
+            return value
+        finally:
+            if token is not None:
+                self._unlock(key, token)
+            with self._lock:
+                self._inflight.pop(key, None)
+            done.set()
+
+    def get_or_compute(self, key, compute, ttl, stale_ttl=0, name="default"):
+        now = time.time()
+        entry, tier = self._lookup(key, now)
+        if entry is not None and now < entry.fresh_until:
+            metrics_registry.record_cache(name, f"hit_{tier}")
+            return entry.value
+        if entry is not None and now < entry.stale_until:
+            metrics_registry.record_cache(name, "stale")
+            return self._recompute(key, compute, ttl, stale_ttl, stale=entry.value)
+        metrics_registry.record_cache(name, "miss")
+        return self._recompute(key, compute, ttl, stale_ttl)
+
+    def cached(self, ttl, stale_ttl=0, key=None):
+        """
+        Cache a helper's or route's return value. The key is the function's
+        qualified name plus `key(*args, **kwargs)` or, by default, the repr of the
+        arguments; a route whose output depends on the caller or the query string
+        must pass `key`. Responses are stored as body, status and headers. The
+        wrapper gets invalidate(*args, **kwargs) and uncached.
+        """
+        def decorator(fn):
+            name = f"{fn.__module__}.{fn.__qualname__}"
+
+            def make_key(args, kwargs):
+                suffix = key(*args, **kwargs) if key else repr((args, sorted(kwargs.items())))
+                return f"{name}:{suffix}"
+
+            def compute(args, kwargs):
+                value = fn(*args, **kwargs)
+                if isinstance(value, Response):
+                    return _StoredResponse(value)
+                if isinstance(value, tuple) and value and isinstance(value[0], Response):
+                    return _StoredResponse(value[0], *value[1:])
+                return value
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                value = self.get_or_compute(make_key(args, kwargs), lambda: compute(args, kwargs),
+                                            ttl, stale_ttl, name=name)
+                return value.rebuild() if isinstance(value, _StoredResponse) else value
+
+            wrapper.invalidate = lambda *args, **kwargs: self.delete(make_key(args, kwargs))
+            wrapper.uncached = fn
+            return wrapper
+        return decorator
+
+
+class _StoredResponse:
+    """Picklable form of a Flask response"""
+
+    def __init__(self, response, status=None, headers=None):
+        self.body = response.get_data()
+        self.status = status or response.status_code
+        self.headers = list(response.headers.items()) + list((headers or {}).items())
+
+    def rebuild(self):
+        return Response(self.body, status=self.status, headers=self.headers)
@@ -0,0 +1,128 @@
+"""
+Concurrent quiz-submission benchmark for the database engine profiles.
+
+Each profile runs in its own process against a fresh database so module level
+configuration (Config reads the environment at import time) is picked up cleanly.
+
+    python bench_db_profiles.py --threads 16 --attempts 50
+    python bench_db_profiles.py --profiles default tuned --database-url postgresql://...
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def run_worker(threads, attempts):
+    from app import create_app
+    from app.commands import create_admin_if_not_exists
+    from app.extensions import db, bcrypt
+    from app.models import User, Subject, Chapter, Quiz, Question
+    from flask_jwt_extended import create_access_token
+    from datetime import datetime
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        create_admin_if_not_exists()
+        subject = Subject(name=f"Bench Subject {time.time()}")
+        db.session.add(subject)
+        db.session.flush()
+        chapter = Chapter(name="Bench Chapter", subject_id=subject.id)
+        db.session.add(chapter)
+        db.session.flush()
+        quiz = Quiz(chapter_id=chapter.id, date_of_quiz=datetime.now(), time_duration=30)
+        db.session.add(quiz)
+        db.session.flush()
+        for i in range(10):
+            db.session.add(Question(
+                quiz_id=quiz.id, question_statement=f"Bench question {i}?",
+                option1="a", option2="b", option3="c", option4="d", correct_option=1
+            ))
+
+        password_hash = bcrypt.generate_password_hash("bench").decode("utf-8")
+        users = [
+            User(email=f"bench{time.time()}-{i}@example.com", full_name=f"Bench {i}", password_hash=password_hash)
+            for i in range(threads)
+        ]
+        db.session.add_all(users)
+        db.session.commit()
+
+        quiz_id = quiz.id
+        question_ids = [q.id for q in quiz.questions]
+        tokens = [create_access_token(identity=str(user.id)) for user in users]
+
+    answers = [{"question_id": question_id, "option": 1} for question_id in question_ids]
+    results = {"ok": 0, "errors": 0, "locked": 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def submit(token):
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        barrier.wait()
+        for _ in range(attempts):
+            # Fetching the questions starts the timed quiz session the submission is graded against
+            client.get(f"/quiz/{quiz_id}/questions", headers=headers)
+            response = client.post(f"/user/quiz/{quiz_id}/attempt", json={"answers": answers}, headers=headers)
+            with lock:
+                if response.status_code == 201:
+                    results["ok"] += 1
+                else:
+                    results["errors"] += 1
+                    if "locked" in response.get_data(as_text=True):
+                        results["locked"] += 1
+
+    workers = [threading.Thread(target=submit, args=(token,)) for token in tokens]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    results["elapsed"] = elapsed
+    results["throughput"] = results["ok"] / elapsed if elapsed else 0
+    print(json.dumps(results))
+
+
+def run_profile(profile, args):
+    env = dict(os.environ, DB_ENGINE_PROFILE=profile)
+    with tempfile.TemporaryDirectory() as tmp:
+        env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker",
+             "--threads", str(args.threads), "--attempts", str(args.attempts)],
+            env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+    if output.returncode != 0:
+        raise RuntimeError(f"profile {profile} failed:\n{output.stderr}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["default", "tuned"])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=25, help="submissions per thread")
+    parser.add_argument("--database-url", help="benchmark an existing database instead of a temporary SQLite file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.threads, args.attempts)
+        return
+
+    print(f"{'profile':<10} {'ok':>7} {'errors':>7} {'locked':>7} {'seconds':>9} {'submits/s':>10}")
+    for profile in args.profiles:
+        result = run_profile(profile, args)
+        print(f"{profile:<10} {result['ok']:>7} {result['errors']:>7} {result['locked']:>7} "
+              f"{result['elapsed']:>9.2f} {result['throughput']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
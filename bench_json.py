@@ -0,0 +1,95 @@
+"""
+JSON encoding microbenchmark for the large list payloads: Flask's default
+provider against the orjson provider the app now uses.
+
+    python bench_json.py --rows 5000 --runs 20
+"""
+import argparse
+import datetime
+import statistics
+import time
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.utils.serialization import OrjsonProvider
+
+
+def score_rows(n):
+    """Shaped like /user/scores"""
+    now = datetime.datetime.now()
+    return {"scores": [
+        {
+            "quiz_id": i,
+            "subject": f"Subject {i % 20}",
+            "chapter": f"Chapter {i % 200}",
+            "marks_scored": f"{i % 10}/10",
+            "percentage": (i % 10) * 10.0,
+            "time_stamp_of_attempt": now - datetime.timedelta(minutes=i),
+        }
+        for i in range(n)
+    ]}
+
+
+def user_rows(n):
+    """Shaped like /admin/users"""
+    return {"users": [
+        {
+            "id": i,
+            "email": f"user{i}@example.com",
+            "full_name": f"User {i}",
+            "qualification": "Bachelor",
+            "dob": datetime.date(1990, 1, 1) + datetime.timedelta(days=i % 5000),
+            "role": "user",
+        }
+        for i in range(n)
+    ], "next_after_id": n, "total": {"value": n, "approximate": False}}
+
+
+def chapter_rows(n):
+    """Shaped like /user/subject/<id>/chapters"""
+    now = datetime.datetime.now()
+    return {"subject": "Subject", "chapters": [
+        {
+            "id": i,
+            "name": f"Chapter {i}",
+            "description": "Seeded chapter description " * 4,
+            "quiz_id": i,
+            "date_of_quiz": now + datetime.timedelta(days=i % 30),
+            "time_duration": 30,
+            "attempted": bool(i % 2),
+        }
+        for i in range(n)
+    ]}
+
+
+def measure(app, payload, runs):
+    with app.app_context():
+        app.json.response(payload)
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            app.json.response(payload)
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    default_app = Flask("default")
+    default_app.json = DefaultJSONProvider(default_app)
+    orjson_app = Flask("orjson")
+    orjson_app.json = OrjsonProvider(orjson_app)
+
+    print(f"{'payload':<10} {'default ms':>11} {'orjson ms':>10} {'speedup':>8}")
+    for name, build in (("scores", score_rows), ("users", user_rows), ("chapters", chapter_rows)):
+        payload = build(args.rows)
+        baseline = measure(default_app, payload, args.runs)
+        fast = measure(orjson_app, payload, args.runs)
+        print(f"{name:<10} {baseline * 1000:>11.2f} {fast * 1000:>10.2f} {baseline / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
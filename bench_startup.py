@@ -0,0 +1,57 @@
+"""
+Process startup benchmark: package import, create_app() and first request latency.
+
+Every run happens in a fresh interpreter so import caches do not hide the cost.
+
+    python bench_startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app_instance = app.create_app()
+created = time.perf_counter()
+response = app_instance.test_client().get("/auth/me")
+first_request = time.perf_counter()
+assert response.status_code == 401, response.status_code
+print(json.dumps({
+    "import": imported - started,
+    "create_app": created - imported,
+    "first_request": first_request - created,
+    "total": first_request - started,
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}")
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, "-c", PROBE], env=env, cwd=root, capture_output=True, text=True, check=True
+            )
+            samples.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    print(f"{'phase':<14} {'median ms':>10} {'max ms':>10}")
+    for phase in ("import", "create_app", "first_request", "total"):
+        values = [sample[phase] * 1000 for sample in samples]
+        print(f"{phase:<14} {statistics.median(values):>10.1f} {max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
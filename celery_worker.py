@@ -1,6 +1,36 @@
-from app import app
-from app.tasks import celery
+"""
+Celery worker entry point. Run one worker per queue so each gets its own
+concurrency and prefetch profile from Config.CELERY_QUEUE_SETTINGS:
 
-# Explicitly set Redis as broker and backend
-celery.conf.broker_url = 'redis://localhost:6379/1'
-celery.conf.result_backend = 'redis://localhost:6379/1'
\ No newline at end of file
+    python celery_worker.py exports
+    python celery_worker.py email
+    python celery_worker.py analytics
+
+or directly: celery -A celery_worker.celery worker -Q exports -c 4 --prefetch-multiplier 1
+"""
+import sys
+from app import create_app
+from app.tasks import celery, init_celery
+
+app = create_app()
+init_celery(app)
+
+
+def worker_argv(queue):
+    settings = app.config["CELERY_QUEUE_SETTINGS"][queue]
+    argv = [
+        "worker",
+        "--queues", queue,
+        "--hostname", f"{queue}@%h",
+        "--concurrency", str(settings["concurrency"]),
+        "--prefetch-multiplier", str(settings["prefetch_multiplier"]),
+        "--loglevel", "INFO",
+    ]
+    if settings.get("acks_late"):
+        # Hand out work only to processes that are free, instead of reserving ahead
+        argv += ["-O", "fair"]
+    return argv
+
+
+if __name__ == "__main__":
+    celery.worker_main(worker_argv(sys.argv[1] if len(sys.argv) > 1 else app.config["CELERY_TASK_DEFAULT_QUEUE"]))
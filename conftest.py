@@ -0,0 +1,111 @@
+"""
+Fixtures for the behavioural tests: a fresh application per test on an
+in-memory SQLite database, with every Redis client pointed at one fakeredis
+server. test_query_budget.py builds its own app and runs without Redis.
+"""
+import datetime
+
+import fakeredis
+import pytest
+import redis
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.commands import create_admin_if_not_exists
+from app.extensions import db
+from app.models import User, Subject, Chapter, Quiz, Question
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, "from_url",
+                        classmethod(lambda cls, url, **kwargs: fakeredis.FakeRedis(server=server)))
+    return fakeredis.FakeRedis(server=server)
+
+
+@pytest.fixture
+def app_config():
+    """Overrides on top of the test defaults; a test module redefines this fixture to change them"""
+    return {}
+
+
+@pytest.fixture
+def app(redis_server, app_config):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "SQLALCHEMY_BINDS": {},
+        "SQLALCHEMY_REPLICA_BINDS": [],
+        "CACHE_TYPE": "SimpleCache",
+        "BCRYPT_LOG_ROUNDS": 4,
+        "JWT_COOKIE_SECURE": False,
+        "PURGE_CHUNK_PAUSE_SECONDS": 0,
+        **app_config,
+    })
+
+    from app.tasks import celery
+    celery.conf.update(broker_url="memory://", result_backend="cache+memory://")
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        create_admin_if_not_exists()
+        yield app
+        db.session.remove()
+        db.drop_all(bind_key=None)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    user = User(email="candidate@example.com", full_name="Candidate", qualification="Bachelor")
+    user.set_password("password")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def admin(app):
+    return User.query.filter_by(role="admin").first()
+
+
+@pytest.fixture
+def auth_headers(app):
+    def headers(user):
+        return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+    return headers
+
+
+@pytest.fixture
+def make_quiz(app):
+    """Factory for a subject/chapter/quiz with `questions` questions whose answers cycle 1..4"""
+    created = []
+
+    def make(questions=4, date_of_quiz=None, time_duration=30, **options):
+        number = len(created)
+        subject = Subject(name=f"Subject {number}")
+        db.session.add(subject)
+        db.session.flush()
+        chapter = Chapter(name=f"Chapter {number}", subject_id=subject.id)
+        db.session.add(chapter)
+        db.session.flush()
+        quiz = Quiz(chapter_id=chapter.id, time_duration=time_duration, remarks="",
+                    date_of_quiz=date_of_quiz or datetime.datetime.now() - datetime.timedelta(minutes=5),
+                    **options)
+        db.session.add(quiz)
+        db.session.flush()
+        for i in range(questions):
+            db.session.add(Question(
+                quiz_id=quiz.id, question_statement=f"Question {i} of quiz {quiz.id}, on topic number {i * 7}?",
+                option1="a", option2="b", option3="c", option4="d", correct_option=1 + i % 4
+            ))
+        db.session.commit()
+        created.append(quiz)
+        return quiz
+
+    return make
@@ -0,0 +1,228 @@
+"""
+Quiz-start and quiz-close surge load test.
+
+Starts the app on a local port in this process, logs in N synthetic candidates,
+and has all of them open one quiz at its start time: check availability, fetch
+the questions, then submit within the closing window before the deadline.
+Reports latency percentiles, throughput and error rate per endpoint.
+
+    python loadtest.py --candidates 200 --duration 20 --close-window 5
+    python loadtest.py --database-url postgresql://... --json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+
+    def add(self, name, started, finished, status):
+        with self._lock:
+            self.samples[name].append((started, finished, status))
+
+
+class Candidate:
+    """One synthetic candidate with its own keep-alive connection"""
+
+    def __init__(self, port, recorder, email):
+        self.email = email
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        self.recorder = recorder
+        self.token = None
+
+    def request(self, name, method, path, body=None):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                                    headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            payload, status = b"", 0
+        self.recorder.add(name, started, time.perf_counter(), status)
+        return status, payload
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(p / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(recorder):
+    rows = {}
+    for name, samples in sorted(recorder.samples.items()):
+        latencies = sorted(finished - started for started, finished, _ in samples)
+        errors = sum(1 for _, _, status in samples if status == 0 or status >= 400)
+        span = max(f for _, f, _ in samples) - min(s for s, _, _ in samples)
+        rows[name] = {
+            "requests": len(samples),
+            "errors": errors,
+            "error_rate": errors / len(samples),
+            "throughput": len(samples) / span if span else float(len(samples)),
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": latencies[-1] * 1000,
+        }
+    return rows
+
+
+def prepare(app, args):
+    """Create the candidates and a quiz that starts once everyone has logged in"""
+    from seed_data import seed_data
+    from app.commands import create_admin_if_not_exists
+    from app.extensions import db
+    from app.models import Subject, Chapter, Quiz, Question
+
+    with app.app_context():
+        db.create_all()
+        create_admin_if_not_exists()
+        seed_data(num_users=args.candidates, num_subjects=0, scores_per_user=0, seed=args.seed, clear=False)
+
+        subject = Subject(name=f"Load test {time.time()}")
+        db.session.add(subject)
+        db.session.flush()
+        chapter = Chapter(name="Load test chapter", subject_id=subject.id)
+        db.session.add(chapter)
+        db.session.flush()
+        # date_of_quiz is set to the real start time after the login surge
+        quiz = Quiz(chapter_id=chapter.id, date_of_quiz=datetime(2100, 1, 1),
+                    time_duration=max(1, args.duration // 60))
+        db.session.add(quiz)
+        db.session.flush()
+        for i in range(args.questions):
+            db.session.add(Question(
+                quiz_id=quiz.id, question_statement=f"Load test question {i}?",
+                option1="a", option2="b", option3="c", option4="d", correct_option=1 + i % 4
+            ))
+        db.session.commit()
+        return quiz.id
+
+
+def run(args):
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    from werkzeug.serving import make_server
+    from app import create_app
+    from app.extensions import db
+    from app.models import Quiz, User
+    from seed_data import PASSWORD
+
+    app = create_app()
+    quiz_id = prepare(app, args)
+    with app.app_context():
+        # The candidates are the users seed_data just appended
+        emails = [email for (email,) in db.session.query(User.email).filter(User.role == "user")
+                  .order_by(User.id.desc()).limit(args.candidates)]
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    recorder = Recorder()
+    candidates = [Candidate(server.server_port, recorder, email) for email in emails]
+    rng = random.Random(args.seed)
+
+    def each(target):
+        threads = [threading.Thread(target=target, args=(candidate,)) for candidate in candidates]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def login(candidate):
+        status, payload = candidate.request("auth.login", "POST", "/auth/login",
+                                            {"email": candidate.email, "password": PASSWORD})
+        if status == 200:
+            candidate.token = json.loads(payload)["access_token"]
+
+    each(login)
+
+    start_at = time.time() + args.lead
+    deadline = start_at + args.duration
+    with app.app_context():
+        db.session.get(Quiz, quiz_id).date_of_quiz = datetime.fromtimestamp(start_at)
+        db.session.commit()
+
+    # Offsets are drawn up front so the run is reproducible for a given seed
+    offsets = {
+        id(candidate): (rng.uniform(0, args.start_jitter),
+                        args.duration - rng.uniform(0, min(args.close_window, args.duration)))
+        for candidate in candidates
+    }
+    late = []
+
+    def attempt(candidate):
+        if candidate.token is None:
+            return
+        open_offset, submit_offset = offsets[id(candidate)]
+        time.sleep(max(0.0, start_at + open_offset - time.time()))
+        candidate.request("user.check_quiz_availability", "GET", f"/user/quiz/{quiz_id}/check")
+        status, payload = candidate.request("quiz.get_quiz_questions", "GET", f"/quiz/{quiz_id}/questions")
+        if status != 200:
+            return
+        answers = [{"question_id": question["id"], "option": 1 + question["id"] % 4}
+                   for question in json.loads(payload)["questions"]]
+
+        time.sleep(max(0.0, start_at + submit_offset - time.time()))
+        candidate.request("user.attempt_quiz", "POST", f"/user/quiz/{quiz_id}/attempt", {"answers": answers})
+        if time.time() > deadline:
+            late.append(candidate)
+
+    each(attempt)
+    server.shutdown()
+    return summarize(recorder), len(late)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--lead", type=float, default=2.0, help="seconds between the login surge and quiz start")
+    parser.add_argument("--start-jitter", type=float, default=1.0, help="spread of quiz opens after the start")
+    parser.add_argument("--duration", type=int, default=10, help="seconds from quiz start to deadline")
+    parser.add_argument("--close-window", type=float, default=3.0, help="submissions land in this many "
+                                                                        "seconds before the deadline")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="run against an existing database instead of a temporary SQLite file")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Config reads DATABASE_URL at import time, so set it before importing the app
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp, 'loadtest.db')}"
+        # Every candidate connects from 127.0.0.1, which the per-IP login limit would throttle
+        os.environ.setdefault("RATELIMIT_ENABLED", "false")
+        report, late = run(args)
+
+    if args.json:
+        print(json.dumps({"endpoints": report, "late_submissions": late}, indent=2))
+        return
+
+    print(f"{'endpoint':<30} {'reqs':>6} {'err %':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}")
+    for name, row in report.items():
+        print(f"{name:<30} {row['requests']:>6} {row['error_rate'] * 100:>6.1f} {row['throughput']:>8.1f} "
+              f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+    print(f"late submissions: {late}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,160 +1,256 @@
-import random
+"""
+Synthetic data generator for development and load testing.
+
+Rows are written with bulk Core inserts in batches, every user shares one
+precomputed password hash and all randomness comes from a single seeded RNG,
+so a given seed always produces the same dataset.
+
+    python seed_data.py --users 1000000 --subjects 50 --scores-per-user 10 --seed 42
+"""
+import argparse
 import datetime
+import random
+import time
+from contextlib import nullcontext
+from itertools import islice
 from faker import Faker
+from flask import has_app_context
+from sqlalchemy import func, text
 from app import create_app
-from app.models import User, Subject, Chapter, Quiz, Question, Score
-from app.extensions import db
-
-fake = Faker()
-
-def seed_data():
-    app = create_app()
-    with app.app_context():
-        # Clear existing data (optional)
-        db.session.query(Score).delete()
-        db.session.query(Question).delete()
-        db.session.query(Quiz).delete()
-        db.session.query(Chapter).delete()
-        db.session.query(Subject).delete()
-        db.session.query(User).filter(User.role != 'admin').delete()
-        
-        # Create test users
-        print("Creating users...")
-        users = []
-        for i in range(10):
-            user = User(
-                email=fake.email(),
-                full_name=fake.name(),
-                qualification=random.choice(['High School', 'Bachelor', 'Master', 'PhD']),
-                dob=fake.date_of_birth(minimum_age=18, maximum_age=60)
-            )
-            user.set_password('password123')
-            db.session.add(user)
-            users.append(user)
-        
-        # Create subjects
-        print("Creating subjects...")
-        subjects = []
-        for i in range(5):
-            subject = Subject(
-                name=fake.unique.word() + " " + random.choice(['Science', 'Arts', 'Engineering', 'Mathematics']),
-                description=fake.paragraph()
-            )
-            db.session.add(subject)
-            subjects.append(subject)
-        
-        # Commit to get IDs
-        db.session.commit()
-        
-        # Create chapters for each subject
-        print("Creating chapters...")
-        chapters = []
-        for subject in subjects:
-            for i in range(random.randint(3, 6)):
-                chapter = Chapter(
-                    name=f"Chapter {i+1}: {fake.unique.word().title()}",
-                    description=fake.paragraph(),
-                    subject_id=subject.id
-                )
-                db.session.add(chapter)
-                chapters.append(chapter)
-        
-        # Commit to get IDs
-        db.session.commit()
-        
-        # Create one quiz per chapter
-        print("Creating quizzes...")
-        quizzes = []
-        start_date = datetime.datetime.now() + datetime.timedelta(days=7)
-        for chapter in chapters:
-            quiz_date = start_date + datetime.timedelta(days=random.randint(0, 30))
-            quiz = Quiz(
-                chapter_id=chapter.id,
-                date_of_quiz=quiz_date,
-                time_duration=random.choice([30, 45, 60, 90]),
-                remarks=fake.sentence()
-            )
-            db.session.add(quiz)
-            quizzes.append(quiz)
-        
-        # Commit to get IDs
-        db.session.commit()
-        
-        # Create questions for each quiz
-        print("Creating quiz questions...")
-        for quiz in quizzes:
-            question_count = random.randint(5, 15)
-            for i in range(question_count):
-                options = [fake.sentence() for _ in range(4)]
-                question = Question(
-                    quiz_id=quiz.id,
-                    question_statement=fake.sentence() + "?",
-                    option1=options[0],
-                    option2=options[1],
-                    option3=options[2],
-                    option4=options[3],
-                    correct_option=random.randint(1, 4)
-                )
-                db.session.add(question)
-        
-        # Create scores for some completed quizzes
-        print("Creating scores...")
-        past_quizzes = []
-        past_date = datetime.datetime.now() - datetime.timedelta(days=30)
-        # Create some quizzes in the past for scoring
-        for i in range(15):
-            chapter = random.choice(chapters)
-            quiz_date = past_date + datetime.timedelta(days=random.randint(0, 25))
-            quiz = Quiz(
-                chapter_id=chapter.id,
-                date_of_quiz=quiz_date,
-                time_duration=random.choice([30, 45, 60, 90]),
-                remarks=fake.sentence()
-            )
-            db.session.add(quiz)
-            past_quizzes.append(quiz)
-            
-        db.session.commit()
-        
-        # Add questions to past quizzes
-        for quiz in past_quizzes:
-            question_count = random.randint(5, 15)
-            for i in range(question_count):
-                options = [fake.sentence() for _ in range(4)]
-                question = Question(
-                    quiz_id=quiz.id,
-                    question_statement=fake.sentence() + "?",
-                    option1=options[0],
-                    option2=options[1],
-                    option3=options[2],
-                    option4=options[3],
-                    correct_option=random.randint(1, 4)
-                )
-                db.session.add(question)
-                
-        db.session.commit()
-        
-        # Create scores for users
-        for quiz in past_quizzes:
-            # Get the number of questions for this quiz
-            questions = Question.query.filter_by(quiz_id=quiz.id).all()
-            total_questions = len(questions)
-            
-            # Create scores for random users
-            for user in random.sample(users, random.randint(3, 7)):
-                correct_answers = random.randint(0, total_questions)
-                score = Score(
-                    quiz_id=quiz.id,
-                    user_id=user.id,
-                    time_stamp_of_attempt=quiz.date_of_quiz + datetime.timedelta(hours=random.randint(1, 3)),
-                    total_scored=correct_answers,
-                    total_possible=total_questions,
-                    completed=True
-                )
-                db.session.add(score)
-        
-        db.session.commit()
-        print("Data gen complete!")
+from app.models import User, Subject, Chapter, Quiz, Question, Score, ArchivedScore, QuestionSignature, QuestionBucket
+from app.extensions import db, bcrypt, tiered_cache
+from app.utils.catalog import catalog
+
+PASSWORD = 'password123'
+QUALIFICATIONS = ['High School', 'Bachelor', 'Master', 'PhD']
+SUBJECT_KINDS = ['Science', 'Arts', 'Engineering', 'Mathematics']
+DURATIONS = [30, 45, 60, 90]
+POOL_SIZE = 500
+
+
+class Vocabulary:
+    """Faker output sampled once up front; rows are assembled from these pools"""
+
+    def __init__(self, seed):
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.first_names = [fake.first_name() for _ in range(POOL_SIZE)]
+        self.last_names = [fake.last_name() for _ in range(POOL_SIZE)]
+        self.words = list({fake.word() for _ in range(POOL_SIZE)})
+        self.sentences = [fake.sentence() for _ in range(POOL_SIZE)]
+        self.paragraphs = [fake.paragraph() for _ in range(POOL_SIZE // 10)]
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _sync_sequence(model):
+    # Ids are assigned here, so PostgreSQL's serial sequence has to catch up
+    if db.engine.dialect.name == 'postgresql':
+        table = model.__table__.name
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), COALESCE(MAX(id), 1)) FROM \"{table}\""
+        ))
+
+
+def _insert(model, rows, batch_size):
+    """Insert an iterable of row dicts in executemany batches, returns the row count"""
+    statement = model.__table__.insert()
+    rows = iter(rows)
+    total = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        db.session.execute(statement, batch)
+        total += len(batch)
+    _sync_sequence(model)
+    db.session.commit()
+    return total
+
+
+def _users(rng, vocab, first_id, count, password_hash, batch_size):
+    for start in range(0, count, batch_size):
+        n = min(batch_size, count - start)
+        firsts = rng.choices(vocab.first_names, k=n)
+        lasts = rng.choices(vocab.last_names, k=n)
+        qualifications = rng.choices(QUALIFICATIONS, k=n)
+        # Birth dates between 18 and 60 years ago
+        today = datetime.date.today().toordinal()
+        ages = [rng.randint(18 * 365, 60 * 365) for _ in range(n)]
+        for i in range(n):
+            user_id = first_id + start + i
+            yield {
+                'id': user_id,
+                'email': f"user{user_id}@example.com",
+                'password_hash': password_hash,
+                'full_name': f"{firsts[i]} {lasts[i]}",
+                'qualification': qualifications[i],
+                'dob': datetime.date.fromordinal(today - ages[i]),
+                'role': 'user',
+            }
+
+
+def _questions(rng, vocab, quiz_ids, first_id, per_quiz):
+    question_id = first_id
+    for quiz_id in quiz_ids:
+        statements = rng.choices(vocab.sentences, k=per_quiz)
+        options = rng.choices(vocab.sentences, k=per_quiz * 4)
+        correct = rng.choices(range(1, 5), k=per_quiz)
+        for i in range(per_quiz):
+            yield {
+                'id': question_id,
+                'quiz_id': quiz_id,
+                'question_statement': statements[i].rstrip('.') + '?',
+                'option1': options[4 * i],
+                'option2': options[4 * i + 1],
+                'option3': options[4 * i + 2],
+                'option4': options[4 * i + 3],
+                'correct_option': correct[i],
+            }
+            question_id += 1
+
+
+def _scores(rng, user_ids, past_quizzes, per_user, per_quiz):
+    per_user = min(per_user, len(past_quizzes))
+    for user_id in user_ids:
+        for quiz_id, quiz_date in rng.sample(past_quizzes, per_user):
+            yield {
+                'quiz_id': quiz_id,
+                'user_id': user_id,
+                'time_stamp_of_attempt': quiz_date + datetime.timedelta(minutes=rng.randint(1, 180)),
+                'total_scored': rng.randint(0, per_quiz),
+                'total_possible': per_quiz,
+                'completed': True,
+            }
+
+
+def clear_data():
+    """Remove everything except admin accounts"""
+    for model in (QuestionBucket, QuestionSignature, ArchivedScore, Score, Question, Quiz, Chapter, Subject):
+        db.session.query(model).delete(synchronize_session=False)
+    db.session.query(User).filter(User.role != 'admin').delete(synchronize_session=False)
+    db.session.commit()
+    catalog.invalidate()
+    # Cached question pools, answer keys and histories are keyed by ids the next seed reuses
+    tiered_cache.clear()
+
+
+def seed_data(num_users=10, num_subjects=5, chapters_per_subject=4, questions_per_quiz=10,
+              scores_per_user=5, past_quiz_ratio=0.5, seed=None, batch_size=5000, clear=True):
+    """
+    Generate users, subjects, chapters, one quiz per chapter, questions and scores
+    for the quizzes already held. Returns per-table row counts and rows per second.
+    """
+    # Reuse the caller's app (e.g. the admin endpoint) instead of building a second one
+    context = nullcontext() if has_app_context() else create_app().app_context()
+    with context:
+        rng = random.Random(seed)
+        vocab = Vocabulary(seed)
+        started = time.perf_counter()
+        stats = {'seed': seed, 'tables': {}}
+
+        def timed(name, model, rows):
+            table_started = time.perf_counter()
+            count = _insert(model, rows, batch_size)
+            seconds = time.perf_counter() - table_started
+            stats['tables'][name] = {
+                'rows': count,
+                'seconds': round(seconds, 3),
+                'rows_per_second': round(count / seconds) if seconds else 0,
+            }
+
+        if clear:
+            clear_data()
+
+        password_hash = bcrypt.generate_password_hash(PASSWORD).decode('utf-8')
+        first_user = _next_id(User)
+        timed('users', User, _users(rng, vocab, first_user, num_users, password_hash, batch_size))
+
+        first_subject = _next_id(Subject)
+        subject_ids = list(range(first_subject, first_subject + num_subjects))
+        timed('subjects', Subject, (
+            {
+                'id': subject_id,
+                'name': f"{rng.choice(vocab.words).title()} {rng.choice(SUBJECT_KINDS)} {subject_id}",
+                'description': rng.choice(vocab.paragraphs),
+            }
+            for subject_id in subject_ids
+        ))
+
+        first_chapter = _next_id(Chapter)
+        chapter_rows = [
+            {
+                'id': first_chapter + i,
+                'name': f"Chapter {i % chapters_per_subject + 1}: {rng.choice(vocab.words).title()}",
+                'description': rng.choice(vocab.paragraphs),
+                'subject_id': subject_ids[i // chapters_per_subject],
+            }
+            for i in range(num_subjects * chapters_per_subject)
+        ]
+        timed('chapters', Chapter, chapter_rows)
+
+        # Held quizzes fall in the last 30 days, upcoming ones in the next 5 weeks
+        now = datetime.datetime.now().replace(microsecond=0)
+        first_quiz = _next_id(Quiz)
+        quiz_rows = []
+        for i, chapter in enumerate(chapter_rows):
+            if rng.random() < past_quiz_ratio:
+                date_of_quiz = now - datetime.timedelta(days=rng.randint(1, 30), hours=rng.randint(0, 23))
+            else:
+                date_of_quiz = now + datetime.timedelta(days=rng.randint(1, 37), hours=rng.randint(0, 23))
+            quiz_rows.append({
+                'id': first_quiz + i,
+                'chapter_id': chapter['id'],
+                'date_of_quiz': date_of_quiz,
+                'time_duration': rng.choice(DURATIONS),
+                'remarks': rng.choice(vocab.sentences),
+            })
+        timed('quizzes', Quiz, quiz_rows)
+
+        quiz_ids = [quiz['id'] for quiz in quiz_rows]
+        timed('questions', Question, _questions(rng, vocab, quiz_ids, _next_id(Question), questions_per_quiz))
+
+        past_quizzes = [(quiz['id'], quiz['date_of_quiz']) for quiz in quiz_rows if quiz['date_of_quiz'] < now]
+        user_ids = range(first_user, first_user + num_users)
+        timed('scores', Score, _scores(rng, user_ids, past_quizzes, scores_per_user, questions_per_quiz))
+        # Core inserts bypass the ORM events that keep worker catalogs current, and the
+        # invalidation hooks of the cached question pools and histories
+        catalog.invalidate()
+        tiered_cache.clear()
+
+        elapsed = time.perf_counter() - started
+        total = sum(table['rows'] for table in stats['tables'].values())
+        stats['rows'] = total
+        stats['seconds'] = round(elapsed, 3)
+        stats['rows_per_second'] = round(total / elapsed) if elapsed else 0
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--subjects", type=int, default=5)
+    parser.add_argument("--chapters-per-subject", type=int, default=4)
+    parser.add_argument("--questions-per-quiz", type=int, default=10)
+    parser.add_argument("--scores-per-user", type=int, default=5)
+    parser.add_argument("--past-quiz-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--keep", action="store_true", help="append instead of clearing existing data")
+    args = parser.parse_args()
+
+    stats = seed_data(
+        num_users=args.users, num_subjects=args.subjects, chapters_per_subject=args.chapters_per_subject,
+        questions_per_quiz=args.questions_per_quiz, scores_per_user=args.scores_per_user,
+        past_quiz_ratio=args.past_quiz_ratio, seed=args.seed, batch_size=args.batch_size, clear=not args.keep
+    )
+    print(f"{'table':<10} {'rows':>10} {'seconds':>9} {'rows/s':>10}")
+    for name, table in stats['tables'].items():
+        print(f"{name:<10} {table['rows']:>10} {table['seconds']:>9.2f} {table['rows_per_second']:>10}")
+    print(f"{'total':<10} {stats['rows']:>10} {stats['seconds']:>9.2f} {stats['rows_per_second']:>10}")
+
 
 if __name__ == "__main__":
-    seed_data()
\ No newline at end of file
+    main()
@@ -1,5 +1,5 @@
 from celery.schedules import crontab
-from app.tasks import celery, send_daily_reminders, generate_monthly_report
+from app.tasks import celery, send_daily_reminders, generate_monthly_report, archive_old_scores
 
 # Configure periodic tasks
 @celery.on_after_configure.connect
@@ -18,7 +18,15 @@ def setup_periodic_tasks(sender, **kwargs):
         name='generate monthly reports'
     )
 
+    # Archive old attempts after the reports have read last month, at 3:00 AM on the 2nd
+    sender.add_periodic_task(
+        crontab(day_of_month=2, hour=3, minute=0),
+        archive_old_scores.s(),
+        name='archive old scores'
+    )
+
 if __name__ == '__main__':
     print("Scheduled tasks set up:")
     print("1. Daily reminders: 7:00 PM every day")
-    print("2. Monthly reports: 6:00 AM on the 1st of every month")
\ No newline at end of file
+    print("2. Monthly reports: 6:00 AM on the 1st of every month")
+    print("3. Score archival: 3:00 AM on the 2nd of every month")
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""Moving old attempts between score and score_archive (app/utils/archive.py)."""
+import datetime
+
+from app.extensions import db
+from app.models import Score, ArchivedScore
+from app.utils.archive import all_scores, archive_scores, restore_scores, archived_months
+
+
+def _attempt(quiz, user, days_ago, scored=1):
+    score = Score(quiz_id=quiz.id, user_id=user.id, total_scored=scored, total_possible=4,
+                  time_stamp_of_attempt=datetime.datetime.now() - datetime.timedelta(days=days_ago))
+    db.session.add(score)
+    db.session.commit()
+    return score.id
+
+
+def _scores(client, headers):
+    response = client.get("/user/scores", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()["scores"]
+
+
+def test_history_is_unchanged_by_archiving_and_restoring(client, user, auth_headers, make_quiz):
+    quiz = make_quiz()
+    headers = auth_headers(user)
+    for days_ago, scored in ((400, 1), (200, 2), (3, 3)):
+        _attempt(quiz, user, days_ago, scored)
+    before = _scores(client, headers)
+
+    moved = archive_scores(batch_size=1)
+    assert sum(moved.values()) == 2
+    assert db.session.scalar(db.select(db.func.count()).select_from(Score)) == 1
+    assert sum(rows for _, rows in archived_months()) == 2
+    assert _scores(client, headers) == before
+
+    assert restore_scores(months=[min(moved)]) == 1
+    assert restore_scores() == 1
+    assert db.session.scalar(db.select(db.func.count()).select_from(ArchivedScore)) == 0
+    assert _scores(client, headers) == before
+
+
+def test_ids_of_archived_scores_are_never_reused(app, user, make_quiz):
+    quiz = make_quiz()
+    _attempt(quiz, user, days_ago=300)
+    newest = _attempt(quiz, user, days_ago=250)
+    # The newest row leaves the table, which is when SQLite without AUTOINCREMENT would hand its id out again
+    archive_scores()
+
+    fresh = _attempt(quiz, user, days_ago=0)
+    assert fresh > newest
+    history = all_scores(user_id=user.id)
+    ids = db.session.scalars(db.select(history.c.id)).all()
+    assert len(ids) == len(set(ids)) == 3
+
+    assert restore_scores() == 2
+    assert sorted(db.session.scalars(db.select(Score.id))) == sorted(ids)
@@ -0,0 +1,111 @@
+"""Quiz countdown and "open" events over Redis pub/sub with a per-quiz timer lease (app/utils/broadcast.py)."""
+import json
+import queue
+import time
+
+import pytest
+import redis
+
+from app.extensions import quiz_broadcaster
+from app.utils.broadcast import QuizBroadcaster, LEASE_KEY, event_stream
+
+
+@pytest.fixture
+def app_config():
+    return {
+        "QUIZ_EVENTS_TICK_SECONDS": 0.2,
+        "QUIZ_EVENTS_SLOW_TICK_SECONDS": 0.2,
+        "QUIZ_EVENTS_LEASE_SECONDS": 1,
+        "QUIZ_EVENTS_RETRY_SECONDS": 60,
+    }
+
+
+def _worker(app):
+    worker = QuizBroadcaster()
+    worker.init_app(app)
+    app.extensions["quiz_broadcaster"] = quiz_broadcaster
+    return worker
+
+
+def _events(stream, timeout=10):
+    events = []
+    deadline = time.time() + timeout
+    for chunk in stream:
+        assert time.time() < deadline, "stream never sent open"
+        if chunk.startswith("event: "):
+            events.append(json.loads(chunk.split("data: ", 1)[1]))
+    return events
+
+
+def _next_event(subscriber, timeout=3):
+    return subscriber.get(timeout=timeout)
+
+
+def test_stream_counts_down_then_opens(app, redis_server):
+    worker = _worker(app)
+    opens_at = time.time() + 1.2
+    events = _events(event_stream(worker, 7, opens_at, heartbeat=1))
+
+    assert events[0]["event"] == "countdown"
+    assert events[-1] == {"event": "open", "quiz_id": 7}
+    assert len(events) > 2
+    assert all(event["event"] == "countdown" for event in events[:-1])
+    seconds_left = [event["seconds_left"] for event in events[:-1]]
+    assert seconds_left == sorted(seconds_left, reverse=True)
+    assert time.time() >= opens_at
+    # The timer hands its lease back once nobody waits on the quiz any more
+    deadline = time.time() + 2
+    while redis_server.exists(LEASE_KEY.format(7)) and time.time() < deadline:
+        time.sleep(0.1)
+    assert not redis_server.exists(LEASE_KEY.format(7))
+
+
+def test_stream_of_an_open_quiz_ends_at_once(app):
+    events = _events(event_stream(_worker(app), 7, time.time() - 1, heartbeat=1))
+    assert events == [{"event": "open", "quiz_id": 7}]
+
+
+def test_second_worker_takes_over_when_the_leaders_lease_expires(app, redis_server):
+    # A timer elsewhere in the deployment holds the lease, then dies without releasing it
+    redis_server.set(LEASE_KEY.format(7), "dead-worker", px=600)
+    worker = _worker(app)
+    subscriber = worker.subscribe(7, time.time() + 30)
+    try:
+        with pytest.raises(queue.Empty):
+            subscriber.get(timeout=0.3)
+        assert redis_server.get(LEASE_KEY.format(7)) == b"dead-worker"
+
+        message = _next_event(subscriber)
+        assert message["event"] == "countdown"
+        assert redis_server.get(LEASE_KEY.format(7)) == worker._token.encode()
+    finally:
+        worker.unsubscribe(7, subscriber)
+
+
+def test_only_the_lease_holder_publishes(app, redis_server):
+    leader, follower = _worker(app), _worker(app)
+    opens_at = time.time() + 30
+    first = leader.subscribe(7, opens_at)
+    try:
+        assert _next_event(first)["event"] == "countdown"
+        second = follower.subscribe(7, opens_at)
+        try:
+            # Both workers' clients get the leader's ticks; the follower never takes the lease
+            assert _next_event(second)["event"] == "countdown"
+            assert redis_server.get(LEASE_KEY.format(7)) == leader._token.encode()
+            assert not follower._quizzes[7].leading
+        finally:
+            follower.unsubscribe(7, second)
+    finally:
+        leader.unsubscribe(7, first)
+
+
+def test_local_timer_without_redis(app, monkeypatch, caplog):
+    unreachable = redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=1)
+    monkeypatch.setattr(redis.Redis, "from_url", classmethod(lambda cls, url, **kwargs: unreachable))
+    worker = _worker(app)
+
+    events = _events(event_stream(worker, 7, time.time() + 1, heartbeat=1))
+    assert events[0]["event"] == "countdown"
+    assert events[-1] == {"event": "open", "quiz_id": 7}
+    assert "timing clients locally" in caplog.text
@@ -0,0 +1,71 @@
+"""Bulk question edits (admin.bulk_edit_questions) and validation of the quiz sampling fields."""
+import pytest
+
+from app.extensions import db
+from app.models import Question
+
+
+def _submit(client, quiz, headers, question_ids, option):
+    response = client.post(f"/quiz/{quiz.id}/submit", headers=headers,
+                           json={"answers": {str(question_id): option for question_id in question_ids}})
+    assert response.status_code == 200
+    return response.get_json()["total_score"]
+
+
+def test_grading_uses_the_answer_key_as_soon_as_it_is_edited(client, user, admin, auth_headers, make_quiz):
+    quiz = make_quiz(questions=4)
+    headers = auth_headers(user)
+    question_ids = [question["id"] for question in client.get(f"/quiz/{quiz.id}/questions",
+                                                               headers=headers).get_json()["questions"]]
+    # Answers cycle 1..4, so always picking option 1 gets one right
+    assert _submit(client, quiz, headers, question_ids, 1) == 1
+
+    response = client.post("/admin/questions/bulk-edit", headers=auth_headers(admin), json={
+        "updates": [{"id": question_id, "correct_option": 1} for question_id in question_ids]
+    })
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert [result["status"] for result in response.get_json()["results"]] == ["updated"] * 4
+    assert _submit(client, quiz, headers, question_ids, 1) == 4
+
+
+def test_invalid_updates_are_reported_per_item_and_nothing_is_written(client, admin, auth_headers, make_quiz):
+    quiz = make_quiz(questions=3)
+    first, second, third = db.session.scalars(db.select(Question.id).where(Question.quiz_id == quiz.id)
+                                              .order_by(Question.id)).all()
+
+    response = client.post("/admin/questions/bulk-edit", headers=auth_headers(admin), json={"updates": [
+        {"id": first, "correct_option": True},
+        {"id": second, "correct_option": 3},
+        {"id": third, "option3": None, "correct_option": 3},
+        {"id": 999999, "correct_option": 1},
+    ]})
+    assert response.status_code == 400
+    assert response.get_json()["results"] == [
+        {"id": first, "status": "invalid", "error": "Correct option must be between 1 and 4"},
+        {"id": second, "status": "skipped"},
+        {"id": third, "status": "invalid", "error": "Correct option 3 has no text"},
+        {"id": 999999, "status": "invalid", "error": "Question not found"},
+    ]
+    assert db.session.scalars(db.select(Question.correct_option).order_by(Question.id)).all() == [1, 2, 3]
+
+
+def test_boolean_question_ids_are_rejected(client, admin, auth_headers, make_quiz):
+    make_quiz(questions=1)
+    response = client.post("/admin/questions/bulk-edit", headers=auth_headers(admin),
+                           json={"updates": [{"id": True, "correct_option": 2}]})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Each update must be an object with an integer id"
+
+
+@pytest.mark.parametrize("field, value, error", [
+    ("sample_size", True, "sample_size must be a positive integer or null"),
+    ("sample_size", 0, "sample_size must be a positive integer or null"),
+    ("shuffle_seed", False, "shuffle_seed must be an integer"),
+    ("shuffle_questions", 1, "shuffle_questions must be a boolean"),
+])
+def test_sampling_fields_reject_booleans_and_bad_values(client, admin, auth_headers, make_quiz, field, value, error):
+    chapter_id = make_quiz(questions=1).chapter_id
+    response = client.post(f"/admin/chapters/edit/{chapter_id}", headers=auth_headers(admin),
+                           json={"quiz": {field: value}})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
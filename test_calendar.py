@@ -0,0 +1,65 @@
+"""The upcoming and live quizzes calendar (user.quiz_calendar)."""
+import datetime
+
+from app.extensions import db
+from app.models import Quiz, Score, ArchivedScore
+from app.utils.tiered_cache import KEY_PREFIX
+
+
+def _calendar(client, headers, query=""):
+    response = client.get(f"/user/quizzes/calendar{query}", headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()["quizzes"]
+
+
+def test_calendar_lists_the_window_with_attempt_status(client, user, auth_headers, make_quiz):
+    now = datetime.datetime.now()
+    live = make_quiz(date_of_quiz=now - datetime.timedelta(minutes=5))
+    archived = make_quiz(date_of_quiz=now - datetime.timedelta(hours=3), time_duration=30)
+    upcoming = make_quiz(date_of_quiz=now + datetime.timedelta(days=2))
+    make_quiz(date_of_quiz=now - datetime.timedelta(days=3))
+    make_quiz(date_of_quiz=now + datetime.timedelta(days=30))
+    db.session.add_all([
+        Score(quiz_id=live.id, user_id=user.id, total_scored=1, total_possible=4, time_stamp_of_attempt=now),
+        Score(quiz_id=live.id, user_id=user.id, total_scored=3, total_possible=4, time_stamp_of_attempt=now),
+        ArchivedScore(id=1000, archive_month=f"{now:%Y-%m}", quiz_id=archived.id, user_id=user.id,
+                      total_scored=2, total_possible=4, time_stamp_of_attempt=now),
+    ])
+    db.session.commit()
+    headers = auth_headers(user)
+
+    quizzes = _calendar(client, headers)
+    assert [(q["quiz_id"], q["status"], q["attempted"], q.get("marks_scored")) for q in quizzes] == [
+        (archived.id, "closed", True, "2/4"),
+        (live.id, "live", True, "3/4"),
+        (upcoming.id, "upcoming", False, None),
+    ]
+    assert [q["quiz_id"] for q in _calendar(client, headers, "?only=unattempted")] == [upcoming.id]
+    assert upcoming.id not in [q["quiz_id"] for q in _calendar(client, headers, "?window=today")]
+
+
+def test_calendar_rejects_unknown_windows(client, user, auth_headers):
+    response = client.get("/user/quizzes/calendar?window=month", headers=auth_headers(user))
+    assert response.status_code == 400
+
+
+def _cached_windows(redis_server):
+    return redis_server.keys(KEY_PREFIX + "app.routes.user.calendar_window:*")
+
+
+def test_shared_window_is_dropped_when_a_quiz_changes(client, user, admin, auth_headers, make_quiz, redis_server):
+    now = datetime.datetime.now()
+    moved_id = make_quiz(date_of_quiz=now + datetime.timedelta(days=1)).id
+    assert [q["quiz_id"] for q in _calendar(client, auth_headers(user))] == [moved_id]
+    assert len(_cached_windows(redis_server)) == 1
+    # Every user reads the same entry; only attempts are looked up per caller
+    assert [q["quiz_id"] for q in _calendar(client, auth_headers(admin))] == [moved_id]
+    assert len(_cached_windows(redis_server)) == 1
+
+    added_id = make_quiz(date_of_quiz=now + datetime.timedelta(days=2)).id
+    assert _cached_windows(redis_server) == []
+    assert [q["quiz_id"] for q in _calendar(client, auth_headers(user))] == [moved_id, added_id]
+
+    db.session.get(Quiz, moved_id).date_of_quiz = now + datetime.timedelta(days=30)
+    db.session.commit()
+    assert [q["quiz_id"] for q in _calendar(client, auth_headers(user))] == [added_id]
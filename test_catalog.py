@@ -0,0 +1,66 @@
+"""Per-worker catalog snapshots kept in step over Redis pub/sub (app/utils/catalog.py)."""
+import time
+
+import pytest
+
+from app.extensions import db
+from app.models import Quiz
+from app.utils.catalog import Catalog, CHANNEL, catalog
+
+
+def _wait_for(condition, timeout=3):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def other_worker(app, redis_server):
+    """A second worker's catalog, listening and with its snapshot loaded"""
+    worker = Catalog()
+    worker.init_app(app)
+    app.extensions["catalog"] = catalog
+    worker.snapshot()
+    _wait_for(lambda: dict(redis_server.pubsub_numsub(CHANNEL))[CHANNEL.encode()] > 0)
+    # Subscribing flags a reload for anything missed meanwhile; take it now
+    _wait_for(lambda: worker._reload)
+    worker.snapshot()
+    return worker
+
+
+def test_committed_quiz_edit_reaches_the_other_worker(app, make_quiz, other_worker):
+    quiz_id = make_quiz(time_duration=30).id
+    _wait_for(lambda: quiz_id in other_worker._snapshot.quizzes)
+
+    quiz = db.session.get(Quiz, quiz_id)
+    quiz.time_duration = 45
+    db.session.flush()
+    time.sleep(0.2)
+    # Nothing is published before the commit
+    assert other_worker._snapshot.quizzes[quiz_id].time_duration == 30
+
+    db.session.commit()
+    _wait_for(lambda: other_worker._snapshot.quizzes[quiz_id].time_duration == 45)
+    # Patched from the message, not reloaded from the database
+    assert not other_worker._reload
+    assert catalog.snapshot().quizzes[quiz_id].time_duration == 45
+
+
+def test_rolled_back_edit_is_not_published(app, make_quiz, other_worker):
+    quiz_id = make_quiz(time_duration=30).id
+    _wait_for(lambda: quiz_id in other_worker._snapshot.quizzes)
+
+    db.session.get(Quiz, quiz_id).time_duration = 45
+    db.session.flush()
+    db.session.rollback()
+    time.sleep(0.2)
+    assert other_worker._snapshot.quizzes[quiz_id].time_duration == 30
+
+
+def test_invalidate_marks_the_other_worker_for_reload(app, other_worker):
+    assert not other_worker._reload
+    catalog.invalidate()
+    _wait_for(lambda: other_worker._reload)
+    other_worker.snapshot()
+    assert not other_worker._reload
@@ -0,0 +1,85 @@
+"""Response compression negotiation (app/utils/compression.py)."""
+import gzip
+
+import pytest
+from flask import Response, jsonify
+
+
+@pytest.fixture
+def routes(app):
+    payload = {"rows": [{"id": i, "statement": f"Question number {i} about topic {i * 7}"} for i in range(200)]}
+
+    @app.route("/_test/json")
+    def json_payload():
+        response = jsonify(payload)
+        response.set_etag("v1")
+        return response
+
+    @app.route("/_test/small")
+    def small_payload():
+        return jsonify({"ok": True})
+
+    @app.route("/_test/png")
+    def png_payload():
+        return Response(b"\x89PNG" * 1000, mimetype="image/png")
+
+    @app.route("/_test/stream")
+    def streamed_payload():
+        return Response((f"line {i}\n" for i in range(500)), mimetype="text/plain")
+
+    return payload
+
+
+def _get(client, url, accept=None):
+    return client.get(url, headers={"Accept-Encoding": accept} if accept else {})
+
+
+def test_gzip_is_applied_when_accepted(client, routes):
+    plain = _get(client, "/_test/json")
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+    response = _get(client, "/_test/json", "gzip")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert int(response.headers["Content-Length"]) < len(plain.get_data())
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+    # The compressed body is not byte-identical to the strong validator's representation
+    assert response.headers["ETag"] == 'W/"v1"'
+
+
+def test_small_bodies_and_other_mimetypes_are_left_alone(client, routes):
+    assert "Content-Encoding" not in _get(client, "/_test/small", "gzip").headers
+    assert "Content-Encoding" not in _get(client, "/_test/png", "gzip").headers
+
+
+def test_server_preference_and_client_quality_pick_the_encoding(client, routes):
+    pytest.importorskip("brotli")
+    zstandard = pytest.importorskip("zstandard")
+    plain = _get(client, "/_test/json").get_data()
+
+    response = _get(client, "/_test/json", "gzip, br, zstd")
+    assert response.headers["Content-Encoding"] == "zstd"
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(response.get_data()) == plain
+
+    assert _get(client, "/_test/json", "gzip;q=1.0, zstd;q=0.5").headers["Content-Encoding"] == "gzip"
+    assert _get(client, "/_test/json", "br, gzip;q=0.8").headers["Content-Encoding"] == "br"
+    assert "Content-Encoding" not in _get(client, "/_test/json", "deflate").headers
+
+
+def test_brotli_round_trip(client, routes):
+    brotli = pytest.importorskip("brotli")
+    response = _get(client, "/_test/json", "br")
+    assert brotli.decompress(response.get_data()) == _get(client, "/_test/json").get_data()
+
+
+def test_bodies_over_the_threshold_and_streams_are_compressed_while_sent(app, client, routes):
+    app.config["COMPRESSION_STREAM_THRESHOLD"] = 1000
+    plain = _get(client, "/_test/json").get_data()
+    response = _get(client, "/_test/json", "gzip")
+    assert response.is_streamed
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(response.get_data()) == plain
+
+    streamed = _get(client, "/_test/stream", "gzip")
+    assert streamed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(streamed.get_data()).decode() == "".join(f"line {i}\n" for i in range(500))
@@ -0,0 +1,62 @@
+"""Near-duplicate question detection (app/utils/dedup.py) through the admin API."""
+
+
+def _question(statement):
+    return {"question_statement": statement, "option1": "a", "option2": "b", "option3": "c", "option4": "d",
+            "correct_option": 1}
+
+
+def test_new_question_is_flagged_against_indexed_questions(client, admin, auth_headers, make_quiz):
+    quiz = make_quiz(questions=0)
+    headers = auth_headers(admin)
+
+    first = client.post(f"/admin/quizzes/{quiz.id}/questions", headers=headers,
+                        json=_question("Which planet in the solar system is known as the red planet?"))
+    assert first.status_code == 201
+    assert first.get_json()["possible_duplicates"] == []
+
+    # Case and punctuation are normalised away before shingling
+    near = client.post(f"/admin/quizzes/{quiz.id}/questions", headers=headers,
+                       json=_question("which planet in the solar system is known as the RED planet"))
+    matches = near.get_json()["possible_duplicates"]
+    assert [match["question_id"] for match in matches] == [first.get_json()["question"]]
+    assert matches[0]["similarity"] == 1.0
+
+    unrelated = client.post(f"/admin/quizzes/{quiz.id}/questions", headers=headers,
+                            json=_question("What is the boiling point of water at sea level in Celsius?"))
+    assert unrelated.get_json()["possible_duplicates"] == []
+
+
+def test_bulk_import_flags_duplicates_within_the_batch(client, admin, auth_headers, make_quiz):
+    subject_id = make_quiz(questions=0).chapter.subject_id
+    statement = "Name the largest ocean on Earth by surface area and volume."
+    response = client.post(f"/admin/subjects/{subject_id}/complete-chapter", headers=auth_headers(admin), json={
+        "chapter": {"name": "Oceans"},
+        "quiz": {"date_of_quiz": "2030-01-01T10:00:00", "time_duration": 30},
+        "questions": [_question(statement), _question("Who wrote the play Romeo and Juliet?"),
+                      _question(statement.upper())]
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+    flagged = response.get_json()["possible_duplicates"]
+    assert [entry["question"] for entry in flagged] == [3]
+    # Batch matches are reported by the id the earlier question was given
+    assert flagged[0]["matches"][0]["question_id"] == flagged[0]["question_id"] - 2
+
+
+def test_subject_clusters_group_only_near_duplicates(client, admin, auth_headers, make_quiz):
+    quiz = make_quiz(questions=0)
+    headers = auth_headers(admin)
+    statements = [
+        "What is the chemical symbol for the element gold?",
+        "What is the chemical symbol for the element gold ?!",
+        "How many continents are there on planet Earth?",
+    ]
+    ids = [
+        client.post(f"/admin/quizzes/{quiz.id}/questions", headers=headers, json=_question(s)).get_json()["question"]
+        for s in statements
+    ]
+
+    response = client.get(f"/admin/subjects/{quiz.chapter.subject_id}/duplicates", headers=headers)
+    assert response.status_code == 200
+    clusters = [[question["id"] for question in cluster] for cluster in response.get_json()["clusters"]]
+    assert clusters == [ids[:2]]
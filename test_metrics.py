@@ -0,0 +1,70 @@
+"""Per-endpoint request metrics and the /admin/metrics exposition (app/utils/metrics.py)."""
+import logging
+
+import pytest
+
+from app.extensions import db
+from app.utils.metrics import MetricsRegistry, registry
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def _profile(client, headers):
+    # Requests share the test's session; start empty so the lookup reaches the database
+    db.session.remove()
+    assert client.get("/user/profile", headers=headers).status_code == 200
+
+
+def _metrics(client, headers):
+    response = client.get("/admin/metrics", headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    return response.get_data(as_text=True).splitlines()
+
+
+def _value(lines, series):
+    return next(float(line.rsplit(" ", 1)[1]) for line in lines if line.startswith(series + " "))
+
+
+def test_requests_are_exposed_in_prometheus_text_format(client, user, admin, auth_headers):
+    headers = auth_headers(user)
+    for _ in range(2):
+        _profile(client, headers)
+    lines = _metrics(client, auth_headers(admin))
+
+    assert "# TYPE quizmaster_requests_total counter" in lines
+    assert "# TYPE quizmaster_request_duration_seconds histogram" in lines
+    assert _value(lines, 'quizmaster_requests_total{endpoint="user.get_profile",method="GET",status="200"}') == 2
+    latency = 'quizmaster_request_duration_seconds_bucket{endpoint="user.get_profile",method="GET",le="%s"}'
+    assert _value(lines, latency % "+Inf") == 2
+    buckets = [line for line in lines if line.startswith(latency.split("le=")[0])]
+    counts = [float(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    # The profile lookup is one statement per request
+    assert _value(lines, 'quizmaster_sql_queries_per_request_sum{endpoint="user.get_profile"}') == 2
+    assert _value(lines, 'quizmaster_response_size_bytes_count{endpoint="user.get_profile"}') == 2
+
+
+def test_requests_over_the_statement_threshold_are_flagged(app, client, user, admin, auth_headers, caplog):
+    headers = auth_headers(user)
+    app.config["METRICS_N_PLUS_ONE_THRESHOLD"] = 0
+    with caplog.at_level(logging.WARNING):
+        _profile(client, headers)
+    assert "Likely N+1 query pattern: GET /user/profile ran 1 SQL statements (threshold 0)" in caplog.text
+
+    app.config["METRICS_N_PLUS_ONE_THRESHOLD"] = 100
+    lines = _metrics(client, auth_headers(admin))
+    assert _value(lines, 'quizmaster_n_plus_one_suspected_total{endpoint="user.get_profile"}') == 1
+    assert not any(line.startswith('quizmaster_n_plus_one_suspected_total{endpoint="admin.get_metrics"}')
+                   for line in lines)
+
+
+def test_label_values_are_escaped():
+    metrics = MetricsRegistry()
+    metrics.record_cache('quiz "pool"\n', "miss")
+    assert 'quizmaster_cache_requests_total{cache="quiz \\"pool\\"\\n",result="miss"} 1' in metrics.render()
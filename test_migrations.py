@@ -0,0 +1,84 @@
+"""Schema upgrades run by init-db on databases created before a model change (app/utils/migrations.py)."""
+from sqlalchemy import inspect
+
+from app.extensions import db
+from app.models import Score
+from app.utils.catalog import catalog
+from app.utils.migrations import run_upgrades, index_names
+
+
+def _columns(table):
+    return {column["name"] for column in inspect(db.engine).get_columns(table)}
+
+
+def test_fresh_schema_needs_no_upgrade(app):
+    assert run_upgrades() == {}
+
+
+def test_quiz_sampling_columns_are_added_to_old_quiz_table(app, make_quiz):
+    quiz_id = make_quiz(questions=1).id
+    with db.engine.begin() as connection:
+        for column in ("sample_size", "shuffle_questions", "shuffle_options", "shuffle_seed"):
+            connection.exec_driver_sql(f"ALTER TABLE quiz DROP COLUMN {column}")
+
+    assert "quiz_sampling_columns" in run_upgrades()
+    assert {"sample_size", "shuffle_questions", "shuffle_options", "shuffle_seed"} <= _columns("quiz")
+    quiz = catalog.load().quizzes[quiz_id]
+    assert (quiz.sample_size, quiz.shuffle_questions, quiz.shuffle_options, quiz.shuffle_seed) == (None, False, False, 0)
+    assert run_upgrades() == {}
+
+
+def test_user_directory_prefix_indexes_replace_the_old_ones(app):
+    with db.engine.begin() as connection:
+        for name in ("ix_user_email_prefix", "ix_user_full_name_prefix", "ix_user_qualification"):
+            connection.exec_driver_sql(f"DROP INDEX {name}")
+        connection.exec_driver_sql("CREATE INDEX ix_user_email_lower ON user (lower(email))")
+
+    assert sorted(run_upgrades()["user_directory_indexes"]) == [
+        "ix_user_email_lower", "ix_user_email_prefix", "ix_user_full_name_prefix", "ix_user_qualification"
+    ]
+    assert run_upgrades() == {}
+
+
+def test_score_table_is_rebuilt_with_autoincrement(app, user, make_quiz):
+    quiz = make_quiz(questions=1)
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE score")
+        connection.exec_driver_sql(
+            "CREATE TABLE score (id INTEGER NOT NULL PRIMARY KEY, quiz_id INTEGER NOT NULL, user_id INTEGER NOT NULL, "
+            "time_stamp_of_attempt DATETIME, total_scored INTEGER NOT NULL, total_possible INTEGER NOT NULL, "
+            "completed BOOLEAN)"
+        )
+        connection.exec_driver_sql("CREATE INDEX ix_score_quiz_id ON score (quiz_id)")
+        connection.exec_driver_sql(
+            f"INSERT INTO score VALUES (1, {quiz.id}, {user.id}, '2030-01-01 10:00:00', 3, 4, 1)"
+        )
+        # Id 2 was archived, so the rebuilt table must not hand it out again
+        connection.exec_driver_sql(
+            f"INSERT INTO score_archive VALUES (2, '2029-12', {quiz.id}, {user.id}, '2029-12-01 10:00:00', 1, 4, 1)"
+        )
+
+    assert run_upgrades() == {"score_autoincrement": ["score"]}
+    assert {"ix_score_quiz_id", "ix_score_time_stamp_of_attempt"} <= index_names(db.session.connection(), "score")
+    score = Score(quiz_id=quiz.id, user_id=user.id, total_scored=0, total_possible=4)
+    db.session.add(score)
+    db.session.commit()
+    assert score.id == 3
+    assert db.session.get(Score, 1).total_scored == 3
+    assert run_upgrades() == {}
+
+
+def test_purge_indexes_are_added(app):
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_question_quiz_id")
+        connection.exec_driver_sql("DROP INDEX ix_score_quiz_id")
+
+    assert run_upgrades() == {"purge_indexes": ["ix_question_quiz_id", "ix_score_quiz_id"]}
+    assert run_upgrades() == {}
+
+
+def test_calendar_index_is_added(app):
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_quiz_date_of_quiz")
+
+    assert run_upgrades() == {"calendar_indexes": ["ix_quiz_date_of_quiz"]}
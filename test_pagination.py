@@ -0,0 +1,22 @@
+"""Keyset pages and prefix search of the admin user directory (app/utils/pagination.py)."""
+from app.extensions import db
+from app.models import User
+
+
+def test_prefix_search_pages_through_email_and_name_matches(client, admin, auth_headers):
+    for email, name in [("anna@example.com", "Zoe Quinn"), ("bob@example.com", "Annabel Lee"),
+                        ("ANNE@example.com", "Carl"), ("ann_x@example.com", "Dan"), ("ano@example.com", "Eve")]:
+        db.session.add(User(email=email, full_name=name, password_hash="x"))
+    db.session.commit()
+    headers = auth_headers(admin)
+
+    first = client.get("/admin/users?q=Ann&limit=2", headers=headers).get_json()
+    second = client.get(f"/admin/users?q=Ann&limit=2&after_id={first['next_after_id']}", headers=headers).get_json()
+    emails = [user["email"] for user in first["users"] + second["users"]]
+    assert emails == ["anna@example.com", "bob@example.com", "ANNE@example.com", "ann_x@example.com"]
+    assert second["next_after_id"] is None
+    assert first["total"] == {"value": 4, "approximate": False}
+
+    # The upper bound of the range stops right after the prefix
+    assert [user["email"] for user in client.get("/admin/users?q=ann_", headers=headers).get_json()["users"]] \
+        == ["ann_x@example.com"]
@@ -0,0 +1,70 @@
+"""Score export to Parquet, single file and hive-partitioned (app/utils/parquet_export.py)."""
+import datetime
+import os
+
+import pytest
+
+from app.extensions import db
+from app.models import Score
+from app.utils.archive import archive_scores
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+ds = pytest.importorskip("pyarrow.dataset")
+
+from app.utils.parquet_export import export_scores_parquet  # noqa: E402
+
+
+@pytest.fixture
+def scores(user, make_quiz):
+    """Four attempts over two subjects and three months, the two oldest in the archive"""
+    first, second = make_quiz(), make_quiz()
+    attempts = [
+        (first, datetime.datetime(2024, 1, 15, 9), 1),
+        (second, datetime.datetime(2024, 1, 20, 9), 2),
+        (first, datetime.datetime(2024, 3, 2, 9), 3),
+        (second, datetime.datetime(2024, 3, 9, 9), 4),
+    ]
+    for quiz, attempted, scored in attempts:
+        db.session.add(Score(quiz_id=quiz.id, user_id=user.id, total_scored=scored, total_possible=4,
+                             time_stamp_of_attempt=attempted))
+    db.session.commit()
+    assert sum(archive_scores(before=datetime.datetime(2024, 2, 1)).values()) == 2
+    return {"subjects": {first.chapter.subject_id, second.chapter.subject_id}}
+
+
+def test_single_file_round_trip_includes_archived_scores(app, tmp_path, scores):
+    path = str(tmp_path / "scores.parquet")
+    stats = export_scores_parquet(path, batch_size=3)
+    assert stats["rows"] == 4
+    assert stats["files"] == 1
+
+    table = pq.read_table(path)
+    assert table.num_rows == 4
+    assert sorted(table.column("total_scored").to_pylist()) == [1, 2, 3, 4]
+    assert set(table.column("email").to_pylist()) == {"candidate@example.com"}
+    assert set(table.column("subject_id").to_pylist()) == scores["subjects"]
+    assert min(table.column("time_stamp_of_attempt").to_pylist()) == datetime.datetime(2024, 1, 15, 9)
+
+
+def test_partitioned_by_subject_and_month(app, tmp_path, scores):
+    root = str(tmp_path / "scores")
+    stats = export_scores_parquet(root, partition_by=("subject", "month"), batch_size=3)
+    assert stats["rows"] == 4
+    assert stats["files"] == 4
+
+    directories = {os.path.relpath(directory, root)
+                   for directory, _, files in os.walk(root) if files}
+    assert directories == {os.path.join(f"subject_id={subject}", f"month={month}")
+                           for subject in scores["subjects"] for month in ("2024-01", "2024-03")}
+
+    table = ds.dataset(root, format="parquet", partitioning="hive").to_table()
+    assert table.num_rows == 4
+    assert "subject_id" in table.column_names
+    rows = sorted(zip(table.column("month").to_pylist(), table.column("total_scored").to_pylist()))
+    assert rows == [("2024-01", 1), ("2024-01", 2), ("2024-03", 3), ("2024-03", 4)]
+
+
+def test_unknown_partition_key_is_rejected(app, tmp_path):
+    with pytest.raises(ValueError):
+        export_scores_parquet(str(tmp_path / "scores"), partition_by=("quiz",))
@@ -0,0 +1,87 @@
+"""Chunked background deletes of subjects, chapters and scores (app/utils/purge.py)."""
+import datetime
+
+import pytest
+
+from app.extensions import db
+from app.models import Subject, Chapter, Quiz, Question, Score, ArchivedScore, QuestionBucket
+from app.utils import purge
+from app.utils.catalog import catalog
+
+
+def _count(model):
+    return db.session.scalar(db.select(db.func.count()).select_from(model))
+
+
+def _attempt(quiz, user, days_ago, model=Score, **extra):
+    db.session.add(model(quiz_id=quiz.id, user_id=user.id, total_scored=1, total_possible=4,
+                         time_stamp_of_attempt=datetime.datetime.now() - datetime.timedelta(days=days_ago), **extra))
+    db.session.commit()
+
+
+def test_delete_subject_removes_everything_under_it_in_chunks(app, client, admin, user, auth_headers, make_quiz):
+    quiz, kept = make_quiz(questions=5), make_quiz(questions=2)
+    quiz_id, kept_id, subject_id = quiz.id, kept.id, quiz.chapter.subject_id
+    response = client.post(f"/admin/quizzes/{quiz_id}/questions", headers=auth_headers(admin), json={
+        "question_statement": "Which gas do plants absorb from the air?", "option1": "a", "option2": "b",
+        "option3": "c", "option4": "d", "correct_option": 1
+    })
+    assert response.status_code == 201
+    _attempt(quiz, user, days_ago=1)
+    _attempt(quiz, user, days_ago=400, model=ArchivedScore, id=1000, archive_month="2020-01")
+
+    progress = []
+    deleter = purge.ChunkedDelete(progress.append, chunk_size=2)
+    deleter.chapters([quiz.chapter_id])
+    deleter.rows(Subject, Subject.id == subject_id)
+
+    assert deleter.counts["question"] == 6 and deleter.counts["score"] == 1 and deleter.counts["score_archive"] == 1
+    assert deleter.counts["question_bucket"] > 0
+    # One report per chunk, each with the running totals
+    assert len(progress) > 4 and progress[-1] == deleter.counts
+    assert db.session.get(Subject, subject_id) is None
+    assert _count(QuestionBucket) == 0 and _count(Score) == 0 and _count(ArchivedScore) == 0
+    assert _count(Question) == 2 and db.session.get(Quiz, kept_id) is not None
+    assert quiz_id not in catalog.snapshot().quizzes and kept_id in catalog.snapshot().quizzes
+
+
+def test_delete_chapter_leaves_its_subject(app, make_quiz):
+    quiz = make_quiz(questions=3)
+    subject_id, chapter_id = quiz.chapter.subject_id, quiz.chapter_id
+
+    assert purge.delete_chapter(chapter_id)["chapter"] == 1
+    assert db.session.get(Chapter, chapter_id) is None and _count(Question) == 0
+    assert db.session.get(Subject, subject_id) is not None
+    assert chapter_id not in catalog.snapshot().chapters
+
+
+def test_purge_scores_by_age_and_quiz(app, user, make_quiz):
+    first, second = make_quiz(questions=1), make_quiz(questions=1)
+    for quiz in (first, second):
+        _attempt(quiz, user, days_ago=1)
+        _attempt(quiz, user, days_ago=100)
+    _attempt(first, user, days_ago=400, model=ArchivedScore, id=1000, archive_month="2020-01")
+
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=30)
+    assert purge.purge_scores(before=cutoff, quiz_id=first.id) == {"score": 1, "score_archive": 1}
+    assert _count(Score) == 3
+    assert purge.purge_scores() == {"score": 3, "score_archive": 0}
+
+
+def test_deleting_a_subject_hides_it_before_the_job_runs(client, admin, auth_headers, make_quiz):
+    quiz = make_quiz()
+    subject_id = quiz.chapter.subject_id
+
+    response = client.delete(f"/admin/subjects/{subject_id}", headers=auth_headers(admin))
+    assert response.status_code == 202
+    assert "task_id" in response.get_json()
+    subjects = client.get("/quiz/subjects", headers=auth_headers(admin)).get_json()["subjects"]
+    assert subject_id not in [subject["id"] for subject in subjects]
+
+
+@pytest.mark.parametrize("body", [{}, {"quiz_id": True}, {"quiz_id": "3"}, {"before": "yesterday"}, {"all": 1}])
+def test_purge_request_is_validated_before_queueing(client, admin, auth_headers, monkeypatch, body):
+    from app import tasks
+    monkeypatch.setattr(tasks.purge_scores, "delay", lambda *args: pytest.fail("purge was queued"))
+    response = client.post("/admin/scores/purge", json=body, headers=auth_headers(admin))
+    assert response.status_code == 400
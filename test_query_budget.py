@@ -0,0 +1,265 @@
+"""
+SQL query budget for every API endpoint.
+
+Each route in auth_bp, quiz_bp, user_bp and admin_bp is called through the Flask
+test client against an in-memory SQLite database seeded at two sizes. The number
+of SQL statements a request runs must stay within a fixed budget that does not
+depend on how much data is in the tables, so N+1 patterns fail here.
+
+    python -m pytest -q test_query_budget.py
+"""
+import datetime
+import itertools
+from contextlib import contextmanager
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app
+from app.config import Config
+from app.commands import create_admin_if_not_exists
+from app.extensions import db, bcrypt
+from app.models import User, Subject, Chapter, Quiz, Question, Score
+from app.utils.dedup import index_missing_questions
+from app.utils.catalog import catalog
+from app.utils.parquet_export import parquet_available
+
+SIZES = {
+    "small": {"subjects": 2, "chapters": 2, "questions": 3, "users": 3},
+    "large": {"subjects": 4, "chapters": 8, "questions": 12, "users": 20},
+}
+
+# Routes deliberately left out, with the reason
+EXEMPT = {}
+
+# Nothing listens on port 1, so every Redis client fails fast whatever runs on the developer's machine
+UNREACHABLE_REDIS = {name: "redis://127.0.0.1:1/0" for name in vars(Config) if name.endswith("_REDIS_URL")}
+
+_unique = itertools.count()
+
+
+def seed(sizes):
+    password_hash = bcrypt.generate_password_hash("password").decode("utf-8")
+    users = [
+        User(email=f"user{i}@example.com", full_name=f"User {i}", qualification="Bachelor",
+             password_hash=password_hash)
+        for i in range(sizes["users"])
+    ]
+    db.session.add_all(users)
+
+    past = datetime.datetime.now() - datetime.timedelta(days=1)
+    quizzes = []
+    for s in range(sizes["subjects"]):
+        subject = Subject(name=f"Subject {s}", description="Seeded subject")
+        db.session.add(subject)
+        db.session.flush()
+        for c in range(sizes["chapters"]):
+            chapter = Chapter(name=f"Chapter {s}.{c}", description="Seeded chapter", subject_id=subject.id)
+            db.session.add(chapter)
+            db.session.flush()
+            quiz = Quiz(chapter_id=chapter.id, date_of_quiz=past, time_duration=30, remarks="")
+            db.session.add(quiz)
+            quizzes.append(quiz)
+        # A chapter without a quiz, for create_quiz
+        db.session.add(Chapter(name=f"Chapter {s}.open", subject_id=subject.id))
+    db.session.flush()
+
+    for quiz in quizzes:
+        for q in range(sizes["questions"]):
+            db.session.add(Question(
+                quiz_id=quiz.id, question_statement=f"Seeded question {quiz.id}-{q} about topic {q * 7}?",
+                option1="a", option2="b", option3="c", option4="d", correct_option=1 + q % 4
+            ))
+    db.session.flush()
+
+    for user in users:
+        for quiz in quizzes:
+            db.session.add(Score(quiz_id=quiz.id, user_id=user.id, time_stamp_of_attempt=past,
+                                 total_scored=1, total_possible=sizes["questions"]))
+    db.session.commit()
+
+    # Questions created through the API are indexed on insert; do the same for seeded ones
+    index_missing_questions(Question.query)
+
+
+@pytest.fixture(scope="module", params=list(SIZES))
+def env(request):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "SQLALCHEMY_BINDS": {},
+        "SQLALCHEMY_REPLICA_BINDS": [],
+        "CACHE_TYPE": "SimpleCache",
+        "BCRYPT_LOG_ROUNDS": 4,
+        "JWT_COOKIE_SECURE": False,
+        **UNREACHABLE_REDIS,
+    })
+
+    from app.tasks import celery
+    celery.conf.update(broker_url="memory://", result_backend="cache+memory://")
+
+    with app.app_context():
+        db.create_all()
+        create_admin_if_not_exists()
+        seed(SIZES[request.param])
+        # Load the catalog snapshot up front, as a worker would have after its first request
+        catalog.snapshot()
+
+        admin = User.query.filter_by(role="admin").first()
+        user = User.query.filter_by(email="user0@example.com").first()
+        subject = Subject.query.order_by(Subject.id).first()
+        chapter = Chapter.query.filter_by(subject_id=subject.id).order_by(Chapter.id).first()
+        quiz = Quiz.query.filter_by(chapter_id=chapter.id).first()
+        # Deleted by the delete cases (the spare chapter is the first subject's second), so no other case uses them
+        spare_subject = Subject.query.order_by(Subject.id.desc()).first()
+        ids = {
+            "subject_id": subject.id,
+            "spare_subject_id": spare_subject.id,
+            "spare_chapter_id": Chapter.query.filter_by(subject_id=subject.id).order_by(Chapter.id).offset(1).first().id,
+            "chapter_id": chapter.id,
+            "quiz_id": quiz.id,
+            "question_id": Question.query.filter_by(quiz_id=quiz.id).order_by(Question.id).first().id,
+            "question_ids": [q.id for q in Question.query.filter_by(quiz_id=quiz.id)],
+            "admin_token": create_access_token(identity=str(admin.id)),
+            "user_token": create_access_token(identity=str(user.id)),
+            # Logging out revokes the token, so it gets one of its own
+            "logout_token": create_access_token(identity=str(user.id)),
+        }
+
+        queries = {"count": 0}
+
+        def count_query(*args):
+            queries["count"] += 1
+
+        event.listen(db.engine, "before_cursor_execute", count_query)
+        yield app, ids, queries
+        event.remove(db.engine, "before_cursor_execute", count_query)
+        db.session.remove()
+        db.drop_all()
+
+
+@contextmanager
+def counting(queries):
+    queries["count"] = 0
+    yield queries
+
+
+def _open_chapter(ids):
+    chapter = Chapter.query.filter(Chapter.name.like("%.open")).first()
+    return {"chapter_id": chapter.id, "date_of_quiz": "2030-01-01 10:00:00", "time_duration": 30}
+
+
+def _question(i):
+    return {"question_statement": f"Budget question {i} number {next(_unique)}?", "option1": "a",
+            "option2": "b", "option3": "c", "option4": "d", "correct_option": 2}
+
+
+# endpoint: (method, url, json payload factory or None, token, expected status, query budget)
+CASES = {
+    "auth.register": ("POST", "/auth/register", lambda ids: {
+        "email": f"new{next(_unique)}@example.com", "password": "password", "full_name": "New",
+        "qualification": "Bachelor", "dob": "2000-01-01", "phone_number": "1234567890"
+    }, None, 201, 3),
+    "auth.login": ("POST", "/auth/login", lambda ids: {"email": "user0@example.com", "password": "password"},
+                   None, 200, 1),
+    "auth.logout": ("POST", "/auth/logout", None, "logout", 200, 0),
+    "auth.get_current_user": ("GET", "/auth/me", None, "user", 200, 1),
+
+    "quiz.get_all_subjects": ("GET", "/quiz/subjects", None, "user", 200, 0),
+    "quiz.get_all_chapters": ("GET", "/quiz/subjects/{subject_id}/chapters", None, "user", 200, 0),
+    "quiz.get_quiz": ("GET", "/quiz/{quiz_id}", None, "user", 200, 1),
+    "quiz.get_quiz_questions": ("GET", "/quiz/{quiz_id}/questions", None, "user", 200, 1),
+    "quiz.submit_quiz": ("POST", "/quiz/{quiz_id}/submit", lambda ids: {
+        "answers": {str(question_id): 1 for question_id in ids["question_ids"]}
+    }, "user", 200, 2),
+
+    "user.get_profile": ("GET", "/user/profile", None, "user", 200, 1),
+    "user.get_chapters": ("GET", "/user/subject/{subject_id}/chapters", None, "user", 200, 1),
+    "user.check_quiz_availability": ("GET", "/user/quiz/{quiz_id}/check", None, "user", 404, 1),
+    "user.attempt_quiz": ("POST", "/user/quiz/{quiz_id}/attempt", lambda ids: {
+        "answers": [{"question_id": question_id, "option": 1} for question_id in ids["question_ids"]]
+    }, "user", 201, 4),
+    # Without a reachable Redis autosave answers 503; either way it must not run SQL
+    # The seeded quiz is already open, so the stream is one "open" event
+    "user.quiz_events": ("GET", "/user/quiz/{quiz_id}/events", None, "user", 200, 0),
+    "user.autosave_answers": ("POST", "/user/quiz/{quiz_id}/autosave", lambda ids: {
+        "answers": [{"question_id": ids["question_id"], "option": 2}]
+    }, "user", 503, 0),
+    # The window shared by every user for the bucket, then the caller's attempts on those quizzes
+    "user.quiz_calendar": ("GET", "/user/quizzes/calendar?window=week", None, "user", 200, 2),
+    "user.get_scores": ("GET", "/user/scores", None, "user", 200, 1),
+    "user.export_scores": ("GET", "/user/export-scores", None, "user", 202, 0),
+    "user.export_status": ("GET", "/user/export-status/unknown-task", None, "user", 200, 0),
+    "user.clearScores": ("POST", "/user/clear", None, "admin", 202, 1),
+
+    "admin.create_subject": ("POST", "/admin/subjects", lambda ids: {"name": f"New subject {next(_unique)}"},
+                             "admin", 201, 4),
+    "admin.edit_subject": ("POST", "/admin/subjects/edit/{subject_id}", lambda ids: {"name": "Subject 0"},
+                           "admin", 201, 4),
+    "admin.create_chapter": ("POST", "/admin/subjects/{subject_id}/chapters", lambda ids: {
+        "name": f"New chapter {next(_unique)}"
+    }, "admin", 201, 4),
+    "admin.create_quiz": ("POST", "/admin/quizzes", _open_chapter, "admin", 201, 5),
+    "admin.create_question": ("POST", "/admin/quizzes/{quiz_id}/questions", lambda ids: _question(0),
+                              "admin", 201, 7),
+    "admin.create_complete_chapter": ("POST", "/admin/subjects/{subject_id}/complete-chapter", lambda ids: {
+        "chapter": {"name": f"Complete chapter {next(_unique)}"},
+        "quiz": {"date_of_quiz": "2030-01-01T10:00:00", "time_duration": 30},
+        "questions": [_question(i) for i in range(3)]
+    }, "admin", 201, 15),
+    "admin.edit_chapter": ("POST", "/admin/chapters/edit/{chapter_id}", lambda ids: {
+        "description": "Edited", "quiz": {"time_duration": 45, "shuffle_options": True}
+    }, "admin", 200, 7),
+    "admin.edit_question": ("POST", "/admin/questions/edit/{question_id}", lambda ids: {
+        "question_statement": f"Edited question {next(_unique)}?"
+    }, "admin", 200, 8),
+    # Validation reads every row in one query and the write is one executemany UPDATE
+    "admin.bulk_edit_questions": ("POST", "/admin/questions/bulk-edit", lambda ids: {"updates": [
+        {"id": question_id, "question_statement": f"Bulk edited question {next(_unique)}?", "correct_option": 1}
+        for question_id in ids["question_ids"]
+    ]}, "admin", 200, 7),
+    # Deletes, purges and test data builds only queue a job; the catalog lookup runs no SQL
+    "admin.delete_subject": ("DELETE", "/admin/subjects/{spare_subject_id}", None, "admin", 202, 1),
+    "admin.delete_chapter": ("DELETE", "/admin/chapters/{spare_chapter_id}", None, "admin", 202, 1),
+    "admin.purge_scores": ("POST", "/admin/scores/purge", lambda ids: {"before": "2000-01-01"}, "admin", 202, 1),
+    "admin.generate_test_data": ("POST", "/admin/generate-test-data", lambda ids: {"num_users": 1},
+                                 "admin", 202, 1),
+    "admin.job_status": ("GET", "/admin/jobs/unknown-task", None, "admin", 200, 1),
+    "admin.list_users": ("GET", "/admin/users?limit=10", None, "admin", 200, 3),
+    "admin.get_quiz_scores": ("GET", "/admin/quiz/{quiz_id}/scores", None, "admin", 200, 3),
+    "admin.get_duplicate_questions": ("GET", "/admin/subjects/{subject_id}/duplicates", None, "admin", 200, 6),
+    "admin.get_metrics": ("GET", "/admin/metrics", None, "admin", 200, 1),
+    # Only queues the task; pyarrow is optional, without it the endpoint answers 501
+    "admin.export_scores_parquet": ("POST", "/admin/exports/scores", lambda ids: {"partition_by": ["month"]},
+                                    "admin", 202 if parquet_available() else 501, 1),
+    "admin.export_scores_parquet_status": ("GET", "/admin/exports/scores/unknown-task", None, "admin", 200, 1),
+}
+
+
+def test_every_endpoint_has_a_budget(env):
+    app, _, _ = env
+    endpoints = {
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if rule.endpoint.split(".")[0] in ("auth", "quiz", "user", "admin")
+    }
+    missing = endpoints - set(CASES) - set(EXEMPT)
+    assert not missing, f"add a query budget for: {sorted(missing)}"
+
+
+@pytest.mark.parametrize("endpoint", list(CASES))
+def test_query_budget(env, endpoint):
+    app, ids, queries = env
+    method, url, payload, token, status, budget = CASES[endpoint]
+
+    headers = {}
+    if token:
+        headers["Authorization"] = f"Bearer {ids[token + '_token']}"
+    body = payload(ids) if payload else None
+
+    client = app.test_client()
+    with counting(queries):
+        response = client.open(url.format(**ids), method=method, json=body, headers=headers)
+
+    assert response.status_code == status, response.get_data(as_text=True)
+    assert queries["count"] <= budget, f"{endpoint} ran {queries['count']} SQL statements, budget is {budget}"
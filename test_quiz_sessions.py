@@ -0,0 +1,129 @@
+"""Timed quiz sessions and coalesced autosave in Redis (app/utils/quiz_sessions.py)."""
+import datetime
+
+import pytest
+
+from app.extensions import quiz_sessions
+from app.utils.quiz_sessions import QuizSessions
+
+
+def _questions(client, quiz, headers):
+    response = client.get(f"/quiz/{quiz.id}/questions", headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()
+
+
+def _autosave(client, quiz, headers, *answers):
+    return client.post(f"/user/quiz/{quiz.id}/autosave", headers=headers, json={
+        "answers": [{"question_id": question_id, "option": option} for question_id, option in answers]
+    })
+
+
+def _other_worker(app):
+    worker = QuizSessions()
+    worker.init_app(app)
+    app.extensions["quiz_sessions"] = quiz_sessions
+    return worker
+
+
+def test_autosaved_answers_survive_a_reload_and_are_graded(client, user, auth_headers, make_quiz):
+    quiz = make_quiz(questions=3)
+    headers = auth_headers(user)
+    first = _questions(client, quiz, headers)
+    question_id = first["questions"][0]["id"]
+
+    assert _autosave(client, quiz, headers, (question_id, 2)).status_code == 202
+    assert _autosave(client, quiz, headers, (question_id, 1)).status_code == 202
+    reloaded = _questions(client, quiz, headers)
+    # Fetching again neither moves the deadline nor loses the newest answer
+    assert reloaded["deadline"] == first["deadline"]
+    assert reloaded["questions"][0]["option"] == 1
+
+    # The first fixture question's answer is option 1; the autosaved answer is graded
+    response = client.post(f"/user/quiz/{quiz.id}/attempt", headers=headers, json={"answers": []})
+    assert response.status_code == 201
+    assert response.get_json()["score"] == 1
+
+
+def test_autosave_only_accepts_the_candidates_questions_and_options(client, user, auth_headers, make_quiz,
+                                                                    redis_server):
+    quiz = make_quiz(questions=4, sample_size=2)
+    other = make_quiz(questions=1)
+    headers = auth_headers(user)
+    shown = [q["id"] for q in _questions(client, quiz, headers)["questions"]]
+    not_shown = next(q.id for q in quiz.questions if q.id not in shown)
+
+    for answer in [(shown[0], True), (True, 1), (shown[0], 5), (shown[0], -1), (not_shown, 1),
+                   (other.questions[0].id, 1), (10 ** 9, 1)]:
+        assert _autosave(client, quiz, headers, answer).status_code == 400, answer
+    assert _autosave(client, quiz, headers, (shown[0], 4), (shown[1], 0)).status_code == 202
+
+    quiz_sessions.flush()
+    saved = redis_server.hgetall(f"quizsession:{quiz.id}:{user.id}:answers")
+    assert sorted(int(question_id) for question_id in saved) == sorted(shown)
+
+
+def test_late_flush_from_another_worker_does_not_prefill_the_next_attempt(app, client, user, auth_headers,
+                                                                          make_quiz, redis_server):
+    quiz = make_quiz(questions=2)
+    headers = auth_headers(user)
+    question_id = _questions(client, quiz, headers)["questions"][0]["id"]
+
+    # Another worker buffered an autosave for this attempt and flushes only after it was submitted
+    other = _other_worker(app)
+    attempt = other.get(quiz.id, user.id)
+    other.autosave(attempt, {question_id: 2})
+    assert client.post(f"/user/quiz/{quiz.id}/attempt", headers=headers, json={"answers": []}).status_code == 201
+    other.flush()
+    assert not redis_server.exists(f"quizsession:{quiz.id}:{user.id}:answers")
+
+    # Nor once the next attempt has started
+    other.autosave(attempt, {question_id: 2})
+    _questions(client, quiz, headers)
+    other.flush()
+    assert all(q["option"] == 0 for q in _questions(client, quiz, headers)["questions"])
+
+
+def test_session_cannot_start_before_the_quiz_opens(client, user, auth_headers, make_quiz, redis_server):
+    quiz = make_quiz(questions=2, date_of_quiz=datetime.datetime.now() + datetime.timedelta(hours=1))
+    response = client.get(f"/quiz/{quiz.id}/questions", headers=auth_headers(user))
+    assert response.status_code == 403
+    assert not redis_server.exists(f"quizsession:{quiz.id}:{user.id}")
+
+
+def test_quiz_details_never_include_question_text(client, user, auth_headers, make_quiz, redis_server):
+    quiz = make_quiz(questions=5, sample_size=3, date_of_quiz=datetime.datetime.now() + datetime.timedelta(hours=1))
+    response = client.get(f"/quiz/{quiz.id}", headers=auth_headers(user))
+    assert response.status_code == 200
+    details = response.get_json()["quiz"]
+    assert "questions" not in details and details["question_count"] == 3
+    assert "Question 0 of quiz" not in response.get_data(as_text=True)
+    # Looking at the details starts no timer
+    assert not redis_server.exists(f"quizsession:{quiz.id}:{user.id}")
+
+
+@pytest.mark.parametrize("payload", [
+    ["not", "an", "object"],
+    {"answers": "1:2"},
+    {"answers": [3]},
+    {"answers": [{"question_id": "1", "option": 2}]},
+    {"answers": [{"question_id": 1, "option": True}]},
+    {"answers": [{"question_id": 1}]},
+])
+def test_malformed_submissions_are_rejected(client, user, auth_headers, make_quiz, payload):
+    quiz = make_quiz(questions=2)
+    headers = auth_headers(user)
+    _questions(client, quiz, headers)
+    response = client.post(f"/user/quiz/{quiz.id}/attempt", headers=headers, json=payload)
+    assert response.status_code == 400
+
+
+def test_submission_after_the_deadline_is_refused(app, client, user, auth_headers, make_quiz):
+    app.config["QUIZ_SUBMIT_GRACE_SECONDS"] = 0
+    quiz = make_quiz(questions=2, time_duration=0)
+    headers = auth_headers(user)
+    question_id = _questions(client, quiz, headers)["questions"][0]["id"]
+
+    assert _autosave(client, quiz, headers, (question_id, 1)).status_code == 403
+    response = client.post(f"/user/quiz/{quiz.id}/attempt", headers=headers, json={"answers": []})
+    assert response.status_code == 403
@@ -0,0 +1,31 @@
+"""Redis token-bucket rate limits (app/utils/ratelimit.py) behind the load balancer."""
+import itertools
+
+from app.extensions import limiter
+
+_unique = itertools.count()
+BALANCER = {"REMOTE_ADDR": "10.0.0.1"}
+
+
+def _register(client, forwarded_for):
+    return client.post("/auth/register", environ_base=BALANCER, headers={"X-Forwarded-For": forwarded_for}, json={
+        "email": f"new{next(_unique)}@example.com", "password": "password", "full_name": "New",
+        "qualification": "Bachelor", "dob": "2000-01-01", "phone_number": "1234567890"
+    })
+
+
+def test_burst_is_limited_per_forwarded_client(client, redis_server):
+    # register allows a burst of 5
+    assert [_register(client, "203.0.113.7").status_code for _ in range(5)] == [201] * 5
+    limited = _register(client, "203.0.113.7")
+    assert limited.status_code == 429
+    # 20/hour refills one token every 180 s
+    assert 1 <= int(limited.headers["Retry-After"]) <= 180
+
+    # Another client behind the same balancer has its own bucket
+    assert _register(client, "198.51.100.2").status_code == 201
+    # Buckets live in Redis, shared by every worker, keyed on the forwarded address
+    key = "ratelimit:auth.register:20/hour:ip:203.0.113.7"
+    assert redis_server.exists(key)
+    assert key not in limiter.local._buckets
+
@@ -0,0 +1,80 @@
+"""Read replica routing (app/utils/replicas.py) with a second SQLite file standing in for the replica."""
+import sqlite3
+
+import pytest
+
+from app.extensions import db
+from app.utils.replicas import PIN_COOKIE, monitor
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    return {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+        "SQLALCHEMY_BINDS": {"replica_0": f"sqlite:///{tmp_path / 'replica.db'}"},
+        "SQLALCHEMY_REPLICA_BINDS": ["replica_0"],
+    }
+
+
+@pytest.fixture
+def replica(app, tmp_path, user, make_quiz):
+    """Copy the seeded primary into the replica file, then tell the two apart by the candidate's name"""
+    quiz_id = make_quiz(questions=2).id
+    with sqlite3.connect(tmp_path / "primary.db") as source, sqlite3.connect(tmp_path / "replica.db") as target:
+        source.backup(target)
+        target.execute("UPDATE user SET full_name = 'Replica' WHERE id = ?", (user.id,))
+    monitor.reset()
+    yield quiz_id, tmp_path / "primary.db", tmp_path / "replica.db"
+    monitor.reset()
+
+
+def _name(client, headers):
+    # The tests share one app context, so drop identities loaded by the previous request
+    db.session.remove()
+    response = client.get("/user/profile", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()["user"]["full_name"]
+
+
+def _scores(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT count(*) FROM score").fetchone()[0]
+
+
+def test_reads_go_to_the_replica_and_writes_to_the_primary(client, user, auth_headers, replica):
+    quiz_id, primary, replica_path = replica
+    headers = auth_headers(user)
+    assert _name(client, headers) == "Replica"
+
+    db.session.remove()
+    assert client.get(f"/quiz/{quiz_id}/questions", headers=headers).status_code == 200
+    response = client.post(f"/user/quiz/{quiz_id}/attempt", headers=headers, json={"answers": []})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    assert (_scores(primary), _scores(replica_path)) == (1, 0)
+
+    # The write pins this client to the primary so it reads what it just wrote
+    assert client.get_cookie(PIN_COOKIE) is not None
+    assert _name(client, headers) == "Candidate"
+
+    client.delete_cookie(PIN_COOKIE)
+    assert _name(client, headers) == "Replica"
+
+
+def test_lagging_replica_sends_reads_to_the_primary(app, client, user, auth_headers, replica):
+    headers = auth_headers(user)
+    app.config["REPLICA_LAG_QUERY"] = "SELECT 60"
+    assert _name(client, headers) == "Candidate"
+
+    app.config["REPLICA_LAG_QUERY"] = "SELECT 0"
+    # Health is cached for REPLICA_LAG_CHECK_INTERVAL
+    assert _name(client, headers) == "Candidate"
+    monitor.reset()
+    assert _name(client, headers) == "Replica"
+
+
+def test_admin_routes_always_use_the_primary(client, admin, user, auth_headers, replica):
+    headers = auth_headers(admin)
+    db.session.remove()
+    response = client.get("/admin/users?limit=10", headers=headers)
+    assert response.status_code == 200
+    assert "Candidate" in [row["full_name"] for row in response.get_json()["users"]]
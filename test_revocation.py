@@ -0,0 +1,61 @@
+"""Token revocation on logout through the Redis jti denylist and Bloom filter (app/utils/revocation.py)."""
+import time
+
+from flask_jwt_extended import create_access_token, decode_token
+
+from app.extensions import revocations
+from app.utils.revocation import BloomFilter, TokenRevocation, KEY_PREFIX
+
+
+def _login(client):
+    response = client.post("/auth/login", json={"email": "candidate@example.com", "password": "password"})
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+def test_token_is_rejected_after_logout(client, user, redis_server):
+    headers = _login(client)
+    other_session = _login(client)
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    rejected = client.get("/auth/me", headers=headers)
+    assert rejected.status_code == 401
+    assert rejected.get_json() == {"error": "Token has been revoked"}
+
+    # Only that token is revoked, and only until it would have expired anyway
+    assert client.get("/auth/me", headers=other_session).status_code == 200
+    jti = decode_token(headers["Authorization"].split()[1])["jti"]
+    assert 0 < redis_server.ttl(KEY_PREFIX + jti) <= 2 * 3600 + 1
+
+
+def test_revocation_by_another_worker_applies_at_the_next_rebuild(app, client, user):
+    token = create_access_token(identity=str(user.id))
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    decoded = decode_token(token)
+    TokenRevocation().revoke(decoded["jti"], decoded["exp"])
+    # This worker's filter was built before the revocation and has not been rebuilt yet
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    app.config["REVOCATION_REFRESH_SECONDS"] = 0
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_unrevoked_tokens_are_accepted_without_asking_redis(app, user, monkeypatch):
+    revocations.revoke("revoked-jti", time.time() + 60)
+    assert revocations.is_revoked("revoked-jti")
+
+    def no_redis(config):
+        raise AssertionError("a filter miss must not reach Redis")
+    monkeypatch.setattr(revocations, "_redis", no_redis)
+    assert not revocations.is_revoked("some-other-jti")
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+    assert all(f"jti-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
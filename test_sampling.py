@@ -0,0 +1,76 @@
+"""Per-candidate question sampling, option shuffling and grading (app/utils/sampling.py)."""
+import pytest
+
+from app.utils.catalog import QuizNode
+from app.utils.sampling import candidate_layout, grade_answers
+
+POOL = [(question_id, ["a", "b", "c", "d"]) for question_id in range(10, 20)]
+
+
+def _quiz(sample_size=None, shuffle_questions=False, shuffle_options=False, shuffle_seed=0):
+    return QuizNode(id=1, chapter_id=1, date_of_quiz=None, time_duration=30, remarks="", sample_size=sample_size,
+                    shuffle_questions=shuffle_questions, shuffle_options=shuffle_options, shuffle_seed=shuffle_seed)
+
+
+def test_layout_is_deterministic_per_candidate_and_seed():
+    quiz = _quiz(sample_size=4, shuffle_questions=True, shuffle_options=True)
+    layout = candidate_layout(quiz, POOL, user_id=7)
+    assert candidate_layout(quiz, POOL, user_id=7) == layout
+    assert len(layout) == 4 and len({question_id for question_id, _ in layout}) == 4
+    assert all(sorted(order) == [1, 2, 3, 4] for _, order in layout)
+
+    others = [candidate_layout(quiz, POOL, user_id=user_id) for user_id in range(8, 14)]
+    assert any(other != layout for other in others)
+    # A new seed reshuffles everyone
+    assert candidate_layout(quiz._replace(shuffle_seed=1), POOL, user_id=7) != layout
+
+
+def test_unshuffled_sample_keeps_pool_order():
+    layout = candidate_layout(_quiz(sample_size=5), POOL, user_id=3)
+    question_ids = [question_id for question_id, _ in layout]
+    assert len(question_ids) == 5 and question_ids == sorted(question_ids)
+    assert all(order == [1, 2, 3, 4] for _, order in layout)
+
+
+@pytest.mark.parametrize("sample_size", [None, len(POOL), len(POOL) + 5])
+def test_sample_size_at_or_above_pool_serves_every_question(sample_size):
+    assert candidate_layout(_quiz(sample_size=sample_size), POOL, user_id=3) == [
+        (question_id, [1, 2, 3, 4]) for question_id, _ in POOL
+    ]
+    shuffled = candidate_layout(_quiz(sample_size=sample_size, shuffle_questions=True), POOL, user_id=3)
+    assert sorted(question_id for question_id, _ in shuffled) == [question_id for question_id, _ in POOL]
+
+
+def test_missing_options_are_never_shown():
+    layout = candidate_layout(_quiz(shuffle_options=True), [(1, ["a", "b", None, None])], user_id=3)
+    assert sorted(layout[0][1]) == [1, 2]
+
+
+def test_grading_maps_shown_positions_back_to_original_options():
+    layout = [(10, [3, 1, 4, 2]), (11, [2, 4, 1, 3])]
+    correct = {10: 4, 11: 2, 12: 1}
+    # Position 3 shows option 4 and position 1 shows option 2
+    assert grade_answers(layout, correct, [(10, 3), (11, 1)]) == (2, 2)
+    assert grade_answers(layout, correct, [(10, 4), (11, 2)]) == (0, 2)
+    # Questions outside the candidate's sample, repeats and out of range positions earn nothing
+    assert grade_answers(layout, correct, [(12, 1), (10, 3), (10, 3), (11, 5)]) == (1, 2)
+
+
+def test_candidate_scores_full_marks_on_a_shuffled_sampled_quiz(client, user, auth_headers, make_quiz):
+    quiz = make_quiz(questions=6, sample_size=3, shuffle_questions=True, shuffle_options=True, shuffle_seed=5)
+    headers = auth_headers(user)
+
+    response = client.get(f"/quiz/{quiz.id}/questions", headers=headers)
+    assert response.status_code == 200
+    questions = response.get_json()["questions"]
+    assert len(questions) == 3
+
+    # Fixture question i has correct option 1 + i % 4 and options a..d, so the right text is known
+    statements = {f"Question {i} of quiz {quiz.id}, on topic number {i * 7}?": "abcd"[i % 4] for i in range(6)}
+    right = {str(q["id"]): q["options"].index(statements[q["question_statement"]]) + 1 for q in questions}
+    wrong = {question_id: position % 4 + 1 for question_id, position in right.items()}
+
+    graded = client.post(f"/quiz/{quiz.id}/submit", headers=headers, json={"answers": right})
+    assert graded.get_json()["total_score"] == 3
+    graded = client.post(f"/quiz/{quiz.id}/submit", headers=headers, json={"answers": wrong})
+    assert graded.get_json()["total_score"] == 0
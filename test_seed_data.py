@@ -0,0 +1,48 @@
+"""Synthetic data generator (seed_data.py) against the caches that outlive a re-seed."""
+from types import SimpleNamespace
+
+from app.models import Question
+from app.utils.sampling import question_pool
+from seed_data import seed_data
+
+SMALL = {"num_users": 2, "num_subjects": 1, "chapters_per_subject": 2, "questions_per_quiz": 3, "scores_per_user": 1}
+
+
+def _pool_from_db(quiz_id):
+    return [q.question_statement for q in Question.query.filter_by(quiz_id=quiz_id).order_by(Question.id)]
+
+
+def test_reseeding_drops_cached_question_pools(app):
+    seed_data(seed=1, **SMALL)
+    quiz_id = Question.query.first().quiz_id
+    before = [q["question_statement"] for q in question_pool(quiz_id)]
+
+    # The new dataset reuses the same quiz and question ids with different content
+    seed_data(seed=2, **SMALL)
+    after = [q["question_statement"] for q in question_pool(quiz_id)]
+    assert after == _pool_from_db(quiz_id)
+    assert after != before
+
+
+def test_generate_endpoint_caps_counts_and_queues_a_job(app, client, admin, auth_headers, monkeypatch):
+    from app.tasks import generate_test_data
+    headers = auth_headers(admin)
+    limit = app.config["TEST_DATA_LIMITS"]["num_users"]
+
+    for payload in ({"num_users": limit + 1}, {"scores_per_user": -1}, {"num_subjects": True}, {"seed": False}):
+        assert client.post("/admin/generate-test-data", headers=headers, json=payload).status_code == 400
+
+    queued = []
+
+    def delay(*args, **kwargs):
+        queued.append((args, kwargs))
+        return SimpleNamespace(id="job-1")
+
+    monkeypatch.setattr(generate_test_data, "delay", delay)
+    response = client.post("/admin/generate-test-data", headers=headers, json=dict(SMALL, seed=3, clear=False))
+    assert response.status_code == 202
+    assert response.get_json()["task_id"] == "job-1"
+    assert queued == [((SMALL,), {"seed": 3, "clear": False})]
+
+    stats = generate_test_data.run(SMALL, seed=3, clear=False)
+    assert stats["tables"]["users"]["rows"] == SMALL["num_users"]
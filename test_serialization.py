@@ -0,0 +1,30 @@
+"""JSON encoding through the orjson provider (app/utils/serialization.py)."""
+import datetime
+import decimal
+
+from app.extensions import db
+from app.models import Score
+
+
+def test_dates_are_iso_8601(client, user, auth_headers, make_quiz):
+    quiz = make_quiz(date_of_quiz=datetime.datetime(2030, 1, 1, 10, 0))
+    user.dob = datetime.date(2000, 2, 29)
+    db.session.add(Score(quiz_id=quiz.id, user_id=user.id, total_scored=1, total_possible=4,
+                         time_stamp_of_attempt=datetime.datetime(2029, 12, 31, 23, 59, 58, 250000)))
+    db.session.commit()
+    headers = auth_headers(user)
+
+    # Previously str(datetime), "2030-01-01 10:00:00"
+    assert client.get(f"/quiz/{quiz.id}", headers=headers).get_json()["quiz"]["date_of_quiz"] == "2030-01-01T10:00:00"
+    assert client.get("/user/profile", headers=headers).get_json()["user"]["dob"] == "2000-02-29"
+    # Previously RFC 822, "Mon, 31 Dec 2029 23:59:58 GMT"
+    scores = client.get("/user/scores", headers=headers).get_json()["scores"]
+    assert scores[0]["time_stamp_of_attempt"] == "2029-12-31T23:59:58.250000"
+
+
+def test_keys_are_sorted_and_other_types_use_flask_defaults(app):
+    assert app.json.dumps({"b": 1, 2: "two", "a": decimal.Decimal("1.50")}) == '{"2":"two","a":"1.50","b":1}'
+    response = app.json.response(z=1, a=[1, 2])
+    assert response.get_data() == b'{"a":[1,2],"z":1}\n'
+    assert response.mimetype == "application/json"
+    assert app.json.loads(b'{"x": [1, 2.5, null]}') == {"x": [1, 2.5, None]}
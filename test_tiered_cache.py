@@ -0,0 +1,112 @@
+"""In-process LRU in front of Redis with single-flight recompute (app/utils/tiered_cache.py)."""
+import threading
+import time
+
+from flask import jsonify
+
+from app.extensions import tiered_cache
+from app.utils.tiered_cache import TieredCache, KEY_PREFIX
+
+
+def _worker(app):
+    worker = TieredCache()
+    worker.init_app(app)
+    app.extensions["tiered_cache"] = tiered_cache
+    return worker
+
+
+def _counter(value="value"):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return value
+    return compute, calls
+
+
+def test_second_worker_reads_the_first_workers_entry_from_redis(app, redis_server):
+    other = _worker(app)
+    compute, calls = _counter()
+    assert tiered_cache.get_or_compute("key", compute, ttl=60) == "value"
+    assert tiered_cache.get_or_compute("key", compute, ttl=60) == "value"
+    assert other.get_or_compute("key", compute, ttl=60) == "value"
+    assert len(calls) == 1
+    assert redis_server.exists(KEY_PREFIX + "key")
+
+
+def test_invalidation_reaches_other_workers_once_l1_rechecks(app):
+    app.config["TIERED_CACHE_L1_SECONDS"] = 0
+    other = _worker(app)
+    compute, calls = _counter()
+    tiered_cache.get_or_compute("key", compute, ttl=60)
+    other.get_or_compute("key", compute, ttl=60)
+
+    tiered_cache.delete("key")
+    assert other.get_or_compute("key", compute, ttl=60) == "value"
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_compute_once(app):
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tiered_cache.get_or_compute("key", slow, ttl=60)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+def test_stale_entry_is_served_while_another_worker_refreshes(app, redis_server):
+    tiered_cache.set("key", "old", ttl=0, stale_ttl=60)
+    # Another worker holds the recompute lock
+    redis_server.set(KEY_PREFIX + "key:lock", "elsewhere")
+    compute, calls = _counter("new")
+    assert tiered_cache.get_or_compute("key", compute, ttl=60) == "old"
+    assert calls == []
+
+    redis_server.delete(KEY_PREFIX + "key:lock")
+    assert tiered_cache.get_or_compute("key", compute, ttl=60) == "new"
+    assert len(calls) == 1
+
+
+def test_error_responses_are_not_cached(app):
+    calls = []
+
+    @tiered_cache.cached(ttl=60)
+    def view(quiz_id):
+        calls.append(quiz_id)
+        if len(calls) == 1:
+            return jsonify({"error": "Database unavailable"}), 503
+        return jsonify({"quiz": quiz_id})
+
+    with app.test_request_context():
+        assert view(1).status_code == 503
+        assert view(1).get_json() == {"quiz": 1}
+        assert view(1).get_json() == {"quiz": 1}
+        assert calls == [1, 1]
+
+        view.invalidate(1)
+        view(1)
+        assert calls == [1, 1, 1]
+
+
+def test_clear_drops_every_entry_but_nothing_else(app, redis_server):
+    redis_server.set("rate:someone", 1)
+    for number in range(3):
+        tiered_cache.set(f"key{number}", number, ttl=60)
+
+    tiered_cache.clear()
+    assert redis_server.keys(KEY_PREFIX + "*") == []
+    assert redis_server.exists("rate:someone")
+    compute, calls = _counter()
+    tiered_cache.get_or_compute("key0", compute, ttl=60)
+    assert len(calls) == 1